@@ -0,0 +1,314 @@
+"""
+Admission control: a bound on the requests each worker process runs at once, per route, shedding the excess.
+
+Every request takes a slot in the pool of its route (ADMISSION["ROUTES"], by URL name) or in the default pool before
+its view runs, and gives it back once its response is built, or sent for streaming responses. When a pool is full,
+requests queue for up to their queue timeout and then get a fast 503 with Retry-After, instead of piling up behind
+slow requests until every worker thread is taken. Writes and requests with credentials have priority: they are
+admitted before queued anonymous reads, wait longer, and can use the RESERVED share of each pool that anonymous reads
+cannot, so a spike of anonymous reads never starves them.
+"""
+
+import asyncio
+import threading
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.http import JsonResponse
+
+HIGH = "high"
+LOW = "low"
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+
+def admission_settings():
+    return getattr(settings, "ADMISSION", {})
+
+
+class Pool:
+    """
+    Concurrency limit of a route, with a bounded queue served by priority.
+    Anonymous reads only take a slot while fewer than limit - reserved slots are used and no priority request is queued.
+    """
+
+    def __init__(self, name, limit, reserved=0.25, queue_size=100):
+        self.name = name
+        self.limit = limit
+        self.low_limit = max(1, limit - round(limit * reserved))
+        self.queue_size = queue_size
+        self.active = 0
+        self.waiting = {HIGH: 0, LOW: 0}
+        self.condition = threading.Condition()
+        # Events of the requests queued on event loops, set when the threads waiting on the condition are woken up.
+        self.async_waiters = []
+        self.stats = {
+            priority: {"admitted": 0, "queued": 0, "rejected": 0, "timeouts": 0, "wait_seconds": 0.0}
+            for priority in (HIGH, LOW)
+        }
+
+    def has_room(self, priority):
+        if priority == HIGH:
+            return self.active < self.limit
+        return self.active < self.low_limit and not self.waiting[HIGH]
+
+    def try_acquire(self, priority):
+        """
+        Take a slot for a request of the priority if one is free, without queueing. Returns whether it got one.
+        """
+        with self.condition:
+            if not self.has_room(priority):
+                return False
+            self.active += 1
+            self.stats[priority]["admitted"] += 1
+            return True
+
+    def acquire(self, priority, timeout):
+        """
+        Take a slot for a request of the priority, queueing for up to `timeout` seconds. Returns whether it got one.
+        Requests are rejected at once when the queue is full.
+        """
+        stats = self.stats[priority]
+        with self.condition:
+            if self.try_acquire(priority):
+                return True
+            if timeout <= 0 or self.waiting[HIGH] + self.waiting[LOW] >= self.queue_size:
+                stats["rejected"] += 1
+                return False
+
+            self.waiting[priority] += 1
+            started = time.monotonic()
+            try:
+                admitted = self.condition.wait_for(lambda: self.has_room(priority), timeout)
+            finally:
+                self.waiting[priority] -= 1
+                if priority == HIGH:
+                    # Queued anonymous reads may have been held back by this request only.
+                    self.notify()
+            stats["wait_seconds"] += time.monotonic() - started
+
+            if admitted:
+                self.active += 1
+                stats["admitted"] += 1
+                stats["queued"] += 1
+            else:
+                stats["timeouts"] += 1
+            return admitted
+
+    async def aacquire(self, priority, timeout):
+        """
+        Take a slot like acquire, queueing on the event loop instead of blocking a thread.
+        A request cancelled while queued, such as when its client disconnects, never takes a slot.
+        """
+        stats = self.stats[priority]
+        with self.condition:
+            if self.try_acquire(priority):
+                return True
+            if timeout <= 0 or self.waiting[HIGH] + self.waiting[LOW] >= self.queue_size:
+                stats["rejected"] += 1
+                return False
+            self.waiting[priority] += 1
+
+        loop = asyncio.get_running_loop()
+        started = time.monotonic()
+        admitted = False
+        try:
+            while True:
+                with self.condition:
+                    if self.has_room(priority):
+                        self.active += 1
+                        admitted = True
+                        break
+                    remaining = started + timeout - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    waiter = asyncio.Event()
+                    self.async_waiters.append((loop, waiter))
+                try:
+                    await asyncio.wait_for(waiter.wait(), remaining)
+                except asyncio.TimeoutError:
+                    pass
+                finally:
+                    with self.condition:
+                        if (loop, waiter) in self.async_waiters:
+                            self.async_waiters.remove((loop, waiter))
+        finally:
+            with self.condition:
+                self.waiting[priority] -= 1
+                if priority == HIGH:
+                    self.notify()
+        stats["wait_seconds"] += time.monotonic() - started
+
+        if admitted:
+            stats["admitted"] += 1
+            stats["queued"] += 1
+        else:
+            stats["timeouts"] += 1
+        return admitted
+
+    def notify(self):
+        """
+        Wake up the requests queued on threads and on event loops to check for room. The condition must be held.
+        """
+        self.condition.notify_all()
+        for loop, waiter in self.async_waiters:
+            loop.call_soon_threadsafe(waiter.set)
+        self.async_waiters.clear()
+
+    def release(self):
+        """
+        Give back a slot, admitting the next queued request that has room.
+        """
+        with self.condition:
+            self.active -= 1
+            self.notify()
+
+    def report(self):
+        """
+        Return the limits, current load and counters of the pool.
+        """
+        with self.condition:
+            return {
+                "limit": self.limit,
+                "low_priority_limit": self.low_limit,
+                "active": self.active,
+                "waiting": dict(self.waiting),
+                **{priority: dict(stats) for priority, stats in self.stats.items()},
+            }
+
+
+class AdmissionController:
+    """
+    Pools of the routes with their own limit, and the default pool shared by the other routes.
+    """
+
+    def __init__(self, limit=64, routes=None, reserved=0.25, queue_size=100, queue_timeout=1.0,
+                 low_priority_queue_timeout=0.1, retry_after=1):
+        self.default = Pool("default", limit, reserved, queue_size)
+        self.routes = {route: Pool(route, route_limit, reserved, queue_size) for route, route_limit in (routes or {}).items()}
+        self.timeouts = {HIGH: queue_timeout, LOW: low_priority_queue_timeout}
+        self.retry_after = retry_after
+
+    def pool(self, route):
+        return self.routes.get(route, self.default)
+
+    def report(self):
+        """
+        Return the report of every pool, by route.
+        """
+        return {pool.name: pool.report() for pool in (self.default, *self.routes.values())}
+
+
+def request_priority(request):
+    """
+    Return the priority of a request: high for writes and requests carrying credentials, low for anonymous reads.
+    Credentials are not checked here, so a forged header only gets a request the priority of the 401 it ends with.
+    """
+    if request.method not in SAFE_METHODS:
+        return HIGH
+    if "Authorization" in request.headers or settings.SESSION_COOKIE_NAME in request.COOKIES:
+        return HIGH
+    return LOW
+
+
+def _create():
+    options = admission_settings()
+    return AdmissionController(
+        limit=options.get("LIMIT", 64),
+        routes=options.get("ROUTES", {}),
+        reserved=options.get("RESERVED", 0.25),
+        queue_size=options.get("QUEUE_SIZE", 100),
+        queue_timeout=options.get("QUEUE_TIMEOUT", 1.0),
+        low_priority_queue_timeout=options.get("LOW_PRIORITY_QUEUE_TIMEOUT", 0.1),
+        retry_after=options.get("RETRY_AFTER", 1),
+    )
+
+
+controller = _create()
+
+
+class AdmissionMiddleware:
+    """
+    Middleware admitting each request into the pool of its route once its URL is resolved, or answering 503 when it
+    cannot. Works under WSGI and ASGI. With ADMISSION["ENABLED"] off, it is not loaded.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not admission_settings().get("ENABLED"):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+            self.process_view = self.aprocess_view
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        response = None
+        try:
+            response = self.get_response(request)
+            return response
+        finally:
+            self.release(request, response)
+
+    async def __acall__(self, request):
+        response = None
+        try:
+            response = await self.get_response(request)
+            return response
+        finally:
+            self.release(request, response)
+
+    def release(self, request, response):
+        """
+        Give back the slot of an admitted request, once its response is closed when it streams its content from a
+        synchronous iterator. Asynchronous streams, such as the review event streams, are held open on the event loop
+        for as long as clients listen, so they give their slot back at once.
+        """
+        pool = getattr(request, "admission_pool", None)
+        if pool is None:
+            return
+        if response is not None and response.streaming and not getattr(response, "is_async", False):
+            # The body is produced while it is sent, after the response is returned. Servers close the response then.
+            response._resource_closers.append(pool.release)
+        else:
+            pool.release()
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        """
+        Take a slot for the request before its view runs, or shed it with 503 and Retry-After.
+        """
+        priority = request_priority(request)
+        pool = controller.pool(request.resolver_match.view_name)
+        return self.admit(request, pool, pool.acquire(priority, controller.timeouts[priority]))
+
+    async def aprocess_view(self, request, view_func, view_args, view_kwargs):
+        """
+        Take a slot for the request like process_view, queueing on the event loop without taking a thread.
+        """
+        priority = request_priority(request)
+        pool = controller.pool(request.resolver_match.view_name)
+        return self.admit(request, pool, await pool.aacquire(priority, controller.timeouts[priority]))
+
+    def admit(self, request, pool, admitted):
+        """
+        Attach the pool of an admitted request so its slot is given back, or return the 503 shedding it.
+        """
+        if admitted:
+            request.admission_pool = pool
+            return None
+
+        response = JsonResponse(
+            {"Error": "The service is overloaded, retry later"},
+            status=503,
+            headers={"Retry-After": str(controller.retry_after)},
+        )
+        # Shed requests are in the access log. Logging each one again as a server error, through the blocking console
+        # handler, would make shedding as expensive as serving.
+        response._has_been_logged = True
+        return response
@@ -0,0 +1,69 @@
+"""
+Helpers shared by the benchmark management commands.
+"""
+
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.db import connections
+
+
+def percentile(samples, fraction):
+    """
+    Return the value below which the given fraction of the sorted samples fall.
+    """
+    ordered = sorted(samples)
+    if not ordered:
+        return 0.0
+    index = min(len(ordered) - 1, max(0, round(fraction * len(ordered)) - 1))
+    return ordered[index]
+
+
+def summarize(samples):
+    """
+    Summarize durations in seconds as milliseconds.
+    """
+    return {
+        "count": len(samples),
+        "mean": statistics.fmean(samples) * 1000 if samples else 0.0,
+        "p50": percentile(samples, 0.50) * 1000,
+        "p95": percentile(samples, 0.95) * 1000,
+        "p99": percentile(samples, 0.99) * 1000,
+        "max": max(samples, default=0.0) * 1000,
+    }
+
+
+def format_summary(label, samples):
+    """
+    Format a one-line latency summary for a benchmark report.
+    """
+    summary = summarize(samples)
+    return (
+        f"{label:<24} n={summary['count']:<6} mean={summary['mean']:.3f}ms p50={summary['p50']:.3f}ms "
+        f"p95={summary['p95']:.3f}ms p99={summary['p99']:.3f}ms max={summary['max']:.3f}ms"
+    )
+
+
+def timed(func, *args, **kwargs):
+    """
+    Call a function and return how long it took in seconds.
+    """
+    start = time.perf_counter()
+    func(*args, **kwargs)
+    return time.perf_counter() - start
+
+
+def run_concurrently(func, jobs, concurrency):
+    """
+    Run `func(job)` for every job on a pool of threads and return the duration of each call.
+    Every worker thread closes its database connections once it is done.
+    """
+    def run(job):
+        try:
+            return timed(func, job)
+        finally:
+            connections.close_all()
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        return list(executor.map(run, jobs))
@@ -0,0 +1,178 @@
+"""
+Profiling of individual requests in place, for endpoints that only get slow in production.
+
+Admin users profile a request by sending an X-Profile header naming a profiler, and a SAMPLE_RATE fraction of
+all requests is profiled with the default one. Every profile is saved to PROFILING["DIRECTORY"] next to a JSON
+file describing its request, for `manage.py profile_report` to aggregate. With PROFILING["ENABLED"] off the
+middleware is removed from the middleware chain when it is loaded, so it costs nothing.
+"""
+
+import cProfile
+import json
+import logging
+import os
+import random
+import secrets
+import time
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+PROFILE_HEADER = "X-Profile"
+PROFILE_ID_HEADER = "X-Profile-Id"
+METADATA_EXTENSION = ".meta.json"
+
+
+def profiling_settings():
+    return getattr(settings, "PROFILING", {})
+
+
+class CProfiler:
+    """
+    Deterministic profiler recording every function call of the request thread, saved in pstats format.
+    """
+
+    extension = ".pstats"
+
+    def __init__(self, options):
+        self.profile = cProfile.Profile()
+
+    def start(self):
+        self.profile.enable()
+
+    def stop(self):
+        self.profile.disable()
+
+    def save(self, path):
+        self.profile.dump_stats(path)
+
+
+class SamplingProfiler:
+    """
+    Statistical profiler sampling the request thread every SAMPLING_INTERVAL seconds with pyinstrument, saved in speedscope format.
+    Its overhead does not grow with the number of calls, so it suits requests making many small calls.
+    """
+
+    extension = ".speedscope.json"
+
+    def __init__(self, options):
+        from pyinstrument import Profiler
+
+        self.profiler = Profiler(interval=options.get("SAMPLING_INTERVAL", 0.001), async_mode="disabled")
+
+    def start(self):
+        self.profiler.start()
+
+    def stop(self):
+        self.profiler.stop()
+
+    def save(self, path):
+        from pyinstrument.renderers import SpeedscopeRenderer
+
+        with open(path, "w") as profile_file:
+            profile_file.write(self.profiler.output(SpeedscopeRenderer()))
+
+
+PROFILERS = {"cprofile": CProfiler, "sampling": SamplingProfiler}
+
+
+def request_user(request):
+    """
+    Return the user of the request as the API views authenticate it, its session user when it sends no API credentials,
+    or None when its credentials are invalid.
+    """
+    from rest_framework.exceptions import APIException
+    from rest_framework.settings import api_settings
+
+    for authentication in api_settings.DEFAULT_AUTHENTICATION_CLASSES:
+        try:
+            authenticated = authentication().authenticate(request)
+        except APIException:
+            return None
+        if authenticated is not None:
+            return authenticated[0]
+    return request.user
+
+
+class ProfilingMiddleware:
+    """
+    Middleware profiling the requests chosen by their X-Profile header or by sampling, and saving their profiles.
+    The id of a saved profile is returned in the X-Profile-Id header.
+    """
+
+    def __init__(self, get_response):
+        self.options = profiling_settings()
+        if not self.options.get("ENABLED"):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.sample_rate = self.options.get("SAMPLE_RATE", 0)
+
+    def __call__(self, request):
+        profiler_name, trigger, user = self.choose_profiler(request)
+        if profiler_name is None:
+            return self.get_response(request)
+
+        try:
+            profiler = PROFILERS[profiler_name](self.options)
+            profiler.start()
+        except (ImportError, RuntimeError, ValueError) as error:
+            # pyinstrument is not installed, or another profiler is already running in this process.
+            logger.warning("Request not profiled with %s: %s", profiler_name, error)
+            return self.get_response(request)
+
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            profiler.stop()
+        duration = time.perf_counter() - started
+
+        response[PROFILE_ID_HEADER] = self.save(request, response, profiler, {
+            "profiler": profiler_name,
+            "trigger": trigger,
+            "duration_ms": round(duration * 1000, 3),
+            "user": user.pk if user else None,
+        })
+        return response
+
+    def choose_profiler(self, request):
+        """
+        Return the name of the profiler for the request, what chose it and the user sending the request, or
+        (None, None, None) to not profile it. Only admin users, authenticated as request_user does, choose the profiler.
+        """
+        profiler_name = request.headers.get(PROFILE_HEADER)
+        if profiler_name in PROFILERS:
+            user = request_user(request)
+            if user is not None and user.is_staff:
+                return profiler_name, "header", user
+        if self.sample_rate and random.random() < self.sample_rate:
+            return self.options.get("PROFILER", "cprofile"), "sample", request_user(request)
+        return None, None, None
+
+    def save(self, request, response, profiler, metadata):
+        """
+        Save the profile and the metadata of its request, and return the id of the profile.
+        """
+        directory = self.options["DIRECTORY"]
+        os.makedirs(directory, exist_ok=True)
+        created = timezone.now()
+        profile_id = f"{created:%Y%m%dT%H%M%S}-{secrets.token_hex(4)}"
+        profiler.save(os.path.join(directory, profile_id + profiler.extension))
+
+        match = request.resolver_match
+        metadata = {
+            "id": profile_id,
+            "file": profile_id + profiler.extension,
+            "created": created.isoformat(),
+            "method": request.method,
+            "path": request.path,
+            "view": match.view_name if match else None,
+            "status": response.status_code,
+            **metadata,
+        }
+        with open(os.path.join(directory, profile_id + METADATA_EXTENSION), "w") as metadata_file:
+            json.dump(metadata, metadata_file)
+        return profile_id
@@ -0,0 +1,110 @@
+"""
+OpenAPI schema views that generate the schema once per process instead of on every request.
+"""
+
+import hashlib
+import json
+import threading
+
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils import translation
+from drf_spectacular.plumbing import set_query_parameters
+from drf_spectacular.settings import spectacular_settings
+from drf_spectacular.views import SpectacularAPIView, SpectacularSwaggerView
+
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+REVALIDATE_CACHE_CONTROL = "public, no-cache"
+
+
+class SchemaDocument:
+    """
+    A generated schema, its content hash and its renderings per media type.
+    """
+
+    def __init__(self, data):
+        self.data = data
+        self.hash = hashlib.sha256(json.dumps(data, sort_keys=True, default=str).encode()).hexdigest()[:16]
+        self.renderings = {}
+
+
+class SchemaDocumentCache:
+    """
+    Process-wide cache of generated schemas keyed by API version and language.
+    A new deployment starts new processes, which is when the schema is rebuilt.
+    """
+
+    def __init__(self):
+        self._documents = {}
+        self._lock = threading.Lock()
+
+    def get(self, request, version):
+        """
+        Return the schema document for the version and active language, generating it on first use.
+        """
+        key = (version, translation.get_language())
+
+        with self._lock:
+            document = self._documents.get(key)
+            if document is None:
+                generator = spectacular_settings.DEFAULT_GENERATOR_CLASS(api_version=version)
+                document = SchemaDocument(generator.get_schema(request=request, public=spectacular_settings.SERVE_PUBLIC))
+                self._documents[key] = document
+
+        return document
+
+
+schema_cache = SchemaDocumentCache()
+
+
+class CachedSpectacularAPIView(SpectacularAPIView):
+    """
+    OpenAPI schema served from memory with an ETag.
+    Requests whose "v" parameter matches the schema hash get immutable cache headers.
+    """
+
+    def _get_schema_response(self, request):
+        """
+        Serve the cached rendering of the schema, or 304 when the client already has it.
+        """
+        version = self.api_version or request.version or self._get_version_parameter(request)
+        document = schema_cache.get(request, version)
+        renderer = request.accepted_renderer
+
+        rendering = document.renderings.get(renderer.media_type)
+        if rendering is None:
+            content = renderer.render(document.data, renderer.media_type, self.get_renderer_context())
+            rendering = document.renderings[renderer.media_type] = (content, f'"{document.hash}-{renderer.format}"')
+        content, etag = rendering
+
+        if request.GET.get("v") == document.hash:
+            cache_control = IMMUTABLE_CACHE_CONTROL
+        else:
+            cache_control = REVALIDATE_CACHE_CONTROL
+
+        if etag in request.headers.get("If-None-Match", ""):
+            response = HttpResponseNotModified()
+        else:
+            content_type = renderer.media_type
+            if renderer.charset:
+                content_type = f"{content_type}; charset={renderer.charset}"
+            response = HttpResponse(content, content_type=content_type)
+            response["Content-Disposition"] = f'inline; filename="{self._get_filename(request, version)}"'
+
+        response["ETag"] = etag
+        response["Cache-Control"] = cache_control
+        return response
+
+
+class CachedSpectacularSwaggerView(SpectacularSwaggerView):
+    """
+    Swagger UI that requests the schema through a content-addressed URL, so browsers can cache it indefinitely.
+    """
+
+    def _get_schema_url(self, request):
+        """
+        Add the current schema hash to the schema URL.
+        """
+        version = request.GET.get("version")
+        with translation.override(request.GET.get("lang") or translation.get_language()):
+            document = schema_cache.get(request, version)
+        return set_query_parameters(url=super()._get_schema_url(request), v=document.hash)
@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.1/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -32,6 +33,7 @@ ALLOWED_HOSTS = []
 
 INSTALLED_APPS = [
     'media_app.apps.MediaAppConfig',
+    'user_app.apps.UserAppConfig',
     'django.contrib.admin',
     'django.contrib.auth',
     'django.contrib.contenttypes',
@@ -46,11 +48,14 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'cinebase.access_log.AccessLogMiddleware',
+    'cinebase.admission.AdmissionMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'cinebase.profiling.ProfilingMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -110,6 +115,30 @@ AUTH_PASSWORD_VALIDATORS = [
 ]
 
 
+# Password hashing
+# https://docs.djangoproject.com/en/5.1/topics/auth/passwords/
+# Set PASSWORD_HASHER to "argon2" or "bcrypt" to hash new passwords with a cheaper algorithm.
+# The remaining hashers still verify existing passwords, which are rehashed on the next login.
+
+PASSWORD_HASHERS = [
+    'django.contrib.auth.hashers.PBKDF2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'django.contrib.auth.hashers.Argon2PasswordHasher',
+    'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+    'django.contrib.auth.hashers.ScryptPasswordHasher',
+]
+
+PREFERRED_PASSWORD_HASHERS = {
+    'argon2': 'django.contrib.auth.hashers.Argon2PasswordHasher',
+    'bcrypt': 'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+}
+
+if os.environ.get('PASSWORD_HASHER') in PREFERRED_PASSWORD_HASHERS:
+    preferred_hasher = PREFERRED_PASSWORD_HASHERS[os.environ['PASSWORD_HASHER']]
+    PASSWORD_HASHERS.remove(preferred_hasher)
+    PASSWORD_HASHERS.insert(0, preferred_hasher)
+
+
 # Internationalization
 # https://docs.djangoproject.com/en/5.1/topics/i18n/
 
@@ -127,11 +156,211 @@ USE_TZ = True
 
 STATIC_URL = 'static/'
 
+STATIC_ROOT = BASE_DIR / 'staticfiles'
+
+# Outside of development, collected static files get content-hashed names (including the Swagger UI
+# assets from drf_spectacular_sidecar), so the web server can serve them with immutable cache headers.
+if not DEBUG:
+    STORAGES = {
+        'default': {
+            'BACKEND': 'django.core.files.storage.FileSystemStorage',
+        },
+        'staticfiles': {
+            'BACKEND': 'django.contrib.staticfiles.storage.ManifestStaticFilesStorage',
+        },
+    }
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.1/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
+# `manage.py test --parallel` runs the tests on every core against clones of the test database, and
+# `manage.py test --seeded` runs the performance tests against a test database holding the SEED_DATASET, which
+# `manage.py seed_dataset` also inserts into the configured database for benchmarks.
+
+TEST_RUNNER = 'cinebase.test_runner.TestRunner'
+
+SEED_DATASET = {
+    'USERS': 1000,
+    'PLATFORMS': 10,
+    'MEDIA': 5000,
+    'REVIEWS_PER_MEDIA': 20,
+    'SEED': 0,
+}
+
+# Review streams are fed in-process by default. With several worker processes, set MEDIA_EVENTS_BACKEND
+# to "postgresql" so writes in one worker reach subscribers in the others through LISTEN/NOTIFY.
+
+MEDIA_EVENTS_BACKEND = os.environ.get('MEDIA_EVENTS_BACKEND', 'local')
+
+# Media are ranked by a Bayesian average of their ratings, as if every media had PRIOR_WEIGHT extra
+# reviews rating it PRIOR_MEAN. Run `manage.py recompute_weighted_ratings` after changing either value.
+
+WEIGHTED_RATING = {
+    'PRIOR_MEAN': 3.0,
+    'PRIOR_WEIGHT': 10,
+}
+
+# Trending media are ranked in memory per process from review events. Set TRENDING_SNAPSHOT_PATH to
+# periodically save the scores from the review table, so restarted workers load them instead of replaying
+# recent reviews. Workers can share the path.
+
+TRENDING = {
+    'HALF_LIFE_HOURS': 24,
+    'CANDIDATES': 1000,
+    'RECENT': 1000,
+    'SNAPSHOT_PATH': os.environ.get('TRENDING_SNAPSHOT_PATH'),
+    'SNAPSHOT_SECONDS': 300,
+}
+
+# The shared cache backs the object cache and the throttle counters. Without REDIS_URL every worker
+# process has its own in-memory cache; set it so workers share cached objects and rate limits.
+
+if os.environ.get('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ['REDIS_URL'],
+        },
+    }
+
+# Hot media and streaming platforms are read through a per-process LRU of LOCAL_MAX_ENTRIES objects in
+# front of the shared cache. Local entries are trusted for LOCAL_TIMEOUT seconds, shared ones for TIMEOUT.
+
+OBJECT_CACHE = {
+    'ENABLED': True,
+    'LOCAL_MAX_ENTRIES': 2000,
+    'LOCAL_TIMEOUT': 5,
+    'TIMEOUT': 300,
+}
+
+# Requests are logged as JSON lines to stdout, or to ACCESS_LOG_FILE, when ENABLED (by default when DEBUG is off).
+# SAMPLE_RATES maps URL names of high-volume routes to the fraction of their requests logged; errors and requests
+# slower than SLOW_MS are always logged. Summarize the log with `manage.py analyze_access_log`.
+
+ACCESS_LOG = {
+    'ENABLED': os.environ.get('ACCESS_LOG_ENABLED', '0' if DEBUG else '1') == '1',
+    'SAMPLE_RATE': 1.0,
+    'SAMPLE_RATES': {
+        'review-list': 0.1,
+        'media-detail': 0.1,
+    },
+    'SLOW_MS': 1000,
+}
+
+# Logs are written as JSON lines. Access log lines are written from a background thread, so requests never wait
+# for the log destination.
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'json': {
+            '()': 'cinebase.access_log.JsonFormatter',
+        },
+    },
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+            'formatter': 'json',
+        },
+        'access': {
+            'class': 'cinebase.access_log.BackgroundHandler',
+            'formatter': 'json',
+            'filename': os.environ.get('ACCESS_LOG_FILE'),
+            'stream': 'ext://sys.stdout',
+        },
+    },
+    'root': {
+        'handlers': ['console'],
+        'level': 'WARNING',
+    },
+    'loggers': {
+        # Every response status is in the access log, so only server errors are logged with their traceback.
+        'django.request': {
+            'level': 'ERROR',
+        },
+        'cinebase.access': {
+            'handlers': ['access'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+    },
+}
+
+# Each worker process runs at most LIMIT requests at once, and at most ROUTES[name] requests of the routes listed
+# by URL name. Beyond a limit, requests queue for up to QUEUE_TIMEOUT seconds (LOW_PRIORITY_QUEUE_TIMEOUT for
+# anonymous reads) and then get 503 with a Retry-After of RETRY_AFTER seconds. Writes and requests with credentials
+# are admitted first, and anonymous reads never use the RESERVED share of a limit. Admins read the counters at
+# /api/admission/. Limits only matter for workers running requests on several threads.
+
+ADMISSION = {
+    'ENABLED': os.environ.get('ADMISSION_ENABLED', '1') == '1',
+    'LIMIT': 64,
+    'ROUTES': {
+        'media-list': 8,
+        'media-export': 2,
+    },
+    'RESERVED': 0.25,
+    'QUEUE_SIZE': 100,
+    'QUEUE_TIMEOUT': 1.0,
+    'LOW_PRIORITY_QUEUE_TIMEOUT': 0.1,
+    'RETRY_AFTER': 1,
+}
+
+# Requests are profiled in place when ENABLED: admin users send an `X-Profile: cprofile` or `X-Profile: sampling`
+# header, and a SAMPLE_RATE fraction of all requests is profiled with PROFILER. Profiles are saved to DIRECTORY,
+# aggregate them with `manage.py profile_report`. When disabled, the profiling middleware is not loaded.
+
+PROFILING = {
+    'ENABLED': os.environ.get('PROFILING_ENABLED') == '1',
+    'SAMPLE_RATE': float(os.environ.get('PROFILING_SAMPLE_RATE', 0)),
+    'PROFILER': 'cprofile',
+    'SAMPLING_INTERVAL': 0.001,
+    'DIRECTORY': os.environ.get('PROFILING_DIRECTORY', BASE_DIR / 'profiles'),
+}
+
+# Writes to streaming platforms, media and reviews are recorded in a change log read by downstream services.
+# On PostgreSQL, changes are only served once every write transaction that was open when they were written has
+# ended, which needs the database user to see its other sessions in pg_stat_activity. LAG seconds more are held back
+# for clock skew between servers; on other databases LAG must exceed the longest write transaction.
+# `manage.py compact_changes` keeps the latest change per object and drops deletions after RETENTION_DAYS.
+
+CHANGE_LOG = {
+    'LAG': 5,
+    'PAGE_SIZE': 500,
+    'RETENTION_DAYS': 7,
+}
+
+# Popular review list pages are cached per media for TIMEOUT seconds. Every review write for a media bumps the
+# version of its pages, so they are outdated together without scanning keys.
+
+RESULT_CACHE = {
+    'ENABLED': True,
+    'TIMEOUT': 60,
+}
+
+# Identical concurrent GET requests for a media or its reviews wait for the first one and share its response,
+# for at most WAIT_TIMEOUT seconds. With SHARED on, they also wait for identical requests in other workers
+# through a lock in the shared cache, polled every POLL_INTERVAL seconds. It needs REDIS_URL to be set.
+
+COALESCING = {
+    'ENABLED': True,
+    'SHARED': bool(os.environ.get('REDIS_URL')),
+    'WAIT_TIMEOUT': 5,
+    'POLL_INTERVAL': 0.01,
+    'LOCK_TIMEOUT': 30,
+}
+
+# Write requests carrying an Idempotency-Key header keep their response for TIMEOUT seconds, so retries
+# replay it. A key stays claimed for at most LOCK_TIMEOUT seconds while its first request is running.
+
+IDEMPOTENCY = {
+    'TIMEOUT': 86400,
+    'LOCK_TIMEOUT': 60,
+}
+
 REST_FRAMEWORK = {
     
     'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
@@ -149,6 +378,7 @@ REST_FRAMEWORK = {
         'review-create': '2/day',
         'review-list': '20/day',
         'review-detail': '20/day',
+        'media-batch': '100/day',
     },
     'DEFAULT_FILTER_BACKENDS': [
         'django_filters.rest_framework.DjangoFilterBackend'
@@ -174,4 +404,6 @@ Please refer to the endpoints below for detailed operations and data structures
     'SWAGGER_UI_SETTINGS': {
         'deepLinking': True,
     },
+    'SWAGGER_UI_DIST': 'SIDECAR',
+    'SWAGGER_UI_FAVICON_HREF': 'SIDECAR',
 }
\ No newline at end of file
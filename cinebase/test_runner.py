@@ -0,0 +1,97 @@
+"""
+Test runner for running the suite on every core, and performance tests against a large seeded database.
+
+With --parallel, the test database is migrated once and then cloned for every process, from a template database on
+PostgreSQL and by copying the file or memory of SQLite. With --seeded, only the performance tests tagged "seeded" run,
+and the seed dataset is inserted into the test database before it is cloned, so it is built once per run however many
+processes use it, and once for good with --keepdb. Other runs leave seeded tests out, so every other test still starts
+from an empty database.
+
+Tests tagged "serial", such as tests starting processes of their own, run in the main process after the others.
+Passwords are hashed with MD5, since a strong hasher would take most of the time of every test creating a user.
+"""
+
+from django.test import override_settings
+from django.test.runner import (DiscoverRunner, filter_tests_by_tags,
+                                iter_test_cases, partition_suite_by_case)
+
+SEEDED_TAG = "seeded"
+SERIAL_TAG = "serial"
+
+
+class TestRunner(DiscoverRunner):
+    """
+    Discover runner seeding the test database before cloning it on request, and keeping serial tests out of the workers.
+    """
+
+    def __init__(self, seeded=False, **kwargs):
+        super().__init__(**kwargs)
+        self.seeded = seeded
+        if seeded:
+            self.tags.add(SEEDED_TAG)
+        else:
+            self.exclude_tags.add(SEEDED_TAG)
+        self.fast_hashers = override_settings(PASSWORD_HASHERS=["django.contrib.auth.hashers.MD5PasswordHasher"])
+
+    @classmethod
+    def add_arguments(cls, parser):
+        super().add_arguments(parser)
+        parser.add_argument(
+            "--seeded",
+            action="store_true",
+            help="Run only the performance tests tagged 'seeded', against a test database holding the seed dataset.",
+        )
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self.fast_hashers.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        self.fast_hashers.disable()
+        super().teardown_test_environment(**kwargs)
+
+    def build_suite(self, *args, **kwargs):
+        """
+        Build the suite, splitting the tests that are not tagged "serial" across the parallel processes.
+        """
+        parallel, self.parallel = self.parallel, 0
+        try:
+            suite = super().build_suite(*args, **kwargs)
+        finally:
+            self.parallel = parallel
+        if self.parallel <= 1:
+            return suite
+
+        tests = list(iter_test_cases(suite))
+        serial = list(filter_tests_by_tags(tests, {SERIAL_TAG}, set()))
+        subsuites = partition_suite_by_case(self.test_suite(test for test in tests if test not in serial))
+        # There is no use for more processes, and test databases, than test case classes.
+        self.parallel = min(self.parallel, len(subsuites))
+        if self.parallel > 1:
+            suite = self.parallel_test_suite(subsuites, self.parallel, self.failfast, self.debug_mode, self.buffer)
+        else:
+            suite = self.test_suite(subsuites)
+        return self.test_suite([suite, *serial])
+
+    def setup_databases(self, **kwargs):
+        """
+        Create the test databases, insert the seed dataset with --seeded, then clone them for the parallel processes.
+        """
+        from media_app.seed import seed
+
+        parallel, self.parallel = self.parallel, 0
+        try:
+            old_config = super().setup_databases(**kwargs)
+        finally:
+            self.parallel = parallel
+
+        for connection, _, created in old_config:
+            if not created:
+                continue
+            if self.seeded:
+                with self.time_keeper.timed(f"  Seeding '{connection.alias}'"):
+                    seed(using=connection.alias)
+            for index in range(self.parallel if self.parallel > 1 else 0):
+                with self.time_keeper.timed(f"  Cloning '{connection.alias}'"):
+                    connection.creation.clone_test_db(suffix=str(index + 1), verbosity=self.verbosity, keepdb=self.keepdb)
+        return old_config
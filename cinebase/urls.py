@@ -16,13 +16,15 @@ Including another URLconf
 """
 from django.contrib import admin
 from django.urls import include, path
-from drf_spectacular.views import SpectacularAPIView, SpectacularSwaggerView
+
+from cinebase.lazy import lazy_view
 
 urlpatterns = [
     path('dashboard/', admin.site.urls),
     path('api/media/', include('media_app.api.urls')),
     path('api/account/', include('user_app.api.urls')),
-    path('api/schema/', SpectacularAPIView.as_view(), name='schema'),
-    path('api/schema/swagger-ui/', SpectacularSwaggerView.as_view(url_name='schema'), name='swagger-ui'),
+    path('api/admission/', lazy_view('cinebase.views.AdmissionStatsAPIView'), name='admission-stats'),
+    path('api/schema/', lazy_view('cinebase.schema.CachedSpectacularAPIView'), name='schema'),
+    path('api/schema/swagger-ui/', lazy_view('cinebase.schema.CachedSpectacularSwaggerView', url_name='schema'), name='swagger-ui'),
  
 ]
@@ -0,0 +1,31 @@
+"""
+Operational API views of the project, loaded on their first request.
+"""
+
+from drf_spectacular.utils import extend_schema
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from cinebase import admission
+
+
+@extend_schema(
+    responses=dict,
+    description="Report the limits, load, queue wait and shed requests of every admission pool of the serving process, by priority. Only accessible to admin users."
+)
+class AdmissionStatsAPIView(APIView):
+    """
+    Reporting the admission control counters of the worker process that serves the request.
+    """
+
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        """
+        Retrieve the report of every admission pool, and whether admission control is enabled.
+        """
+        return Response({
+            "enabled": bool(admission.admission_settings().get("ENABLED")),
+            "pools": admission.controller.report(),
+        })
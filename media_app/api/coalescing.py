@@ -0,0 +1,191 @@
+"""
+Coalescing of identical concurrent reads (single-flight).
+
+When many identical GET requests arrive at once, such as for a title linked from a popular page, only the first
+one runs its view. The others wait for it and answer with a copy of its response, instead of each running the same
+queries and serialization. Requests are still authenticated, permission-checked and throttled one by one; only the
+handler is shared. Waiting requests can also join a request in flight in another worker through a lock in the
+shared cache, when COALESCING["SHARED"] is on.
+
+A request only joins a computation that is still running when it arrives, so it never gets a response older than
+the one it would have computed itself had it arrived a few milliseconds earlier.
+"""
+
+import functools
+import hashlib
+import json
+import secrets
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache as shared_cache
+from rest_framework.response import Response
+from rest_framework.utils.encoders import JSONEncoder
+
+COALESCED_HEADER = "X-Coalesced"
+
+LEADER = "leader"
+LOCAL = "local"
+SHARED = "shared"
+
+
+class Flight:
+    """
+    Computation in flight in this process, which identical requests wait for.
+    """
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+
+
+class SingleFlight:
+    """
+    Registry of computations in flight, running at most one computation per key at a time in this process,
+    or across processes with `shared`. Results must be picklable, and None means the result cannot be shared.
+    """
+
+    def __init__(self, enabled=True, shared=False, wait_timeout=5, poll_interval=0.01, lock_timeout=30):
+        self.enabled = enabled
+        self.shared = shared
+        self.wait_timeout = wait_timeout
+        self.poll_interval = poll_interval
+        self.lock_timeout = lock_timeout
+        self.flights = {}
+        self.lock = threading.Lock()
+        self.stats = dict.fromkeys((LEADER, LOCAL, SHARED, "timeouts"), 0)
+
+    def _count(self, source):
+        with self.lock:
+            self.stats[source] += 1
+
+    def run(self, key, compute):
+        """
+        Return the result of the computation in flight for the key, or of `compute` if none is or it cannot be shared.
+        Waiting stops after wait_timeout seconds, and the caller then computes the result itself.
+        """
+        if not self.enabled:
+            return compute()
+
+        with self.lock:
+            flight = self.flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self.flights[key] = Flight()
+
+        if not leader:
+            if flight.done.wait(self.wait_timeout) and flight.result is not None:
+                self._count(LOCAL)
+                return flight.result
+            if not flight.done.is_set():
+                self._count("timeouts")
+            return self._lead(compute)
+
+        try:
+            flight.result = self._run_shared(key, compute) if self.shared else self._lead(compute)
+            return flight.result
+        finally:
+            with self.lock:
+                del self.flights[key]
+            flight.done.set()
+
+    def _lead(self, compute):
+        self._count(LEADER)
+        return compute()
+
+    def _run_shared(self, key, compute):
+        """
+        Run the computation under a lock in the shared cache, or wait for the worker holding it to store its result.
+        """
+        lock_key = f"{key}:lock"
+        token = secrets.token_hex(8)
+        if shared_cache.add(lock_key, token, self.lock_timeout):
+            try:
+                result = self._lead(compute)
+                if result is not None:
+                    shared_cache.set(f"{key}:{token}", result, self.wait_timeout)
+                return result
+            finally:
+                shared_cache.delete(lock_key)
+
+        # Only the result of the computation holding the lock now is read, never one that finished before.
+        token = shared_cache.get(lock_key)
+        result_key = f"{key}:{token}"
+        deadline = time.monotonic() + self.wait_timeout
+        while token is not None:
+            entries = shared_cache.get_many([result_key, lock_key])
+            if entries.get(result_key) is not None:
+                self._count(SHARED)
+                return entries[result_key]
+            if entries.get(lock_key) != token:
+                # The other worker finished without a result it could share, or its lock expired.
+                break
+            if time.monotonic() >= deadline:
+                self._count("timeouts")
+                break
+            time.sleep(self.poll_interval)
+        return self._lead(compute)
+
+    def report(self):
+        """
+        Return the number of requests that ran their view, that shared a response and that stopped waiting, in this process.
+        """
+        with self.lock:
+            coalesced = self.stats[LOCAL] + self.stats[SHARED]
+            requests = coalesced + self.stats[LEADER]
+            return {
+                "enabled": self.enabled,
+                "shared": self.shared,
+                **self.stats,
+                "in_flight": len(self.flights),
+                "coalesced_ratio": coalesced / requests if requests else None,
+            }
+
+
+def _create():
+    options = getattr(settings, "COALESCING", {})
+    return SingleFlight(
+        enabled=options.get("ENABLED", True),
+        shared=options.get("SHARED", False),
+        wait_timeout=options.get("WAIT_TIMEOUT", 5),
+        poll_interval=options.get("POLL_INTERVAL", 0.01),
+        lock_timeout=options.get("LOCK_TIMEOUT", 30),
+    )
+
+
+flights = _create()
+
+
+def coalescing_key(request):
+    """
+    Return the key of the requests identical to the request, which is a digest of its path and query string.
+    """
+    return f"coalescing:{hashlib.blake2b(request.get_full_path().encode(), digest_size=16).hexdigest()}"
+
+
+def coalesced(handler):
+    """
+    Decorator for the GET handler of an API view whose response depends only on the URL, to share the response of
+    identical concurrent requests. Responses of server errors are not shared, and shared ones carry X-Coalesced: true.
+    """
+    @functools.wraps(handler)
+    def wrapper(view, request, *args, **kwargs):
+        response = None
+
+        def compute():
+            nonlocal response
+            response = handler(view, request, *args, **kwargs)
+            if response.status_code >= 500:
+                return None
+            headers = {name: value for name, value in response.items() if name != "Content-Type"}
+            return response.status_code, headers, json.dumps(response.data, cls=JSONEncoder, separators=(",", ":"))
+
+        record = flights.run(coalescing_key(request), compute)
+        if response is not None:
+            return response
+
+        status_code, headers, content = record
+        return Response(json.loads(content), status=status_code, headers={**headers, COALESCED_HEADER: "true"})
+
+    return wrapper
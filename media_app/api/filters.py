@@ -0,0 +1,16 @@
+from django_filters import rest_framework as filters
+
+from media_app.models import Review
+
+
+class ReviewFilter(filters.FilterSet):
+    """
+    Filters of the reviews of a media. The reviewer__username filter reads the username copied on the review,
+    so it needs no join with the users.
+    """
+
+    reviewer__username = filters.CharFilter(field_name="reviewer_username")
+
+    class Meta:
+        model = Review
+        fields = ["active"]
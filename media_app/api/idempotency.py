@@ -0,0 +1,135 @@
+"""
+Idempotency-Key support for write endpoints.
+
+A client that retries a request with the same Idempotency-Key gets the stored response of the first
+attempt, without running the write again and without being counted by the throttles. Keys are scoped
+to the authenticated user, and a key reused for a different request is rejected.
+"""
+
+import hashlib
+import json
+
+from django.conf import settings
+from django.core.cache import cache
+from drf_spectacular.utils import OpenApiParameter
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.utils.encoders import JSONEncoder
+
+IDEMPOTENCY_HEADER = "Idempotency-Key"
+MAX_KEY_LENGTH = 255
+PENDING = "pending"
+
+IDEMPOTENCY_KEY_PARAMETER = OpenApiParameter(
+    IDEMPOTENCY_HEADER,
+    location=OpenApiParameter.HEADER,
+    description="Unique key of the request. Retries with the same key replay the first response instead of writing again",
+    required=False,
+    type=str,
+)
+
+
+class IdempotentResponse(Exception):
+    """
+    Raised to answer a request with a response decided before its handler runs.
+    """
+
+    def __init__(self, response):
+        super().__init__()
+        self.response = response
+
+
+def _settings():
+    return getattr(settings, "IDEMPOTENCY", {})
+
+
+def _error(message, status_code):
+    return IdempotentResponse(Response({"Error": message}, status=status_code))
+
+
+class IdempotencyMixin:
+    """
+    Mixin for API views whose write requests can be safely retried with an Idempotency-Key header.
+    The key is checked after authentication and permissions but before throttles, so replays are free.
+    """
+
+    idempotent_methods = ("POST",)
+
+    def get_idempotency_key(self, request):
+        """
+        Return the cache key of the request, or None if it does not use an Idempotency-Key.
+        """
+        key = request.headers.get(IDEMPOTENCY_HEADER)
+        if key is None or request.method not in self.idempotent_methods or not request.user.is_authenticated:
+            return None
+        if not 0 < len(key) <= MAX_KEY_LENGTH:
+            raise _error(f"{IDEMPOTENCY_HEADER} must be between 1 and {MAX_KEY_LENGTH} characters", status.HTTP_400_BAD_REQUEST)
+        return f"idempotency:{request.user.pk}:{hashlib.blake2b(key.encode(), digest_size=16).hexdigest()}"
+
+    def get_fingerprint(self, request):
+        """
+        Return a digest of what the request asks for, to detect a key reused for a different request.
+        """
+        digest = hashlib.blake2b(digest_size=16)
+        for part in (request.method, request.path, request.content_type):
+            digest.update(part.encode() + b"\0")
+        digest.update(request.body)
+        return digest.hexdigest()
+
+    def check_throttles(self, request):
+        """
+        Replay the stored response of a retried request, or claim its key, before counting it against the throttles.
+        """
+        self.idempotency_key = self.get_idempotency_key(request)
+        if self.idempotency_key is not None:
+            self.idempotency_fingerprint = self.get_fingerprint(request)
+            pending = (PENDING, self.idempotency_fingerprint)
+            if not cache.add(self.idempotency_key, pending, _settings().get("LOCK_TIMEOUT", 60)):
+                stored, self.idempotency_key = cache.get(self.idempotency_key), None
+                raise self.replay(stored)
+        super().check_throttles(request)
+
+    def replay(self, stored):
+        """
+        Return the exception answering a request whose key is already claimed by the given record.
+        """
+        if stored is not None and stored[1] != self.idempotency_fingerprint:
+            return _error(f"This {IDEMPOTENCY_HEADER} was already used for a different request", status.HTTP_422_UNPROCESSABLE_ENTITY)
+        if stored is None or stored[0] == PENDING:
+            return _error(f"A request with this {IDEMPOTENCY_HEADER} is still in progress", status.HTTP_409_CONFLICT)
+
+        _, _, status_code, content = stored
+        return IdempotentResponse(Response(json.loads(content), status=status_code, headers={"Idempotent-Replayed": "true"}))
+
+    def handle_exception(self, exc):
+        """
+        Answer with the response of an IdempotentResponse instead of treating it as an error.
+        """
+        if isinstance(exc, IdempotentResponse):
+            return exc.response
+        try:
+            return super().handle_exception(exc)
+        except Exception:
+            self.release_idempotency_key()
+            raise
+
+    def release_idempotency_key(self):
+        """
+        Forget the claimed key, so the request can be retried with it.
+        """
+        key, self.idempotency_key = getattr(self, "idempotency_key", None), None
+        if key is not None:
+            cache.delete(key)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        """
+        Store the response under the claimed key, or release the key so that errors worth retrying can be retried.
+        """
+        if response.status_code >= 500 or response.status_code == status.HTTP_429_TOO_MANY_REQUESTS:
+            self.release_idempotency_key()
+        elif getattr(self, "idempotency_key", None) is not None:
+            content = json.dumps(response.data, cls=JSONEncoder, separators=(",", ":"))
+            record = ("done", self.idempotency_fingerprint, response.status_code, content)
+            cache.set(self.idempotency_key, record, _settings().get("TIMEOUT", 86400))
+            self.idempotency_key = None
+        return super().finalize_response(request, response, *args, **kwargs)
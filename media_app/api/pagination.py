@@ -1,4 +1,4 @@
-from rest_framework.pagination import PageNumberPagination
+from rest_framework.pagination import CursorPagination, PageNumberPagination
 
 
 class ReviewPagination(PageNumberPagination):
@@ -8,4 +8,14 @@ class ReviewPagination(PageNumberPagination):
 
     page_size = 20
     page_size_query_param = "size"
-    max_page_size = 20
\ No newline at end of file
+    max_page_size = 20
+
+class ReviewFeedPagination(CursorPagination):
+    """
+    Keyset pagination for per-user review feeds, returning the most recently updated reviews first.
+    """
+
+    page_size = 20
+    page_size_query_param = "size"
+    max_page_size = 20
+    ordering = ("-update", "-id")
@@ -28,4 +28,4 @@ class IsReviewUserOrReadOnly(permissions.BasePermission):
         if request.method in permissions.SAFE_METHODS:
             return True
 
-        return obj.reviewer == request.user
\ No newline at end of file
+        return obj.reviewer_id == request.user.id
\ No newline at end of file
@@ -1,37 +1,199 @@
 from rest_framework import serializers
 
-from media_app.models import *
+from media_app.models import (ArchivedReview, Media, Review, SimilarMedia,
+                              StreamingPlatform)
+from media_app.ratings import RATING_COUNT_FIELDS, weighted_rating
+
+# Wide columns of media that lists leave out. Querysets serialized by MediaListSerializer defer them, so they are not read.
+MEDIA_LIST_DEFERRED_FIELDS = ["storyline"]
 
 
 class ReviewSerializer(serializers.ModelSerializer):
     """
-    Serializer for the Review model, including the reviewer's username as a string.
+    Serializer for the Review model, including the reviewer's username copied on the review, so the user is never loaded.
     """
 
-    reviewer = serializers.StringRelatedField(read_only=True)
+    reviewer = serializers.CharField(source="reviewer_username", read_only=True)
 
     class Meta:
         model = Review
-        fields = "__all__"
+        exclude = ["reviewer_username"]
+
+
+class ArchivedReviewSerializer(serializers.ModelSerializer):
+    """
+    Serializer for the ArchivedReview model, including the reviewer's username copied on the review, so the user is never loaded.
+    """
+
+    reviewer = serializers.CharField(source="reviewer_username", read_only=True)
+
+    class Meta:
+        model = ArchivedReview
+        exclude = ["reviewer_username"]
 
 
 class MediaSerializer(serializers.ModelSerializer):
     """
     Serializer for the Media model.
+    Embeds the rating histogram, stored on the media row, when requested through the "include" context.
     """
 
+    rating_histogram = serializers.DictField(child=serializers.IntegerField(), read_only=True)
+
     class Meta:
         model = Media
-        fields = "__all__"
+        exclude = RATING_COUNT_FIELDS
+        read_only_fields = ["weighted_rating"]
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        if "histogram" not in self.context.get("include", ()):
+            self.fields.pop("rating_histogram")
+
+    def create(self, validated_data):
+        """
+        Create the media with the weighted rating of the mean and number of ratings it is given.
+        """
+        validated_data["weighted_rating"] = weighted_rating(validated_data.get("avg_rating"), validated_data["user_rating"])
+        return super().create(validated_data)
+
+
+class MediaListSerializer(MediaSerializer):
+    """
+    Compact serializer for media in lists, without the wide columns only the detail representation includes.
+    """
+
+    class Meta(MediaSerializer.Meta):
+        exclude = [*RATING_COUNT_FIELDS, *MEDIA_LIST_DEFERRED_FIELDS]
+
+
+class MediaEditSerializer(MediaSerializer):
+    """
+    Serializer for edits of an existing media.
+    The rating aggregates are maintained from its reviews, so they are read-only here.
+    """
+
+    class Meta(MediaSerializer.Meta):
+        read_only_fields = ["avg_rating", "user_rating", "weighted_rating"]
+
+
+class PreloadedPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    """
+    Primary key field resolving related objects from a dictionary in the serializer context, instead of one query per value.
+    """
+
+    def __init__(self, context_key, **kwargs):
+        self.context_key = context_key
+        super().__init__(**kwargs)
+
+    def to_internal_value(self, data):
+        """
+        Look the primary key up in the preloaded objects.
+        """
+        try:
+            instance = self.context[self.context_key].get(int(data))
+        except (TypeError, ValueError):
+            self.fail("incorrect_type", data_type=type(data).__name__)
+        if instance is None:
+            self.fail("does_not_exist", pk_value=data)
+        return instance
+
+
+class MediaBulkSerializer(MediaSerializer):
+    """
+    Serializer for media written by the bulk endpoint.
+    Streaming platforms are resolved from the "streaming_platforms" context, loaded once per batch.
+    """
+
+    streaming_platform = PreloadedPrimaryKeyRelatedField("streaming_platforms", queryset=StreamingPlatform.objects.all())
+
+
+class MediaBulkEditSerializer(MediaBulkSerializer):
+    """
+    Serializer for media edited by the bulk endpoint, with the rating aggregates read-only as in MediaEditSerializer.
+    """
+
+    class Meta(MediaEditSerializer.Meta):
+        pass
+
+
+class MediaRatingsSerializer(serializers.ModelSerializer):
+    """
+    Serializer for the rating distribution of a media: its aggregates, count per rating and percentiles.
+    """
+
+    histogram = serializers.DictField(source="rating_histogram", child=serializers.IntegerField(), read_only=True)
+    percentiles = serializers.DictField(source="rating_percentiles", child=serializers.IntegerField(allow_null=True), read_only=True)
+
+    class Meta:
+        model = Media
+        fields = ["id", "user_rating", "avg_rating", "weighted_rating", "histogram", "percentiles"]
+
+
+class TrendingMediaSerializer(MediaSerializer):
+    """
+    Serializer for trending media, including their current time-decayed trending score.
+    """
+
+    trending_score = serializers.FloatField(read_only=True)
+
+
+class SimilarMediaSerializer(serializers.ModelSerializer):
+    """
+    Serializer for a similar media, including the cosine similarity of its ratings.
+    """
+
+    similar = MediaSerializer(read_only=True)
+
+    class Meta:
+        model = SimilarMedia
+        fields = ["similar", "score"]
 
 
 class StreamingPlatformSerializer(serializers.ModelSerializer):
     """
-    Serializer for the StreamingPlatform model, including related media objects.
+    Serializer for the StreamingPlatform model, including its related media objects in their list representation.
     """
 
-    media = MediaSerializer(many=True, read_only=True)
+    media = MediaListSerializer(many=True, read_only=True)
 
     class Meta:
         model = StreamingPlatform
-        fields = "__all__"
\ No newline at end of file
+        fields = "__all__"
+
+class StreamingPlatformSummarySerializer(serializers.ModelSerializer):
+    """
+    Serializer for the StreamingPlatform model without its related media objects.
+    """
+
+    class Meta:
+        model = StreamingPlatform
+        fields = "__all__"
+
+
+class MediaDetailSerializer(MediaSerializer):
+    """
+    Serializer for a single media.
+    Embeds the streaming platform when requested through the "include" context.
+    """
+
+    platform = StreamingPlatformSummarySerializer(source="streaming_platform", read_only=True)
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        if "platform" not in self.context.get("include", ()):
+            self.fields.pop("platform")
+
+
+class MediaBatchSerializer(MediaDetailSerializer):
+    """
+    Serializer for media returned by the batch endpoint.
+    Embeds the streaming platform and the latest reviews when requested through the "include" context.
+    """
+
+    latest_reviews = ReviewSerializer(many=True, read_only=True)
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        if "reviews" not in self.context.get("include", ()):
+            self.fields.pop("latest_reviews")
@@ -1,3 +1,5 @@
+import math
+
 from rest_framework.throttling import UserRateThrottle
 
 
@@ -15,3 +17,31 @@ class ReviewListThrottle(UserRateThrottle):
     """
 
     scope = "review-list"
+
+
+class MediaBatchThrottle(UserRateThrottle):
+    """
+    Throttle class for the media batch endpoint, counting each batch as one request weighted by its size.
+    """
+
+    scope = "media-batch"
+    ids_per_request = 10
+
+    def allow_request(self, request, view):
+        """
+        Determine the weight of the batch before checking the rate.
+        """
+        requested_ids = [value for value in request.query_params.get("ids", "").split(",") if value.strip()]
+        self.weight = max(1, math.ceil(len(requested_ids) / self.ids_per_request))
+        return super().allow_request(request, view)
+
+    def throttle_success(self):
+        """
+        Record the batch as `weight` requests, rejecting it if that would exceed the rate.
+        """
+        if len(self.history) + self.weight > self.num_requests:
+            return self.throttle_failure()
+
+        self.history[:0] = [self.now] * self.weight
+        self.cache.set(self.key, self.history, self.duration)
+        return True
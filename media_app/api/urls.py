@@ -1,17 +1,39 @@
 from django.urls import include, path
 from rest_framework.routers import DefaultRouter
 
-from media_app.api.views import *
+from media_app.api.views import (AnalyticsExportAPIView, ArchivedReviewList,
+                                 ChangeFeedAPIView,
+                                 CurrentUserReviews, MediaAPIView,
+                                 MediaBatchAPIView, MediaBulkAPIView,
+                                 MediaDetailAPIView,
+                                 MediaRatingsAPIView, ObjectCacheStatsAPIView,
+                                 RecentlyReviewedMediaAPIView, ReviewCreate,
+                                 ReviewDetail, ReviewList, SimilarMediaList,
+                                 StreamingPlatformViewSet,
+                                 TrendingMediaAPIView, UserReviews,
+                                 review_stream)
 
 router = DefaultRouter()
 router.register("streaming_platform", StreamingPlatformViewSet, basename="streaming_platform")
 
 urlpatterns = [
     path("", MediaAPIView.as_view(), name="media-list"),
+    path("batch/", MediaBatchAPIView.as_view(), name="media-batch"),
+    path("bulk/", MediaBulkAPIView.as_view(), name="media-bulk"),
+    path("trending/", TrendingMediaAPIView.as_view(), name="media-trending"),
+    path("recently-reviewed/", RecentlyReviewedMediaAPIView.as_view(), name="media-recently-reviewed"),
+    path("cache/", ObjectCacheStatsAPIView.as_view(), name="media-cache-stats"),
+    path("changes/", ChangeFeedAPIView.as_view(), name="media-changes"),
+    path("export/<str:table>/", AnalyticsExportAPIView.as_view(), name="media-export"),
     path("<int:pk>/", MediaDetailAPIView.as_view(), name="media-detail"),
     path("", include(router.urls)),
     path("<int:pk>/reviews/", ReviewList.as_view(), name="review-list"),
+    path("<int:pk>/reviews/stream/", review_stream, name="review-stream"),
+    path("<int:pk>/reviews/archive/", ArchivedReviewList.as_view(), name="review-archive-list"),
+    path("<int:pk>/ratings/", MediaRatingsAPIView.as_view(), name="media-ratings"),
+    path("<int:pk>/similar/", SimilarMediaList.as_view(), name="media-similar"),
     path("<int:pk>/review/create/", ReviewCreate.as_view(), name="review-create"),
     path("reviews/<int:pk>/", ReviewDetail.as_view(), name="review-detail"),
     path("reviews/user/", UserReviews.as_view(), name="reviews-user"),
+    path("reviews/user/me/", CurrentUserReviews.as_view(), name="reviews-user-me"),
 ]
\ No newline at end of file
@@ -1,34 +1,113 @@
+import asyncio
+import hashlib
+import json
+import tempfile
+from collections import defaultdict
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import connection, transaction
+from django.db.models import F, Prefetch, Q, Window
+from django.db.models.functions import RowNumber
+from django.http import FileResponse, JsonResponse, StreamingHttpResponse
+from django.shortcuts import get_object_or_404
+from django.utils.dateparse import parse_datetime
+from django.views.decorators.http import require_GET
 from django_filters.rest_framework import DjangoFilterBackend
+from drf_spectacular.types import OpenApiTypes
 from drf_spectacular.utils import (OpenApiParameter, extend_schema,
                                    extend_schema_view)
 from rest_framework import filters, generics, status, viewsets
 from rest_framework.exceptions import ValidationError
-from rest_framework.permissions import (IsAuthenticated,
+from rest_framework.permissions import (IsAdminUser, IsAuthenticated,
                                         IsAuthenticatedOrReadOnly)
 from rest_framework.response import Response
 from rest_framework.throttling import AnonRateThrottle, UserRateThrottle
 from rest_framework.views import APIView
 
-from media_app.api.pagination import *
-from media_app.api.permissions import *
-from media_app.api.serializers import *
-from media_app.api.throttling import *
-from media_app.models import *
+from media_app import changes, events, export, signals, trending
+from media_app.api.coalescing import coalesced, flights
+from media_app.api.filters import ReviewFilter
+from media_app.api.idempotency import (IDEMPOTENCY_KEY_PARAMETER,
+                                       IdempotencyMixin)
+from media_app.api.pagination import ReviewFeedPagination, ReviewPagination
+from media_app.api.permissions import IsAdminOrReadOnly, IsReviewUserOrReadOnly
+from media_app.api.serializers import (MEDIA_LIST_DEFERRED_FIELDS,
+                                       ArchivedReviewSerializer,
+                                       MediaBatchSerializer,
+                                       MediaBulkEditSerializer,
+                                       MediaBulkSerializer,
+                                       MediaDetailSerializer,
+                                       MediaEditSerializer,
+                                       MediaListSerializer,
+                                       MediaRatingsSerializer, MediaSerializer,
+                                       ReviewSerializer,
+                                       SimilarMediaSerializer,
+                                       StreamingPlatformSerializer,
+                                       StreamingPlatformSummarySerializer,
+                                       TrendingMediaSerializer)
+from media_app.api.throttling import (MediaBatchThrottle, ReviewCreateThrottle,
+                                      ReviewListThrottle)
+from media_app.cache import MISS, media_cache, platform_cache, review_page_cache
+from media_app.models import (ArchivedReview, Change, Media, Review,
+                              SimilarMedia, StreamingPlatform)
+from media_app.ratings import apply_rating_change, weighted_rating
+
+
 
+def get_include(request):
+    """
+    Return the related data requested through the comma-separated "include" query parameter.
+    """
+    return {value.strip() for value in request.query_params.get("include", "").split(",")}
 
+@extend_schema(
+    parameters=[
+        OpenApiParameter("username", description="Username of the reviewer", required=True, type=str),
+    ],
+    description="List reviews written by a user, most recently updated first."
+)
 class UserReviews(generics.ListAPIView):
     """
-    List reviews filtered by a reviewer"s username.
+    List reviews written by a user, paginated with keyset cursors.
     """
 
     serializer_class = ReviewSerializer
+    pagination_class = ReviewFeedPagination
 
-    def get_queryset(self):
+    def get_reviewer(self):
         """
-        Retrieve reviews filtered by the "username" query parameter.
+        Resolve the "username" query parameter to a user once, so reviews are filtered by reviewer id.
         """
         username = self.request.query_params.get("username", None)
-        return Review.objects.filter(reviewer__username=username)
+        return User.objects.only("id", "username").filter(username=username).first()
+
+    def get_queryset(self):
+        """
+        Retrieve the reviews written by the resolved reviewer.
+        """
+        self.reviewer = self.get_reviewer()
+        if self.reviewer is None:
+            return Review.objects.none()
+
+        return Review.objects.filter(reviewer_id=self.reviewer.id)
+
+@extend_schema(
+    description="List reviews written by the authenticated user, most recently updated first."
+)
+class CurrentUserReviews(UserReviews):
+    """
+    List reviews written by the authenticated user, paginated with keyset cursors.
+    """
+
+    permission_classes = [IsAuthenticated]
+
+    def get_reviewer(self):
+        """
+        Use the authenticated user as the reviewer.
+        """
+        return self.request.user
 
 @extend_schema_view(
     list=extend_schema(
@@ -38,6 +117,7 @@ class UserReviews(generics.ListAPIView):
         description="Retrieve a specific streaming platform by its ID."
     ),
     create=extend_schema(
+        parameters=[IDEMPOTENCY_KEY_PARAMETER],
         description="Create a new streaming platform. Only accessible to admin users."
     ),
     update=extend_schema(
@@ -50,12 +130,14 @@ class UserReviews(generics.ListAPIView):
         description="Delete a specific streaming platform by its ID. Only accessible to admin users."
     ),
 )
-class StreamingPlatformViewSet(viewsets.ModelViewSet):
+class StreamingPlatformViewSet(IdempotencyMixin, viewsets.ModelViewSet):
     """
     Performing CRUD operations on StreamingPlatform objects.
     """
 
-    queryset = StreamingPlatform.objects.all()
+    queryset = StreamingPlatform.objects.prefetch_related(
+        Prefetch("media", queryset=Media.objects.defer(*MEDIA_LIST_DEFERRED_FIELDS))
+    )
     serializer_class = StreamingPlatformSerializer
     permission_classes = [IsAdminOrReadOnly]
     throttle_classes = [AnonRateThrottle]
@@ -78,17 +160,114 @@ class ReviewList(generics.ListAPIView):
     permission_classes = [IsAuthenticatedOrReadOnly]
     throttle_classes = [ReviewListThrottle, AnonRateThrottle]
     filter_backends = [DjangoFilterBackend]
-    filterset_fields = {"reviewer__username", "active"}
+    filterset_class = ReviewFilter
 
     def get_queryset(self):
         """
         Retrieve reviews filtered by the media primary key (pk).
+        Only active reviews are listed unless the "active" filter is given explicitly.
         """
         if getattr(self, "swagger_fake_view", False):
             return Review.objects.none()
         
         pk = self.kwargs["pk"]
-        return Review.objects.filter(media=pk).order_by("created")
+        manager = Review.all_objects if "active" in self.request.query_params else Review.objects
+        return manager.filter(media=pk).order_by("created")
+
+    def get_page_cache_params(self):
+        """
+        Return the normalized parameters that select a page of reviews: the filters, the page and its size.
+        """
+        params = self.request.query_params
+        return (
+            params.get("reviewer__username"),
+            params.get("active"),
+            params.get(self.paginator.page_query_param, "1"),
+            self.paginator.get_page_size(self.request),
+        )
+
+    @coalesced
+    def list(self, request, *args, **kwargs):
+        """
+        List a page of reviews from the review page cache of the media, querying and serializing it on a miss.
+        The X-Cache header tells whether the page was cached.
+        """
+        queryset = self.filter_queryset(self.get_queryset())
+
+        def load_page():
+            reviews = self.paginate_queryset(queryset)
+            return {
+                "count": self.paginator.page.paginator.count,
+                "number": self.paginator.page.number,
+                "results": self.get_serializer(reviews, many=True).data,
+            }
+
+        page, source = review_page_cache.get_or_set(self.kwargs["pk"], self.get_page_cache_params(), load_page)
+        if source != MISS:
+            # Rebuild the page from its cached count, so the pagination links are built without a query.
+            paginator = self.paginator.django_paginator_class(queryset, self.paginator.get_page_size(request))
+            paginator.count = page["count"]
+            self.paginator.page = paginator.page(page["number"])
+            self.paginator.request = request
+
+        response = self.paginator.get_paginated_response(page["results"])
+        response["X-Cache"] = source
+        return response
+
+@extend_schema(
+    responses=ArchivedReviewSerializer(many=True),
+    description="List the archived reviews of a specific media, newest first."
+)
+class ArchivedReviewList(generics.ListAPIView):
+    """
+    List the reviews of a specific media that were moved to the review archive.
+    """
+
+    pagination_class = ReviewPagination
+    serializer_class = ArchivedReviewSerializer
+    permission_classes = [IsAuthenticatedOrReadOnly]
+    throttle_classes = [ReviewListThrottle, AnonRateThrottle]
+
+    def get_queryset(self):
+        """
+        Retrieve archived reviews filtered by the media primary key (pk).
+        """
+        if getattr(self, "swagger_fake_view", False):
+            return ArchivedReview.objects.none()
+
+        pk = self.kwargs["pk"]
+        return ArchivedReview.objects.filter(media=pk).order_by("-created")
+
+@extend_schema(
+    responses=SimilarMediaSerializer(many=True),
+    description="List the media that reviewers of a specific media also rated highly, most similar first."
+)
+class SimilarMediaList(generics.ListAPIView):
+    """
+    List the media most similar to a specific media, precomputed by the refresh_similar_media command.
+    """
+
+    serializer_class = SimilarMediaSerializer
+    permission_classes = [IsAuthenticatedOrReadOnly]
+
+    def get_queryset(self):
+        """
+        Retrieve the stored similar media of the media primary key (pk), leaving out inactive media.
+        """
+        if getattr(self, "swagger_fake_view", False):
+            return SimilarMedia.objects.none()
+
+        return (
+            SimilarMedia.objects.filter(media=self.kwargs["pk"], similar__active=True)
+            .select_related("similar")
+            .order_by("-score")
+        )
+
+def lock_media(media_ids):
+    """
+    Lock the rows of the given media until the end of the transaction, in id order so concurrent writers cannot deadlock.
+    """
+    return {media_object.pk: media_object for media_object in Media.all_objects.select_for_update().filter(pk__in=media_ids).order_by("pk")}
 
 @extend_schema_view(
     get=extend_schema(
@@ -109,16 +288,53 @@ class ReviewDetail(generics.RetrieveUpdateDestroyAPIView):
     Retrieve, update, or delete a review.
     """
 
-    queryset = Review.objects.all()
     serializer_class = ReviewSerializer
     permission_classes = [IsReviewUserOrReadOnly]
     throttle_classes = [UserRateThrottle, AnonRateThrottle]
     throttle_scope = "review-detail"
 
+    def get_queryset(self):
+        """
+        Return the active reviews, and the inactive reviews of the requesting user, so they can reactivate them.
+        """
+        if self.request.user.is_authenticated:
+            return Review.all_objects.filter(Q(active=True) | Q(reviewer=self.request.user))
+        return Review.objects.all()
+
+    def perform_update(self, serializer):
+        """
+        Save the review and move its rating between the histograms of its old and new media.
+        """
+        review = serializer.instance
+        media_ids = {review.media_id, serializer.validated_data.get("media", review.media).pk}
+
+        with transaction.atomic():
+            media_objects = lock_media(media_ids)
+            previous = Review.all_objects.values("media_id", "rating", "active").get(pk=review.pk)
+            review = serializer.save()
+
+            if previous["active"]:
+                apply_rating_change(media_objects[previous["media_id"]], removed=previous["rating"])
+            if review.active:
+                apply_rating_change(media_objects[review.media_id], added=review.rating)
+
+    def perform_destroy(self, instance):
+        """
+        Delete the review and remove its rating from the histogram of its media.
+        """
+        with transaction.atomic():
+            media_object = lock_media([instance.media_id])[instance.media_id]
+            previous = Review.all_objects.filter(pk=instance.pk).values("rating", "active").first()
+            instance.delete()
+
+            if previous and previous["active"]:
+                apply_rating_change(media_object, removed=previous["rating"])
+
 @extend_schema(
+    parameters=[IDEMPOTENCY_KEY_PARAMETER],
     description="Create a new review for a media."
 )
-class ReviewCreate(generics.CreateAPIView):
+class ReviewCreate(IdempotencyMixin, generics.CreateAPIView):
     """
     Create a new review for a media.
     Ensures that a user cannot review the same media multiple times.
@@ -131,37 +347,40 @@ class ReviewCreate(generics.CreateAPIView):
     def perform_create(self, serializer):
         """
         Custom behavior when creating a review, ensuring uniqueness and updating media ratings.
+        The media row stays locked until commit, so concurrent reviews of a media are counted one at a time.
         """
         pk = self.kwargs.get("pk")
-        media_object = Media.objects.get(pk=pk)
         reviewer = self.request.user
 
-        review_queryset = Review.objects.filter(media=media_object, reviewer=reviewer)
-
-        if review_queryset.exists():
-            raise ValidationError("You have already reviewed this media.")
-
-        new_avg_rating = serializer.validated_data["rating"]
-        total_ratings = media_object.user_rating + 1
-        media_object.avg_rating = ((media_object.avg_rating * media_object.user_rating) + new_avg_rating) / total_ratings
+        with transaction.atomic():
+            media_object = get_object_or_404(Media.objects.select_for_update(), pk=pk)
+            review_queryset = Review.all_objects.filter(media=media_object, reviewer=reviewer)
+            archived_queryset = ArchivedReview.objects.filter(media=media_object, reviewer=reviewer)
 
-        media_object.user_rating = total_ratings
-        media_object.save()
+            if review_queryset.exists() or archived_queryset.exists():
+                raise ValidationError("You have already reviewed this media.")
 
-        serializer.save(media=media_object, reviewer=reviewer)
+            review = serializer.save(media=media_object, reviewer=reviewer)
+            if review.active:
+                apply_rating_change(media_object, added=review.rating)
 
 @extend_schema_view(
     get=extend_schema(
-        responses={200: MediaSerializer(many=True)},
-        description="Retrieve a list of all media objects."
+        parameters=[
+            OpenApiParameter("ordering", description="Sort by weighted_rating, avg_rating, created or title; prefix with - to sort descending", required=False, type=str),
+            OpenApiParameter("include", description="Comma-separated related data to embed: histogram", required=False, type=str),
+        ],
+        responses={200: MediaListSerializer(many=True)},
+        description="Retrieve a list of all media objects, without their storyline, which the media detail includes."
     ),
     post=extend_schema(
+        parameters=[IDEMPOTENCY_KEY_PARAMETER],
         request=MediaSerializer,
         responses={201: MediaSerializer},
         description="Create a new media object. Only accessible to admin users."
     )
 )
-class MediaAPIView(APIView):
+class MediaAPIView(IdempotencyMixin, APIView):
     """
     Listing and creating media objects.
     Creation is restricted to admin users.
@@ -169,13 +388,15 @@ class MediaAPIView(APIView):
 
     permission_classes = [IsAdminOrReadOnly]
     throttle_classes = [AnonRateThrottle]
+    ordering_fields = ["weighted_rating", "avg_rating", "created", "title"]
 
     def get(self, request):
         """
-        Retrieve and return all media objects.
+        Retrieve and return all media objects in their list representation, sorted when an ordering is given.
         """
-        media_objects = Media.objects.all()
-        serializer = MediaSerializer(media_objects, many=True)
+        queryset = Media.objects.defer(*MEDIA_LIST_DEFERRED_FIELDS)
+        media_objects = filters.OrderingFilter().filter_queryset(request, queryset, self)
+        serializer = MediaListSerializer(media_objects, many=True, context={"include": get_include(request)})
         return Response(serializer.data, status=status.HTTP_200_OK)
 
     def post(self, request):
@@ -189,54 +410,693 @@ class MediaAPIView(APIView):
         else:
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
+@extend_schema(
+    parameters=[
+        OpenApiParameter("ids", description="Comma-separated media ids, at most 50", required=True, type=str),
+        OpenApiParameter("include", description="Comma-separated related data to embed: platform, reviews, histogram", required=False, type=str),
+    ],
+    responses=MediaBatchSerializer(many=True),
+    description="Retrieve many media objects by their ids in a single request, preserving the requested order."
+)
+class MediaBatchAPIView(APIView):
+    """
+    Retrieving many media objects by id in a single request.
+    Media that do not exist are reported in "missing" instead of failing the whole batch.
+    """
+
+    permission_classes = [IsAdminOrReadOnly]
+    throttle_classes = [MediaBatchThrottle]
+    max_batch_size = 50
+    latest_reviews_count = 3
+
+    def get(self, request):
+        """
+        Retrieve the requested media objects with a single query, plus one for the latest reviews if included.
+        """
+        requested_ids = [value for value in request.query_params.get("ids", "").split(",") if value.strip()]
+
+        if not requested_ids:
+            return Response({"Error": "Provide at least one media id"}, status=status.HTTP_400_BAD_REQUEST)
+        if len(requested_ids) > self.max_batch_size:
+            return Response({"Error": f"At most {self.max_batch_size} media ids can be requested at once"}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            ids = list(dict.fromkeys(int(value) for value in requested_ids))
+        except ValueError:
+            return Response({"Error": "Media ids must be integers"}, status=status.HTTP_400_BAD_REQUEST)
+
+        include = get_include(request)
+
+        queryset = Media.objects.all()
+        if "platform" in include:
+            queryset = queryset.select_related("streaming_platform")
+        media_objects = queryset.in_bulk(ids)
+
+        if "reviews" in include:
+            for media_object in media_objects.values():
+                media_object.latest_reviews = []
+
+            latest_reviews = (
+                Review.objects.filter(media__in=media_objects.keys())
+                .annotate(position=Window(RowNumber(), partition_by=F("media"), order_by=F("created").desc()))
+                .filter(position__lte=self.latest_reviews_count)
+                .order_by("media", "position")
+            )
+            for review in latest_reviews:
+                media_objects[review.media_id].latest_reviews.append(review)
+
+        found = [media_objects[pk] for pk in ids if pk in media_objects]
+        missing = [pk for pk in ids if pk not in media_objects]
+
+        serializer = MediaBatchSerializer(found, many=True, context={"request": request, "include": include})
+        return Response({"results": serializer.data, "missing": missing}, status=status.HTTP_200_OK)
+
+def changed_fields(instance, validated_data):
+    """
+    Set the validated values that differ from the instance and return the names of their fields.
+    Foreign keys are compared by id, so related objects are never loaded.
+    """
+    changed = []
+    for name, value in validated_data.items():
+        field = instance._meta.get_field(name)
+        if getattr(instance, field.attname) != (value.pk if field.is_relation else value):
+            setattr(instance, name, value)
+            changed.append(name)
+    return changed
+
+@extend_schema_view(
+    post=extend_schema(
+        parameters=[IDEMPOTENCY_KEY_PARAMETER],
+        request=MediaBulkSerializer(many=True),
+        responses={201: dict, 207: dict, 400: dict},
+        description="Create many media objects. Valid items are created and invalid ones reported by index. Only accessible to admin users."
+    ),
+    patch=extend_schema(
+        request=MediaBulkEditSerializer(many=True),
+        responses={200: dict, 207: dict, 400: dict},
+        description="Partially update many media objects, each item carrying its id. Only changed columns are written. Only accessible to admin users."
+    ),
+    delete=extend_schema(
+        request={"application/json": {"type": "array", "items": {"type": "integer"}}},
+        responses={200: dict, 207: dict, 400: dict},
+        description="Delete many media objects by id. Only accessible to admin users."
+    )
+)
+class MediaBulkAPIView(IdempotencyMixin, APIView):
+    """
+    Creating, updating and deleting many media objects per request, for catalog syncs.
+    Items are validated one by one and written in batches, each batch in its own transaction, with a few queries per batch.
+    """
+
+    permission_classes = [IsAdminUser]
+    throttle_classes = [AnonRateThrottle]
+    max_items = 5000
+    batch_size = 500
+
+    def check_items(self, items):
+        """
+        Return an error response unless the request body is a non-empty list of at most max_items items.
+        """
+        if not isinstance(items, list) or not items:
+            return Response({"Error": "Provide a non-empty list of media"}, status=status.HTTP_400_BAD_REQUEST)
+        if len(items) > self.max_items:
+            return Response({"Error": f"At most {self.max_items} media can be written at once"}, status=status.HTTP_400_BAD_REQUEST)
+        return None
+
+    def batches(self, items):
+        """
+        Split the indexed items into batches of batch_size.
+        """
+        indexed = list(enumerate(items))
+        return [indexed[start:start + self.batch_size] for start in range(0, len(indexed), self.batch_size)]
+
+    def get_serializer_context(self, batch):
+        """
+        Load the streaming platforms referenced by a batch with a single query.
+        """
+        platform_ids = set()
+        for _, item in batch:
+            try:
+                platform_ids.add(int(item["streaming_platform"]))
+            except (KeyError, TypeError, ValueError):
+                pass
+        return {"streaming_platforms": StreamingPlatform.objects.in_bulk(platform_ids)}
+
+    def respond(self, data, succeeded, success_status):
+        """
+        Answer with the success status if every item succeeded, 207 if some did and 400 if none did.
+        Errors are listed in the order of their items.
+        """
+        data["errors"].sort(key=lambda error: error["index"])
+        if not data["errors"]:
+            response_status = success_status
+        elif succeeded:
+            response_status = status.HTTP_207_MULTI_STATUS
+        else:
+            response_status = status.HTTP_400_BAD_REQUEST
+        return Response(data, status=response_status)
+
+    def post(self, request):
+        """
+        Create the valid media with one INSERT per batch.
+        """
+        error = self.check_items(request.data)
+        if error:
+            return error
+
+        created, errors = [], []
+        for batch in self.batches(request.data):
+            context = self.get_serializer_context(batch)
+            media_objects = []
+            for index, item in batch:
+                serializer = MediaBulkSerializer(data=item, context=context)
+                if serializer.is_valid():
+                    media_object = Media(**serializer.validated_data)
+                    media_object.weighted_rating = weighted_rating(media_object.avg_rating, media_object.user_rating)
+                    media_objects.append((index, media_object))
+                else:
+                    errors.append({"index": index, "errors": serializer.errors})
+
+            with transaction.atomic():
+                Media.objects.bulk_create([media_object for _, media_object in media_objects])
+                changes.record(Media, [media_object.pk for _, media_object in media_objects])
+            created += [{"index": index, "id": media_object.pk} for index, media_object in media_objects]
+
+        return self.respond({"created": created, "errors": errors}, len(created), status.HTTP_201_CREATED)
+
+    def patch(self, request):
+        """
+        Update the changed columns of the valid items, with one UPDATE per batch and set of changed columns.
+        Rows are locked while their batch is written, so concurrent rating updates are never overwritten.
+        """
+        error = self.check_items(request.data)
+        if error:
+            return error
+
+        updated, unchanged, errors = [], [], []
+        for batch in self.batches(request.data):
+            context = self.get_serializer_context(batch)
+            media_ids = {}
+            for index, item in batch:
+                try:
+                    media_ids[index] = int(item["id"])
+                except (KeyError, TypeError, ValueError):
+                    errors.append({"index": index, "errors": {"id": ["A media id is required"]}})
+
+            with transaction.atomic():
+                media_objects = lock_media(set(media_ids.values()))
+                groups = defaultdict(list)
+                for index, item in batch:
+                    if index not in media_ids:
+                        continue
+                    media_object = media_objects.get(media_ids[index])
+                    if media_object is None:
+                        errors.append({"index": index, "errors": {"id": ["Media not found"]}})
+                        continue
+
+                    serializer = MediaBulkEditSerializer(media_object, data=item, partial=True, context=context)
+                    if not serializer.is_valid():
+                        errors.append({"index": index, "errors": serializer.errors})
+                        continue
+
+                    fields = changed_fields(media_object, serializer.validated_data)
+                    if fields:
+                        groups[tuple(sorted(fields))].append(media_object)
+                        updated.append(media_object.pk)
+                    else:
+                        unchanged.append(media_object.pk)
+
+                for fields, group in groups.items():
+                    Media.all_objects.bulk_update(group, fields)
+                if groups:
+                    changes.record(Media, [media_object.pk for group in groups.values() for media_object in group])
+                    media_cache.invalidate_all()
+
+        data = {"updated": updated, "unchanged": unchanged, "errors": errors}
+        return self.respond(data, len(updated) + len(unchanged), status.HTTP_200_OK)
+
+    def delete(self, request):
+        """
+        Delete the media with the given ids, and everything that cascades from them, batch by batch.
+        """
+        error = self.check_items(request.data)
+        if error:
+            return error
+
+        deleted, errors = [], []
+        for batch in self.batches(request.data):
+            media_ids = {}
+            for index, value in batch:
+                try:
+                    media_ids[index] = int(value)
+                except (TypeError, ValueError):
+                    errors.append({"index": index, "errors": {"id": ["A media id is required"]}})
+
+            with transaction.atomic():
+                existing = set(Media.all_objects.filter(pk__in=media_ids.values()).values_list("pk", flat=True))
+                Media.all_objects.filter(pk__in=existing).delete()
+
+            for index, media_id in media_ids.items():
+                if media_id in existing:
+                    deleted.append(media_id)
+                else:
+                    errors.append({"index": index, "errors": {"id": ["Media not found"]}})
+
+        return self.respond({"deleted": deleted, "errors": errors}, len(deleted), status.HTTP_200_OK)
+
+@extend_schema(
+    responses=MediaRatingsSerializer,
+    description="Retrieve the rating distribution of a media: the number of reviews per rating and rating percentiles."
+)
+class MediaRatingsAPIView(APIView):
+    """
+    Retrieving the rating histogram and percentiles of a media, kept up to date on the media row by review writes.
+    """
+
+    permission_classes = [IsAdminOrReadOnly]
+
+    def get(self, request, pk):
+        """
+        Retrieve the rating distribution of a media by its primary key (pk) through the object cache.
+        """
+        media_object = media_cache.get(pk)
+        if media_object is None:
+            return Response({"Error": "Media not found"}, status=status.HTTP_404_NOT_FOUND)
+
+        serializer = MediaRatingsSerializer(media_object)
+        return Response(serializer.data, status=status.HTTP_200_OK)
+
+
+class RankedMediaAPIView(APIView):
+    """
+    Base view for media rails ranked in memory by the trending engine.
+    """
+
+    permission_classes = [IsAdminOrReadOnly]
+    serializer_class = MediaSerializer
+    default_limit = 10
+    max_limit = 100
+
+    def get(self, request):
+        """
+        Read the top ranked media ids from memory and load the media with a single query.
+        """
+        try:
+            limit = int(request.query_params.get("limit", self.default_limit))
+        except ValueError:
+            return Response({"Error": "limit must be an integer"}, status=status.HTTP_400_BAD_REQUEST)
+        if not 1 <= limit <= self.max_limit:
+            return Response({"Error": f"limit must be between 1 and {self.max_limit}"}, status=status.HTTP_400_BAD_REQUEST)
+
+        serializer = self.serializer_class(self.get_ranked_media(limit), many=True)
+        return Response(serializer.data, status=status.HTTP_200_OK)
+
+    def get_media(self, ranked_ids):
+        """
+        Return the active media objects with the given ids, in ranking order, through the object cache.
+        """
+        media_objects = media_cache.get_many(ranked_ids)
+        return [media_objects[pk] for pk in ranked_ids if pk in media_objects]
+
+
+@extend_schema(
+    parameters=[
+        OpenApiParameter("limit", description="Number of media to return, at most 100", required=False, type=int),
+    ],
+    responses=TrendingMediaSerializer(many=True),
+    description="List the media with the most highly rated reviews lately, highest trending score first."
+)
+class TrendingMediaAPIView(RankedMediaAPIView):
+    """
+    Listing trending media, ranked by rating-weighted review velocity with exponential time decay.
+    """
+
+    serializer_class = TrendingMediaSerializer
+
+    def get_ranked_media(self, limit):
+        """
+        Return the media with the highest current trending scores.
+        """
+        scores = dict(trending.get_engine().top(limit))
+        media_list = self.get_media(list(scores))
+        for media_object in media_list:
+            media_object.trending_score = scores[media_object.pk]
+        return media_list
+
+
+@extend_schema(
+    parameters=[
+        OpenApiParameter("limit", description="Number of media to return, at most 100", required=False, type=int),
+    ],
+    responses=MediaSerializer(many=True),
+    description="List the most recently reviewed media, latest first."
+)
+class RecentlyReviewedMediaAPIView(RankedMediaAPIView):
+    """
+    Listing the most recently reviewed media.
+    """
+
+    def get_ranked_media(self, limit):
+        """
+        Return the media that were reviewed last.
+        """
+        return self.get_media([pk for pk, _ in trending.get_engine().recently_reviewed(limit)])
+
+# Fields edited by the catalog team. Rating aggregates are read-only in edits and left out, so that reviews
+# written while a media is being edited do not make the edit fail.
+CATALOG_FIELDS = ["title", "storyline", "streaming_platform_id", "active"]
+
+IF_MATCH_PARAMETER = OpenApiParameter(
+    "If-Match",
+    location=OpenApiParameter.HEADER,
+    description="ETag of the media as last read. The update fails with 412 if the media was edited since",
+    required=False,
+    type=str,
+)
+
+
+def media_etag(media_object):
+    """
+    Return the ETag of the catalog fields of a media.
+    """
+    values = json.dumps([getattr(media_object, field) for field in CATALOG_FIELDS])
+    return f'"{hashlib.blake2b(values.encode(), digest_size=16).hexdigest()}"'
+
+
+def etag_matches(if_match, etag):
+    """
+    Return whether an If-Match header lists the ETag, with the strong comparison it requires.
+    """
+    tags = [tag.strip() for tag in if_match.split(",")]
+    return "*" in tags or etag in tags
+
 @extend_schema_view(
     get=extend_schema(
-        responses={200: MediaSerializer},
-        description="Retrieve a media object by its primary key (pk)."
+        parameters=[
+            OpenApiParameter("include", description="Comma-separated related data to embed: histogram, platform", required=False, type=str),
+        ],
+        responses={200: MediaDetailSerializer},
+        description="Retrieve a media object by its primary key (pk). The X-Cache header tells which cache tier served it."
     ),
     put=extend_schema(
-        request=MediaSerializer,
-        responses={200: MediaSerializer},
-        description="Update an existing media object."
+        parameters=[IF_MATCH_PARAMETER],
+        request=MediaEditSerializer,
+        responses={200: MediaSerializer, 412: dict},
+        description="Update an existing media object. Only changed columns are written. Only accessible to admin users."
+    ),
+    patch=extend_schema(
+        parameters=[IF_MATCH_PARAMETER],
+        request=MediaEditSerializer(partial=True),
+        responses={200: MediaSerializer, 412: dict},
+        description="Partially update an existing media object. Only changed columns are written. Only accessible to admin users."
     ),
     delete=extend_schema(
         responses={204: None},
-        description="Delete a media object."
+        description="Delete a media object. Only accessible to admin users."
     )
 )
 class MediaDetailAPIView(APIView):
     """
     Retrieving, updating, and deleting a single media object.
+    Updates and deletion are restricted to admin users.
     """
 
+    permission_classes = [IsAdminOrReadOnly]
+
+    @coalesced
     def get(self, request, pk):
         """
-        Retrieve a media object by its primary key (pk).
+        Retrieve a media object by its primary key (pk), and its streaming platform if included, through the object cache.
         """
-        try:
-            media_object = Media.objects.get(pk=pk)
-        except Media.DoesNotExist:
+        media_object, source = media_cache.lookup(pk)
+        if media_object is None:
             return Response({"Error": "Media not found"}, status=status.HTTP_404_NOT_FOUND)
 
-        serializer = MediaSerializer(media_object)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        include = get_include(request)
+        if "platform" in include:
+            media_object.streaming_platform = platform_cache.get(media_object.streaming_platform_id)
+
+        serializer = MediaDetailSerializer(media_object, context={"include": include})
+        return Response(serializer.data, status=status.HTTP_200_OK, headers={"X-Cache": source, "ETag": media_etag(media_object)})
 
     def put(self, request, pk):
         """
         Update an existing media object.
         """
-        media_object = Media.objects.get(pk=pk)
-        serializer = MediaSerializer(media_object, data=request.data)
-        if serializer.is_valid():
-            serializer.save()
-            return Response(serializer.data, status=status.HTTP_200_OK)
-        else:
-            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        return self.update(request, pk, partial=False)
+
+    def patch(self, request, pk):
+        """
+        Update some fields of an existing media object.
+        """
+        return self.update(request, pk, partial=True)
+
+    def update(self, request, pk, partial):
+        """
+        Write the changed columns of a media, failing if it was edited since the client read the ETag in If-Match.
+        The row is locked from the ETag check to the write, and the rating aggregates, maintained from reviews, are read-only.
+        """
+        with transaction.atomic():
+            media_object = Media.all_objects.select_for_update().filter(pk=pk).first()
+            if media_object is None:
+                return Response({"Error": "Media not found"}, status=status.HTTP_404_NOT_FOUND)
+
+            etag = media_etag(media_object)
+            if_match = request.headers.get("If-Match")
+            if if_match is not None and not etag_matches(if_match, etag):
+                return Response({"Error": "The media was edited since it was read"}, status=status.HTTP_412_PRECONDITION_FAILED, headers={"ETag": etag})
+
+            serializer = MediaEditSerializer(media_object, data=request.data, partial=partial)
+            if not serializer.is_valid():
+                return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+            fields = changed_fields(media_object, serializer.validated_data)
+            if fields:
+                media_object.save(update_fields=fields)
+
+        return Response(MediaSerializer(media_object).data, status=status.HTTP_200_OK, headers={"ETag": media_etag(media_object)})
 
     def delete(self, request, pk):
         """
         Delete a media object.
         """
-        media_object = Media.objects.get(pk=pk)
+        media_object = Media.all_objects.filter(pk=pk).first()
+        if media_object is None:
+            return Response({"Error": "Media not found"}, status=status.HTTP_404_NOT_FOUND)
+
         media_object.delete()
         return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+@extend_schema(
+    responses=dict,
+    description="Report the hit ratios and memory usage of the media and streaming platform object caches, the hit ratio of the review page cache and the share of coalesced reads, of the serving process. Only accessible to admin users."
+)
+class ObjectCacheStatsAPIView(APIView):
+    """
+    Reporting the object cache counters of the worker process that serves the request.
+    """
+
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        """
+        Retrieve the hit counters, hit ratio and local memory usage of every object cache.
+        """
+        return Response({
+            "media": media_cache.report(),
+            "streaming_platforms": platform_cache.report(),
+            "review_pages": review_page_cache.report(),
+            "coalescing": flights.report(),
+        }, status=status.HTTP_200_OK)
+
+
+@extend_schema(
+    parameters=[
+        OpenApiParameter("output", description="File format: arrow (an Arrow IPC stream, sent as it is read) or parquet", required=False, type=str),
+        OpenApiParameter("since", description="Only export reviews updated after this ISO 8601 time", required=False, type=str),
+    ],
+    responses={
+        (200, "application/vnd.apache.arrow.stream"): OpenApiTypes.BINARY,
+        (200, "application/vnd.apache.parquet"): OpenApiTypes.BINARY,
+    },
+    description="Export the streaming_platforms, media or reviews table as a columnar file. Only accessible to admin users."
+)
+class AnalyticsExportAPIView(APIView):
+    """
+    Exporting a table for analytics, read through a server-side cursor and encoded in compressed record batches.
+    Large or partitioned exports should use the export_analytics command instead.
+    """
+
+    permission_classes = [IsAdminUser]
+    content_types = {
+        "arrow": "application/vnd.apache.arrow.stream",
+        "parquet": "application/vnd.apache.parquet",
+    }
+
+    def get(self, request, table):
+        """
+        Stream the table as Arrow IPC record batches, or send it as a Parquet file once written.
+        """
+        if table not in export.TABLES:
+            return Response({"Error": f"Unknown table, choose one of {', '.join(export.TABLES)}"}, status=status.HTTP_404_NOT_FOUND)
+
+        output = request.query_params.get("output", "arrow")
+        if output not in self.content_types:
+            return Response({"Error": "output must be arrow or parquet"}, status=status.HTTP_400_BAD_REQUEST)
+
+        queryset = export.TABLES[table][0]()
+        if "since" in request.query_params:
+            try:
+                since = parse_datetime(request.query_params["since"])
+            except ValueError:
+                since = None
+            if since is None or table != "reviews":
+                return Response({"Error": "since must be an ISO 8601 time, and is only supported for reviews"}, status=status.HTTP_400_BAD_REQUEST)
+            queryset = queryset.filter(update__gt=since)
+
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            return Response({"Error": "Exports are not available, pyarrow is not installed"}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+
+        filename = f"{table}{export.EXTENSIONS[output]}"
+        if output == "arrow":
+            response = StreamingHttpResponse(export.stream_arrow(table, queryset), content_type=self.content_types[output])
+            response["Content-Disposition"] = f'attachment; filename="{filename}"'
+            return response
+
+        export_file = tempfile.TemporaryFile()
+        export.write(export_file, table, export.record_batches(table, queryset, batch_size=10_000))
+        export_file.seek(0)
+        return FileResponse(export_file, as_attachment=True, filename=filename, content_type=self.content_types[output])
+
+
+
+@extend_schema(
+    parameters=[
+        OpenApiParameter("since", description="Sequence number of the last change already processed, 0 to read the whole log", required=False, type=int),
+        OpenApiParameter("size", description="Maximum number of changes to return", required=False, type=int),
+    ],
+    responses=dict,
+    description=(
+        "List the changes of streaming platforms, media and reviews after a sequence number, oldest first, with the current "
+        "data of every changed object. Pass the returned next sequence number as since to read the following page. "
+        "Only accessible to admin users."
+    )
+)
+class ChangeFeedAPIView(APIView):
+    """
+    Reading the change log, so downstream services sync the catalog in proportion to what changed since their last read.
+    """
+
+    permission_classes = [IsAdminUser]
+    tables = {
+        "streaming_platforms": (StreamingPlatformSummarySerializer, StreamingPlatform.objects.all()),
+        "media": (MediaSerializer, Media.all_objects.all()),
+        "reviews": (ReviewSerializer, Review.all_objects.all()),
+    }
+
+    def get(self, request):
+        """
+        Retrieve a page of changes after the "since" sequence number, keeping the latest change of each object in the page.
+        Changed objects are loaded with one query per table. Upserted objects deleted since have no data, their deletion follows.
+        """
+        page_size = getattr(settings, "CHANGE_LOG", {}).get("PAGE_SIZE", 500)
+        try:
+            since = int(request.query_params.get("since", 0))
+            size = min(int(request.query_params.get("size", page_size)), page_size)
+        except ValueError:
+            since = size = -1
+        if since < 0 or size < 1:
+            return Response({"Error": "since must be a sequence number and size a positive number"}, status=status.HTTP_400_BAD_REQUEST)
+
+        page = list(changes.visible_changes(since)[:size + 1])
+        has_more = len(page) > size
+        page = page[:size]
+
+        latest = {(change.table, change.object_id): change for change in page}
+        upserted = defaultdict(set)
+        for change in latest.values():
+            if change.operation == Change.UPSERT:
+                upserted[change.table].add(change.object_id)
+
+        data = {}
+        for table, object_ids in upserted.items():
+            serializer_class, queryset = self.tables[table]
+            for object_id, instance in queryset.in_bulk(object_ids).items():
+                data[table, object_id] = serializer_class(instance).data
+
+        return Response({
+            "changes": [
+                {
+                    "seq": change.id,
+                    "table": change.table,
+                    "id": change.object_id,
+                    "operation": change.operation,
+                    "data": data.get((change.table, change.object_id)),
+                }
+                for change in sorted(latest.values(), key=lambda change: change.id)
+            ],
+            "next": page[-1].id if page else since,
+            "has_more": has_more,
+        }, status=status.HTTP_200_OK)
+
+REVIEW_STREAM_KEEPALIVE_SECONDS = 15
+REVIEW_STREAM_RETRY_MILLISECONDS = 5000
+
+
+def format_event(event):
+    """
+    Format an event as a Server-Sent Events message.
+    """
+    lines = []
+    if "id" in event:
+        lines.append(f"id: {event['id']}")
+    lines.append(f"event: {event['type']}")
+    lines.append(f"data: {json.dumps(event['data'])}")
+    return "\n".join(lines) + "\n\n"
+
+
+async def review_events(media_id):
+    """
+    Yield the review and rating events of a media as they are published, with a comment as keepalive while idle.
+    """
+    subscription = events.subscribe(media_id)
+    try:
+        yield f"retry: {REVIEW_STREAM_RETRY_MILLISECONDS}\n\n"
+        while True:
+            try:
+                event = await asyncio.wait_for(subscription.queue.get(), REVIEW_STREAM_KEEPALIVE_SECONDS)
+            except asyncio.TimeoutError:
+                yield ": keepalive\n\n"
+            else:
+                yield format_event(event)
+    finally:
+        events.broker.unsubscribe(subscription)
+
+
+def media_exists(pk):
+    """
+    Return whether an active media exists, through the object cache, and close the database connection of the thread.
+    """
+    try:
+        return media_cache.get(pk) is not None
+    finally:
+        connection.close()
+
+
+@require_GET
+async def review_stream(request, pk):
+    """
+    Stream new, updated and deleted reviews and rating changes of a media as Server-Sent Events.
+    Connections are held open on the event loop, so this needs the ASGI application. The media is looked up on a shared
+    executor thread rather than the thread of the request, so an open stream holds neither a thread nor a database connection.
+    """
+    if not await sync_to_async(media_exists, thread_sensitive=False)(pk):
+        return JsonResponse({"Error": "Media not found"}, status=404)
+
+    response = StreamingHttpResponse(review_events(pk), content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"
+    return response
@@ -0,0 +1,57 @@
+"""
+Moving inactive and old reviews out of the hot review table into the review archive.
+"""
+
+from django.db import connection, transaction
+
+from media_app.models import ArchivedReview, Review
+
+
+def ensure_archive_partitions(years):
+    """
+    Create the yearly partitions of the review archive that do not exist yet.
+    Only PostgreSQL partitions the archive, other databases store it in a single table.
+    """
+    if connection.vendor != "postgresql":
+        return
+
+    table = ArchivedReview._meta.db_table
+    with connection.cursor() as cursor:
+        for year in sorted(years):
+            cursor.execute(
+                f'CREATE TABLE IF NOT EXISTS "{table}_{year:d}" PARTITION OF "{table}" '
+                f"FOR VALUES FROM ('{year:d}-01-01') TO ('{year + 1:d}-01-01')"
+            )
+
+
+def archive_reviews(queryset, batch_size=1000):
+    """
+    Move the reviews matching the queryset to the archive in batches, one transaction per batch.
+    Returns the number of reviews archived.
+    """
+    archived = 0
+
+    while True:
+        with transaction.atomic():
+            batch = list(queryset.select_for_update(skip_locked=True).order_by("pk")[:batch_size])
+            if not batch:
+                return archived
+
+            ensure_archive_partitions({review.created.year for review in batch})
+            ArchivedReview.objects.bulk_create([
+                ArchivedReview(
+                    id=review.id,
+                    reviewer_id=review.reviewer_id,
+                    reviewer_username=review.reviewer_username,
+                    rating=review.rating,
+                    description=review.description,
+                    media_id=review.media_id,
+                    active=review.active,
+                    created=review.created,
+                    update=review.update,
+                )
+                for review in batch
+            ])
+            Review.all_objects.filter(pk__in=[review.pk for review in batch]).delete()
+
+        archived += len(batch)
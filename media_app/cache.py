@@ -0,0 +1,302 @@
+"""
+Read-through caching of hot model instances, and of query results grouped by a versioned scope.
+
+Lookups go through a bounded per-process LRU, then the shared Django cache, then the database.
+Shared entries are stamped with the version of their object and the generation of their model, and a
+save bumps the version once it commits, so an entry written by a reader that raced with the save is
+never served afterwards. Local entries are trusted for LOCAL_TIMEOUT seconds: saves in the same
+process drop them at once, saves in other processes are seen once they expire.
+
+Query results, such as pages of reviews, are cached in the shared cache under the version of their scope,
+and a write bumps that version once it commits, outdating every result of the scope in O(1).
+"""
+
+import hashlib
+import pickle
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache as shared_cache
+from django.db import transaction
+
+from media_app.models import Media, StreamingPlatform
+
+LOCAL = "local"
+SHARED = "shared"
+MISS = "miss"
+
+
+class ObjectCache:
+    """
+    Two-tier read-through cache of the instances of one model, keyed by primary key.
+    Instances are kept pickled, so every caller gets its own copy and memory usage is known exactly.
+    """
+
+    def __init__(self, queryset, enabled=True, max_entries=2000, local_timeout=5, timeout=300):
+        self.queryset = queryset
+        self.prefix = f"objects:{queryset.model._meta.label_lower}"
+        self.enabled = enabled
+        self.max_entries = max_entries
+        self.local_timeout = local_timeout
+        self.timeout = timeout
+        self.local = OrderedDict()
+        self.local_bytes = 0
+        self.lock = threading.Lock()
+        self.stats = dict.fromkeys((LOCAL, SHARED, MISS, "invalidations"), 0)
+
+    def _key(self, pk):
+        return f"{self.prefix}:{pk}"
+
+    def _version_key(self, pk):
+        return f"{self.prefix}:{pk}:version"
+
+    def _generation_key(self):
+        return f"{self.prefix}:generation"
+
+    def _get_local(self, pk, now):
+        entry = self.local.get(pk)
+        if entry is None:
+            return None
+        if entry[0] < now:
+            self._drop_local(pk)
+            return None
+        self.local.move_to_end(pk)
+        return entry[1]
+
+    def _set_local(self, pk, data, now):
+        self._drop_local(pk)
+        self.local[pk] = (now + self.local_timeout, data)
+        self.local_bytes += len(data)
+        while len(self.local) > self.max_entries:
+            _, (_, evicted) = self.local.popitem(last=False)
+            self.local_bytes -= len(evicted)
+
+    def _drop_local(self, pk):
+        entry = self.local.pop(pk, None)
+        if entry is not None:
+            self.local_bytes -= len(entry[1])
+
+    def _count(self, source, hits=1):
+        with self.lock:
+            self.stats[source] += hits
+
+    def fetch(self, pks):
+        """
+        Return a dictionary of (pickled instance, tier that served it) for the given primary keys that exist.
+        Local misses are read from the shared cache with one round trip, and its misses from the database with one query.
+        """
+        found = {}
+        now = time.monotonic()
+        with self.lock:
+            for pk in pks:
+                data = self._get_local(pk, now)
+                if data is not None:
+                    found[pk] = (data, LOCAL)
+        self._count(LOCAL, len(found))
+
+        missing = [pk for pk in dict.fromkeys(pks) if pk not in found]
+        if not missing:
+            return found
+
+        generation_key = self._generation_key()
+        keys = [generation_key]
+        for pk in missing:
+            keys += [self._key(pk), self._version_key(pk)]
+        shared = shared_cache.get_many(keys)
+        generation = shared.get(generation_key, 0)
+
+        stamps, loaded = {}, {}
+        for pk in missing:
+            stamps[pk] = (generation, shared.get(self._version_key(pk), 0))
+            entry = shared.get(self._key(pk))
+            if entry is not None and entry[0] == stamps[pk]:
+                loaded[pk] = (entry[1], SHARED)
+        self._count(SHARED, len(loaded))
+        self._count(MISS, len(missing) - len(loaded))
+
+        unloaded = [pk for pk in missing if pk not in loaded]
+        if unloaded:
+            entries = {}
+            for pk, instance in self.queryset.in_bulk(unloaded).items():
+                data = pickle.dumps(instance, pickle.HIGHEST_PROTOCOL)
+                loaded[pk] = (data, MISS)
+                entries[self._key(pk)] = (stamps[pk], data)
+            shared_cache.set_many(entries, self.timeout)
+
+        with self.lock:
+            for pk, (data, _) in loaded.items():
+                self._set_local(pk, data, now)
+        found.update(loaded)
+        return found
+
+    def lookup(self, pk):
+        """
+        Return the instance with the primary key, or None if it does not exist, and the tier that served it.
+        """
+        if not self.enabled:
+            return self.queryset.filter(pk=pk).first(), MISS
+        data, source = self.fetch([pk]).get(pk, (None, MISS))
+        return (pickle.loads(data) if data is not None else None), source
+
+    def get(self, pk):
+        """
+        Return the instance with the primary key, or None if it does not exist.
+        """
+        return self.lookup(pk)[0]
+
+    def get_many(self, pks):
+        """
+        Return a dictionary of the instances with the given primary keys that exist.
+        """
+        if not self.enabled:
+            return self.queryset.in_bulk(pks)
+        return {pk: pickle.loads(data) for pk, (data, _) in self.fetch(pks).items()}
+
+    def invalidate(self, pk):
+        """
+        Drop the instance from this process and the shared cache now, and outdate its entries once the transaction commits.
+        """
+        def bump():
+            with self.lock:
+                self._drop_local(pk)
+            _increment(self._version_key(pk))
+
+        with self.lock:
+            self._drop_local(pk)
+            self.stats["invalidations"] += 1
+        shared_cache.delete(self._key(pk))
+        transaction.on_commit(bump)
+
+    def invalidate_all(self):
+        """
+        Outdate every cached instance of the model, for writes that bypass model signals such as queryset updates.
+        Other processes drop their local entries once they expire.
+        """
+        def bump():
+            self.clear_local()
+            _increment(self._generation_key())
+
+        self.clear_local()
+        with self.lock:
+            self.stats["invalidations"] += 1
+        transaction.on_commit(bump)
+
+    def clear_local(self):
+        """
+        Drop every entry of this process.
+        """
+        with self.lock:
+            self.local.clear()
+            self.local_bytes = 0
+
+    def report(self):
+        """
+        Return the hit counters, hit ratio and memory usage of the cache in this process.
+        """
+        with self.lock:
+            lookups = self.stats[LOCAL] + self.stats[SHARED] + self.stats[MISS]
+            return {
+                "enabled": self.enabled,
+                **self.stats,
+                "hit_ratio": (self.stats[LOCAL] + self.stats[SHARED]) / lookups if lookups else None,
+                "entries": len(self.local),
+                "max_entries": self.max_entries,
+                "bytes": self.local_bytes,
+            }
+
+
+class ResultCache:
+    """
+    Shared cache of computed results, such as pages of a list, grouped in scopes like the reviews of one media.
+    Keys contain the version of their scope, so bumping it outdates every result of the scope at once without
+    finding their keys. Outdated results are never read again and expire after `timeout` seconds.
+    """
+
+    def __init__(self, name, enabled=True, timeout=60):
+        self.prefix = f"results:{name}"
+        self.enabled = enabled
+        self.timeout = timeout
+        self.lock = threading.Lock()
+        self.stats = dict.fromkeys((SHARED, MISS, "invalidations"), 0)
+
+    def _version_key(self, scope):
+        return f"{self.prefix}:{scope}:version"
+
+    def _count(self, source):
+        with self.lock:
+            self.stats[source] += 1
+
+    def get_or_set(self, scope, params, compute):
+        """
+        Return the result for the parameters in the scope and the tier that served it, computing and caching it on a miss.
+        The version is read before computing, so a result computed while a write commits is kept under the old version.
+        """
+        if not self.enabled:
+            return compute(), MISS
+
+        version = shared_cache.get(self._version_key(scope), 0)
+        digest = hashlib.blake2b(repr(params).encode(), digest_size=16).hexdigest()
+        key = f"{self.prefix}:{scope}:{version}:{digest}"
+        result = shared_cache.get(key)
+        if result is not None:
+            self._count(SHARED)
+            return result, SHARED
+
+        result = compute()
+        shared_cache.set(key, result, self.timeout)
+        self._count(MISS)
+        return result, MISS
+
+    def invalidate(self, scope):
+        """
+        Outdate every result of the scope once the transaction commits.
+        """
+        self._count("invalidations")
+        transaction.on_commit(lambda: _increment(self._version_key(scope)))
+
+    def report(self):
+        """
+        Return the hit counters and hit ratio of the cache in this process.
+        """
+        with self.lock:
+            lookups = self.stats[SHARED] + self.stats[MISS]
+            return {
+                "enabled": self.enabled,
+                **self.stats,
+                "hit_ratio": self.stats[SHARED] / lookups if lookups else None,
+            }
+
+
+def _increment(key):
+    # Versions never expire. If the shared cache evicts one anyway, entries stamped with an
+    # older version can be served again, but only until they expire themselves after TIMEOUT.
+    try:
+        shared_cache.incr(key)
+    except ValueError:
+        if not shared_cache.add(key, 1, None):
+            shared_cache.incr(key)
+
+
+def _create(queryset):
+    options = getattr(settings, "OBJECT_CACHE", {})
+    return ObjectCache(
+        queryset,
+        enabled=options.get("ENABLED", True),
+        max_entries=options.get("LOCAL_MAX_ENTRIES", 2000),
+        local_timeout=options.get("LOCAL_TIMEOUT", 5),
+        timeout=options.get("TIMEOUT", 300),
+    )
+
+
+media_cache = _create(Media.objects.all())
+platform_cache = _create(StreamingPlatform.objects.all())
+
+
+def _create_result_cache(name):
+    options = getattr(settings, "RESULT_CACHE", {})
+    return ResultCache(name, enabled=options.get("ENABLED", True), timeout=options.get("TIMEOUT", 60))
+
+
+review_page_cache = _create_result_cache("review_pages")
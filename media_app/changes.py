@@ -0,0 +1,88 @@
+"""
+Append-only change log of streaming platforms, media and reviews, read by downstream services to sync incrementally.
+
+Every write records the table, id and operation of the object it changed in the transaction of the write, under a
+sequence number. Consumers read the log from the last sequence number they processed and re-read the changed objects.
+Compaction drops changes superseded by a later change of the same object and old deletions, so the log grows with the
+catalog instead of with its write history.
+"""
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Exists, Max, Min, OuterRef, Q
+from django.utils import timezone
+
+from media_app.models import Change, Media, Review, StreamingPlatform
+
+TABLES = {"streaming_platforms": StreamingPlatform, "media": Media, "reviews": Review}
+TABLE_NAMES = {model: table for table, model in TABLES.items()}
+
+
+def _settings():
+    return getattr(settings, "CHANGE_LOG", {})
+
+
+def record(model, ids, operation=Change.UPSERT):
+    """
+    Record a change of every object of the model with the given ids, in the current transaction.
+    Writes that bypass model signals, such as bulk and queryset updates, must call it themselves.
+    """
+    table = TABLE_NAMES[model]
+    Change.objects.bulk_create([Change(table=table, object_id=object_id, operation=operation) for object_id in ids], batch_size=1000)
+
+
+def oldest_open_write():
+    """
+    Return when the oldest open transaction that has written to the database started, or None without one.
+    Only PostgreSQL reports the transactions of other connections, other databases always return None.
+    """
+    if connection.vendor != "postgresql":
+        return None
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT min(xact_start) FROM pg_stat_activity "
+            "WHERE datname = current_database() AND backend_xid IS NOT NULL AND pid <> pg_backend_pid()"
+        )
+        return cursor.fetchone()[0]
+
+
+def visible_changes(since):
+    """
+    Return the changes after the sequence number `since`, in sequence order.
+    Sequence numbers are assigned when a change is written but become visible when its transaction commits, so
+    changes written after the oldest open write transaction started are left out until it ends: it may still commit a
+    lower sequence number. LAG seconds more are left out for the clock skew between servers and, on databases that do
+    not report open transactions, for the write transactions themselves.
+    """
+    horizon = timezone.now()
+    oldest = oldest_open_write()
+    if oldest is not None:
+        horizon = min(horizon, oldest)
+    horizon -= timedelta(seconds=_settings().get("LAG", 5))
+    return Change.objects.filter(id__gt=since, created__lte=horizon).order_by("id")
+
+
+def compact(retention=None, batch_size=10_000):
+    """
+    Delete the changes superseded by a later change of the same object, and deletions older than `retention`,
+    one range of batch_size sequence numbers at a time. Returns the number of changes deleted.
+
+    The latest change of every existing object is kept, so reading the log from 0 still lists the whole catalog.
+    Consumers that stop reading for longer than the retention can miss deletions and must resync from 0.
+    """
+    if retention is None:
+        retention = timedelta(days=_settings().get("RETENTION_DAYS", 7))
+
+    later = Change.objects.filter(table=OuterRef("table"), object_id=OuterRef("object_id"), id__gt=OuterRef("id"))
+    condition = Q(Exists(later)) | Q(operation=Change.DELETE, created__lt=timezone.now() - retention)
+    bounds = Change.objects.aggregate(first=Min("id"), last=Max("id"))
+
+    deleted = 0
+    if bounds["first"] is None:
+        return deleted
+    for start in range(bounds["first"] - 1, bounds["last"], batch_size):
+        deleted += Change.objects.filter(condition, id__gt=start, id__lte=start + batch_size).delete()[0]
+    return deleted
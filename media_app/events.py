@@ -0,0 +1,201 @@
+"""
+Publish/subscribe of review and rating changes per media.
+Subscribers are streaming connections living on an asyncio event loop, while publishers
+are request threads and signal handlers, so events are handed over with call_soon_threadsafe.
+With several worker processes, events are relayed between them through PostgreSQL LISTEN/NOTIFY.
+"""
+
+import asyncio
+import itertools
+import json
+import logging
+import threading
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import connection, transaction
+
+logger = logging.getLogger(__name__)
+
+RESYNC = {"type": "resync", "data": {}}
+
+
+class Subscription:
+    """
+    The bounded queue of pending events of one streaming connection.
+    A subscriber that falls behind loses its pending events and is told to resync instead.
+    """
+
+    def __init__(self, media_id, max_pending):
+        self.media_id = media_id
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize=max_pending)
+
+    def offer(self, event):
+        """
+        Queue an event, replacing the backlog with a resync event when the queue is full.
+        Must be called on the subscriber's event loop.
+        """
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(RESYNC)
+
+
+class EventBroker:
+    """
+    Fans events out to the subscriptions of a media without touching the database.
+    """
+
+    def __init__(self, max_pending=100):
+        self.max_pending = max_pending
+        self._subscriptions = defaultdict(set)
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+
+    def subscribe(self, media_id):
+        """
+        Create a subscription to the events of a media. Must be called on the subscriber's event loop.
+        """
+        subscription = Subscription(media_id, self.max_pending)
+        with self._lock:
+            self._subscriptions[media_id].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        """
+        Remove a subscription, dropping the media entry once it has no subscribers left.
+        """
+        with self._lock:
+            subscriptions = self._subscriptions.get(subscription.media_id)
+            if subscriptions is not None:
+                subscriptions.discard(subscription)
+                if not subscriptions:
+                    del self._subscriptions[subscription.media_id]
+
+    def has_subscribers(self, media_id):
+        """
+        Return whether anything in this process is subscribed to the media.
+        """
+        return media_id in self._subscriptions
+
+    def resync_all(self):
+        """
+        Tell every subscriber to resync, for when events may have been lost.
+        """
+        with self._lock:
+            subscriptions = [subscription for subscriptions in self._subscriptions.values() for subscription in subscriptions]
+        for subscription in subscriptions:
+            subscription.loop.call_soon_threadsafe(subscription.offer, RESYNC)
+
+    def publish(self, media_id, event_type, data):
+        """
+        Send an event to every subscriber of the media. Safe to call from any thread.
+        """
+        with self._lock:
+            subscriptions = list(self._subscriptions.get(media_id, ()))
+        if not subscriptions:
+            return
+
+        event = {"id": next(self._ids), "type": event_type, "data": data}
+        for subscription in subscriptions:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.offer, event)
+            except RuntimeError:
+                # The subscriber's event loop is closed, so the connection is gone.
+                self.unsubscribe(subscription)
+
+
+class PostgresEventRelay:
+    """
+    Relays events between worker processes through PostgreSQL LISTEN/NOTIFY.
+    Notifications are sent inside the writing transaction, so PostgreSQL only delivers them on commit.
+    """
+
+    channel = "media_events"
+
+    def __init__(self, broker):
+        self.broker = broker
+        self._tasks = {}
+
+    def notify(self, media_id, event_type, data):
+        """
+        Queue a notification for every listening worker in the current transaction.
+        """
+        payload = json.dumps({"media_id": media_id, "type": event_type, "data": data})
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT pg_notify(%s, %s)", [self.channel, payload])
+
+    def dispatch(self, payload):
+        """
+        Publish a received notification to the subscribers in this process.
+        """
+        message = json.loads(payload)
+        self.broker.publish(message["media_id"], message["type"], message["data"])
+
+    def ensure_listening(self):
+        """
+        Start listening on the running event loop unless a listener is already running there.
+        """
+        loop = asyncio.get_running_loop()
+        task = self._tasks.get(loop)
+        if task is None or task.done():
+            self._tasks[loop] = loop.create_task(self.listen())
+
+    async def listen(self):  # pragma: no cover - needs a PostgreSQL server
+        """
+        Hold one LISTEN connection per event loop and dispatch notifications, reconnecting on failure.
+        Subscribers are told to resync after a reconnect because notifications may have been missed.
+        """
+        import psycopg
+
+        database = settings.DATABASES["default"]
+        while True:
+            try:
+                async with await psycopg.AsyncConnection.connect(
+                    dbname=database["NAME"],
+                    user=database.get("USER"),
+                    password=database.get("PASSWORD"),
+                    host=database.get("HOST"),
+                    port=database.get("PORT"),
+                    autocommit=True,
+                ) as listener:
+                    await listener.execute(f"LISTEN {self.channel}")
+                    self.broker.resync_all()
+                    async for notification in listener.notifies():
+                        self.dispatch(notification.payload)
+            except psycopg.Error:
+                logger.exception("Lost the connection listening for media events, reconnecting.")
+                await asyncio.sleep(1)
+
+
+broker = EventBroker()
+relay = PostgresEventRelay(broker)
+
+
+def uses_postgres_relay():
+    """
+    Return whether events are relayed between workers through PostgreSQL instead of staying in-process.
+    """
+    return getattr(settings, "MEDIA_EVENTS_BACKEND", "local") == "postgresql"
+
+
+def publish(media_id, event_type, data):
+    """
+    Publish an event once the current transaction commits, to every worker or only this one depending on the backend.
+    """
+    if uses_postgres_relay():
+        relay.notify(media_id, event_type, data)
+    else:
+        transaction.on_commit(lambda: broker.publish(media_id, event_type, data))
+
+
+def subscribe(media_id):
+    """
+    Subscribe to the events of a media from the running event loop.
+    """
+    if uses_postgres_relay():
+        relay.ensure_listening()
+    return broker.subscribe(media_id)
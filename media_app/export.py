@@ -0,0 +1,203 @@
+"""
+Columnar exports of the catalog and its reviews for analytics, as Parquet or Arrow IPC files.
+
+PyArrow is only needed by the exports, so it is imported lazily and the web workers never load it.
+Rows are read through server-side cursors and converted to compressed record batches one batch at a
+time, so memory stays bounded by one batch per writer. Reviews are exported per streaming platform,
+optionally on several threads, and incremental exports only read reviews updated since the last run.
+"""
+
+import io
+import itertools
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from django.db import connections
+from django.utils import timezone
+
+from media_app.models import Media, Review, StreamingPlatform
+
+EXTENSIONS = {"parquet": ".parquet", "arrow": ".arrow"}
+
+# Compression codecs of each format. Arrow IPC files only support LZ4 and Zstandard.
+COMPRESSIONS = {"parquet": ["brotli", "gzip", "lz4", "none", "snappy", "zstd"], "arrow": ["lz4", "zstd"]}
+
+TABLES = {
+    "streaming_platforms": (
+        StreamingPlatform.objects.all,
+        [("id", "int64"), ("name", "string"), ("about", "string"), ("website", "string")],
+    ),
+    "media": (
+        Media.all_objects.all,
+        [
+            ("id", "int64"), ("title", "string"), ("storyline", "string"), ("streaming_platform_id", "int64"),
+            ("active", "bool"), ("avg_rating", "float64"), ("user_rating", "int64"), ("weighted_rating", "float64"),
+            ("created", "timestamp"),
+        ],
+    ),
+    "reviews": (
+        Review.all_objects.all,
+        [
+            ("id", "int64"), ("reviewer_id", "int64"), ("media_id", "int64"), ("rating", "int64"),
+            ("description", "string"), ("active", "bool"), ("created", "timestamp"), ("update", "timestamp"),
+        ],
+    ),
+}
+
+WATERMARK_FILE = "watermark.json"
+
+
+def arrow_schema(table):
+    """
+    Return the Arrow schema of an exported table.
+    """
+    import pyarrow as pa
+
+    types = {
+        "int64": pa.int64(),
+        "string": pa.string(),
+        "bool": pa.bool_(),
+        "float64": pa.float64(),
+        "timestamp": pa.timestamp("us", tz="UTC"),
+    }
+    return pa.schema([(name, types[column_type]) for name, column_type in TABLES[table][1]])
+
+
+def record_batches(table, queryset, batch_size):
+    """
+    Yield the rows of the queryset as Arrow record batches, reading them through a server-side cursor.
+    """
+    import pyarrow as pa
+
+    schema = arrow_schema(table)
+    rows = queryset.order_by("pk").values_list(*schema.names).iterator(chunk_size=batch_size)
+    while True:
+        chunk = list(itertools.islice(rows, batch_size))
+        if not chunk:
+            return
+        columns = [pa.array(values, type=field.type) for values, field in zip(zip(*chunk), schema)]
+        yield pa.RecordBatch.from_arrays(columns, schema=schema)
+
+
+def write(sink, table, batches, file_format="parquet", compression="zstd"):
+    """
+    Write record batches of a table to a path or file object as a Parquet or Arrow IPC file, returning the number of rows.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = arrow_schema(table)
+    if file_format == "parquet":
+        writer = pq.ParquetWriter(sink, schema, compression=compression)
+    else:
+        writer = pa.ipc.new_file(sink, schema, options=pa.ipc.IpcWriteOptions(compression=compression))
+
+    rows = 0
+    with writer:
+        for batch in batches:
+            writer.write_batch(batch)
+            rows += batch.num_rows
+    return rows
+
+
+def write_file(path, table, queryset, file_format="parquet", compression="zstd", batch_size=10_000):
+    """
+    Write the rows of the queryset to a file, returning the number of rows written.
+    The file is written to a hidden file next to its path, which dataset readers skip, and moved into place once
+    complete. Without rows, no file is created.
+    """
+    batches = record_batches(table, queryset, batch_size)
+    first = next(batches, None)
+    if first is None:
+        return 0
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    partial = os.path.join(os.path.dirname(path), f".{os.path.basename(path)}")
+    rows = write(partial, table, itertools.chain([first], batches), file_format, compression)
+    os.replace(partial, path)
+    return rows
+
+
+def stream_arrow(table, queryset, compression="zstd", batch_size=10_000):
+    """
+    Yield the rows of the queryset as chunks of an Arrow IPC stream, one chunk per record batch.
+    """
+    import pyarrow as pa
+
+    buffer = io.BytesIO()
+
+    def drain():
+        data = buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+        return data
+
+    writer = pa.ipc.new_stream(buffer, arrow_schema(table), options=pa.ipc.IpcWriteOptions(compression=compression))
+    for batch in record_batches(table, queryset, batch_size):
+        writer.write_batch(batch)
+        yield drain()
+    writer.close()
+    yield drain()
+
+
+def read_watermark(directory):
+    """
+    Return the time up to which reviews were exported to the directory, or None if they never were.
+    """
+    try:
+        with open(os.path.join(directory, WATERMARK_FILE)) as watermark_file:
+            return datetime.fromisoformat(json.load(watermark_file)["reviews"])
+    except FileNotFoundError:
+        return None
+
+
+def write_watermark(directory, watermark):
+    path = os.path.join(directory, WATERMARK_FILE)
+    with open(f"{path}.partial", "w") as watermark_file:
+        json.dump({"reviews": watermark.isoformat()}, watermark_file)
+    os.replace(f"{path}.partial", path)
+
+
+def export(directory, file_format="parquet", compression="zstd", batch_size=10_000, jobs=1, incremental=False, lag=timedelta(seconds=60)):
+    """
+    Export streaming platforms, media and reviews to the directory and return the number of rows per table.
+
+    Streaming platforms and media are exported in full. Reviews are written to one file per streaming platform,
+    in parallel when jobs > 1. An incremental export only reads reviews updated since the watermark of the last
+    export. The watermark trails the export by `lag`, so reviews saved by transactions still open when the export
+    starts are picked up by the next one.
+    """
+    os.makedirs(directory, exist_ok=True)
+    run = timezone.now()
+    watermark = run - lag
+    since = read_watermark(directory) if incremental else None
+    name = run.strftime("%Y%m%dT%H%M%S%f") + EXTENSIONS[file_format]
+    options = {"file_format": file_format, "compression": compression, "batch_size": batch_size}
+
+    counts = {}
+    for table in ("streaming_platforms", "media"):
+        counts[table] = write_file(os.path.join(directory, table, name), table, TABLES[table][0](), **options)
+
+    reviews = Review.all_objects.all()
+    if since is not None:
+        reviews = reviews.filter(update__gt=since, update__lte=watermark)
+
+    def export_platform(platform_id):
+        try:
+            path = os.path.join(directory, "reviews", f"platform={platform_id}", name)
+            return write_file(path, "reviews", reviews.filter(media__streaming_platform=platform_id), **options)
+        finally:
+            if jobs > 1:
+                connections.close_all()
+
+    platform_ids = list(StreamingPlatform.objects.order_by("pk").values_list("pk", flat=True))
+    if jobs > 1:
+        with ThreadPoolExecutor(max_workers=jobs) as executor:
+            counts["reviews"] = sum(executor.map(export_platform, platform_ids))
+    else:
+        counts["reviews"] = sum(map(export_platform, platform_ids))
+
+    write_watermark(directory, watermark)
+    return counts
@@ -0,0 +1,91 @@
+import json
+import statistics
+import sys
+from collections import defaultdict
+
+from django.core.management.base import BaseCommand, CommandError
+
+from cinebase.benchmark import percentile
+
+
+class Command(BaseCommand):
+    """
+    Summarize JSON access logs into request counts, latency percentiles and database cost per route.
+    """
+
+    help = (
+        "Summarize access log files written by the access log middleware into per-route request counts, latency "
+        "percentiles, queries per request and errors. Counts of sampled routes are scaled by their sample rate."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("files", nargs="+", help="Access log files, or - for standard input.")
+        parser.add_argument("--sort", choices=["requests", "p50", "p95", "p99", "total"], default="total", help="Order of the routes, total is the estimated time spent.")
+        parser.add_argument("--limit", type=int, default=20, help="Number of routes to print.")
+
+    def handle(self, *args, **options):
+        routes = defaultdict(lambda: {"requests": 0.0, "errors": 0, "latencies": [], "queries": [], "query_ms": []})
+        skipped = 0
+        for line in self.lines(options["files"]):
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                skipped += 1
+                continue
+            if entry.get("logger") != "cinebase.access":
+                continue
+
+            route = routes[entry["route"] or "(unresolved)"]
+            # Errors are always logged, sampled or not, so every one is counted.
+            route["errors"] += entry["status"] >= 500
+            # Percentiles only use sampled requests, so the slow requests logged regardless do not skew them.
+            if entry["sampled"]:
+                route["requests"] += 1 / entry["sample_rate"]
+                route["latencies"].append(entry["latency_ms"])
+                route["queries"].append(entry["queries"])
+                route["query_ms"].append(entry["query_ms"])
+
+        rows = []
+        for name, route in routes.items():
+            latencies = route["latencies"]
+            rows.append({
+                "route": name,
+                "requests": route["requests"],
+                "p50": percentile(latencies, 0.50),
+                "p95": percentile(latencies, 0.95),
+                "p99": percentile(latencies, 0.99),
+                "max": max(latencies, default=0.0),
+                "total": route["requests"] * statistics.fmean(latencies) / 1000 if latencies else 0.0,
+                "queries": statistics.fmean(route["queries"]) if latencies else 0.0,
+                "query_ms": statistics.fmean(route["query_ms"]) if latencies else 0.0,
+                "errors": route["errors"],
+            })
+        if not rows:
+            raise CommandError("No access log lines found.")
+
+        rows.sort(key=lambda row: row[options["sort"]], reverse=True)
+        self.stdout.write(
+            f"{'route':<32} {'requests':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'max ms':>9} "
+            f"{'total s':>9} {'queries':>8} {'query ms':>9} {'errors':>7}"
+        )
+        for row in rows[:options["limit"]]:
+            self.stdout.write(
+                f"{row['route']:<32} {row['requests']:9.0f} {row['p50']:9.1f} {row['p95']:9.1f} {row['p99']:9.1f} "
+                f"{row['max']:9.1f} {row['total']:9.1f} {row['queries']:8.1f} {row['query_ms']:9.1f} {row['errors']:7d}"
+            )
+        if skipped:
+            self.stdout.write(f"Skipped {skipped} lines that are not JSON.")
+
+    def lines(self, files):
+        """
+        Yield the lines of the log files, reading standard input for "-".
+        """
+        for path in files:
+            if path == "-":
+                yield from sys.stdin
+                continue
+            try:
+                with open(path) as log_file:
+                    yield from log_file
+            except OSError as error:
+                raise CommandError(f"Cannot read {path}: {error}")
@@ -0,0 +1,28 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+from django.utils import timezone
+
+from media_app.archive import archive_reviews
+from media_app.models import Review
+
+
+class Command(BaseCommand):
+    """
+    Move inactive and, optionally, old reviews into the review archive.
+    """
+
+    help = "Move inactive reviews, and reviews not updated for --older-than days, into the review archive."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--older-than", type=int, default=None, help="Also archive reviews not updated for this many days.")
+        parser.add_argument("--batch-size", type=int, default=1000, help="Reviews moved per transaction.")
+
+    def handle(self, *args, **options):
+        condition = Q(active=False)
+        if options["older_than"] is not None:
+            condition |= Q(update__lt=timezone.now() - timedelta(days=options["older_than"]))
+
+        archived = archive_reviews(Review.all_objects.filter(condition), batch_size=options["batch_size"])
+        self.stdout.write(f"Archived {archived} reviews.")
@@ -0,0 +1,80 @@
+import random
+import time
+
+from django.core.exceptions import MiddlewareNotUsed
+from django.core.management.base import BaseCommand, CommandError
+from django.http import HttpResponse
+from django.urls import Resolver404, resolve
+from rest_framework.test import APIRequestFactory
+
+from cinebase import admission
+from cinebase.benchmark import format_summary, run_concurrently
+
+
+class Command(BaseCommand):
+    """
+    Benchmark admission control of a route under a spike of anonymous reads mixed with writes, with a simulated view.
+    """
+
+    help = "Benchmark the latency and shed rate of anonymous reads and writes through admission control during a traffic spike."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--path", default="/api/media/", help="Path of the route to load.")
+        parser.add_argument("--requests", type=int, default=2000, help="Number of requests to send.")
+        parser.add_argument("--concurrency", type=int, default=32, help="Number of concurrent client threads.")
+        parser.add_argument("--write-share", type=float, default=0.1, help="Fraction of the requests that are writes.")
+        parser.add_argument("--service-ms", type=float, default=20, help="Time the simulated view takes per request.")
+        parser.add_argument("--seed", type=int, default=0, help="Seed of the random request mix.")
+
+    def handle(self, *args, **options):
+        try:
+            match = resolve(options["path"])
+        except Resolver404:
+            raise CommandError(f"No route matches {options['path']!r}.")
+
+        rng = random.Random(options["seed"])
+        factory = APIRequestFactory()
+        service_seconds = options["service_ms"] / 1000
+
+        def admit(request):
+            response = middleware.process_view(request, None, (), {})
+            if response is not None:
+                return response
+            time.sleep(service_seconds)
+            return HttpResponse()
+
+        try:
+            middleware = admission.AdmissionMiddleware(admit)
+        except MiddlewareNotUsed:
+            raise CommandError("Admission control is disabled, set ADMISSION_ENABLED=1.")
+
+        jobs = ["write" if rng.random() < options["write_share"] else "read" for _ in range(options["requests"])]
+        results = []
+
+        def send(kind):
+            request = factory.post(options["path"]) if kind == "write" else factory.get(options["path"])
+            request.resolver_match = match
+            started = time.perf_counter()
+            response = middleware(request)
+            results.append((kind, response.status_code, time.perf_counter() - started))
+
+        # Measure with a fresh controller, so its counters only describe this run.
+        controller, admission.controller = admission.controller, admission._create()
+        try:
+            run_concurrently(send, jobs, options["concurrency"])
+            report = admission.controller.pool(match.view_name).report()
+        finally:
+            admission.controller = controller
+
+        self.stdout.write(f"Pool {match.view_name}: limit {report['limit']}, anonymous reads limit {report['low_priority_limit']}")
+        for kind in ("read", "write"):
+            for label, admitted in (("admitted", True), ("shed", False)):
+                samples = [duration for result_kind, status_code, duration in results if result_kind == kind and (status_code != 503) == admitted]
+                if samples:
+                    self.stdout.write(format_summary(f"{kind} {label}", samples))
+        for priority in (admission.HIGH, admission.LOW):
+            stats = report[priority]
+            self.stdout.write(
+                f"{priority} priority: queued {stats['queued']}, rejected {stats['rejected']}, timed out {stats['timeouts']}, "
+                f"waited {stats['wait_seconds']:.2f}s"
+            )
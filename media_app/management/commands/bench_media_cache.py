@@ -0,0 +1,66 @@
+import random
+
+from django.core.management.base import BaseCommand
+from rest_framework.test import APIRequestFactory
+
+from cinebase.benchmark import format_summary, timed
+from media_app.api.views import MediaDetailAPIView
+from media_app.cache import media_cache, platform_cache
+from media_app.models import Media, StreamingPlatform
+
+
+class Command(BaseCommand):
+    """
+    Benchmark the media detail endpoint with the object cache disabled, served from the shared tier and from the local tier.
+    """
+
+    help = "Benchmark media detail latency without the object cache, from the shared cache and from the per-process LRU."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--media", type=int, default=2000, help="Number of benchmark media to create.")
+        parser.add_argument("--requests", type=int, default=5000, help="Number of detail requests per run.")
+        parser.add_argument("--include", default="", help="Related data to embed, such as histogram,platform.")
+        parser.add_argument("--seed", type=int, default=0, help="Seed of the random request stream.")
+
+    def handle(self, *args, **options):
+        rng = random.Random(options["seed"])
+        factory = APIRequestFactory()
+        detail = MediaDetailAPIView.as_view(throttle_classes=())
+        defaults = {"enabled": media_cache.enabled, "local_timeout": media_cache.local_timeout}
+        platform = StreamingPlatform.objects.create(name="bench_media_cache", about="Benchmark", website="https://example.com")
+
+        try:
+            media_ids = [
+                media_object.pk for media_object in Media.objects.bulk_create(
+                    Media(title=f"bench_media_cache {index}", storyline="Benchmark", streaming_platform=platform, user_rating=0)
+                    for index in range(options["media"])
+                )
+            ]
+            # Popular media get most of the requests, like real traffic.
+            requests = [media_ids[min(len(media_ids), int(rng.paretovariate(1.2))) - 1] for _ in range(options["requests"])]
+            query = {"include": options["include"]} if options["include"] else {}
+
+            def get(pk):
+                response = detail(factory.get(f"/media/{pk}/", query), pk=pk)
+                response.render()
+
+            runs = (
+                ("uncached", {"enabled": False}),
+                ("shared cache", {"enabled": True, "local_timeout": -1}),
+                ("local cache", {"enabled": True}),
+            )
+            for label, overrides in runs:
+                for object_cache in (media_cache, platform_cache):
+                    object_cache.clear_local()
+                    vars(object_cache).update(defaults, **overrides)
+                # Warm up the caches, so every run measures its own tier.
+                for pk in set(requests):
+                    get(pk)
+                self.stdout.write(format_summary(label, [timed(get, pk) for pk in requests]))
+
+            report = media_cache.report()
+            self.stdout.write(f"Local tier: {report['entries']} media in {report['bytes'] / 2 ** 10:.1f} KiB, hit ratio {report['hit_ratio']:.1%}")
+        finally:
+            for object_cache in (media_cache, platform_cache):
+                vars(object_cache).update(defaults)
+            platform.delete()
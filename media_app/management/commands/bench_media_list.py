@@ -0,0 +1,73 @@
+import random
+import string
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from rest_framework.renderers import JSONRenderer
+
+from cinebase.benchmark import format_summary, timed
+from media_app.api.serializers import (MEDIA_LIST_DEFERRED_FIELDS,
+                                       MediaListSerializer, MediaSerializer)
+from media_app.models import Media, StreamingPlatform
+
+
+class Command(BaseCommand):
+    """
+    Benchmark listing a large catalog in the full media representation and in the list representation deferring wide columns.
+    """
+
+    help = "Benchmark the bytes per row, database fetch time and serialization CPU of media listings, full and compact."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--media", type=int, default=10000, help="Number of benchmark media to create.")
+        parser.add_argument("--runs", type=int, default=20, help="Number of times each listing is fetched and serialized.")
+        parser.add_argument("--seed", type=int, default=0, help="Seed of the random storylines and ratings.")
+
+    def handle(self, *args, **options):
+        rng = random.Random(options["seed"])
+        platform = StreamingPlatform.objects.create(name="bench_media_list", about="Benchmark", website="https://example.com")
+        storyline_length = Media._meta.get_field("storyline").max_length
+
+        try:
+            Media.objects.bulk_create(
+                (
+                    Media(
+                        title=f"bench_media_list_{index}",
+                        storyline="".join(rng.choices(string.ascii_letters + " ", k=rng.randint(storyline_length // 2, storyline_length))),
+                        streaming_platform=platform,
+                        user_rating=rng.randint(1, 5),
+                    )
+                    for index in range(options["media"])
+                ),
+                batch_size=1000,
+            )
+            media = Media.objects.filter(streaming_platform=platform).order_by("id")
+
+            runs = (
+                ("full", MediaSerializer, media),
+                ("compact", MediaListSerializer, media.defer(*MEDIA_LIST_DEFERRED_FIELDS)),
+            )
+            for label, serializer_class, queryset in runs:
+                # Size of the column values the database sends, as the Python values they are read into.
+                sql, params = queryset.query.sql_with_params()
+                with connection.cursor() as cursor:
+                    cursor.execute(sql, params)
+                    rows = cursor.fetchall()
+                fetched_bytes = sum(len(str(value)) for row in rows for value in row)
+
+                fetch_samples, serialize_samples = [], []
+                for _ in range(options["runs"]):
+                    media_objects = []
+                    fetch_samples.append(timed(media_objects.extend, queryset.iterator(chunk_size=2000)))
+                    started = time.process_time()
+                    content = JSONRenderer().render(serializer_class(media_objects, many=True).data)
+                    serialize_samples.append(time.process_time() - started)
+
+                self.stdout.write(
+                    f"{label}: {len(content) / len(rows):.1f} response bytes/row, {fetched_bytes / len(rows):.1f} fetched bytes/row"
+                )
+                self.stdout.write(format_summary(f"{label} fetch", fetch_samples))
+                self.stdout.write(format_summary(f"{label} serialize cpu", serialize_samples))
+        finally:
+            platform.delete()
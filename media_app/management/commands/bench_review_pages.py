@@ -0,0 +1,69 @@
+import random
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework import serializers
+from rest_framework.renderers import JSONRenderer
+
+from cinebase.benchmark import format_summary, timed
+from media_app.api.serializers import ReviewSerializer
+from media_app.models import Media, Review, StreamingPlatform
+
+
+class UserReviewSerializer(ReviewSerializer):
+    """
+    Review serializer printing the username of the loaded reviewer, as review listings did before the username was copied on reviews.
+    """
+
+    reviewer = serializers.StringRelatedField(read_only=True)
+
+
+class Command(BaseCommand):
+    """
+    Benchmark rendering pages of reviews with the reviewer loaded per row, joined, and read from the review row.
+    """
+
+    help = "Benchmark review page rendering with reviewers loaded per row, joined with the users, or copied on the reviews."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--reviews", type=int, default=20000, help="Number of benchmark reviews to create.")
+        parser.add_argument("--reviewers", type=int, default=1000, help="Number of benchmark users writing them.")
+        parser.add_argument("--pages", type=int, default=1000, help="Number of pages rendered per run.")
+        parser.add_argument("--size", type=int, default=20, help="Number of reviews per page.")
+        parser.add_argument("--seed", type=int, default=0, help="Seed of the random page stream.")
+
+    def handle(self, *args, **options):
+        rng = random.Random(options["seed"])
+        platform = StreamingPlatform.objects.create(name="bench_review_pages", about="Benchmark", website="https://example.com")
+        users = User.objects.bulk_create(User(username=f"bench_review_pages_{index}") for index in range(options["reviewers"]))
+
+        try:
+            media_object = Media.objects.create(title="bench_review_pages", storyline="Benchmark", streaming_platform=platform, user_rating=0)
+            Review.objects.bulk_create(
+                (
+                    Review(reviewer=user, reviewer_username=user.username, rating=rng.randint(1, 5), description="Benchmark", media=media_object)
+                    for user in (rng.choice(users) for _ in range(options["reviews"]))
+                ),
+                batch_size=1000,
+            )
+            size = options["size"]
+            offsets = [rng.randrange(0, max(1, options["reviews"] - size)) for _ in range(options["pages"])]
+            reviews = Review.objects.filter(media=media_object).order_by("created", "id")
+
+            runs = (
+                ("reviewer per row", UserReviewSerializer, reviews),
+                ("reviewer joined", UserReviewSerializer, reviews.select_related("reviewer")),
+                ("username column", ReviewSerializer, reviews),
+            )
+            for label, serializer_class, queryset in runs:
+                def render(offset):
+                    JSONRenderer().render(serializer_class(queryset[offset:offset + size], many=True).data)
+
+                with CaptureQueriesContext(connection) as queries:
+                    render(0)
+                self.stdout.write(format_summary(label, [timed(render, offset) for offset in offsets]) + f" queries/page={len(queries)}")
+        finally:
+            User.objects.filter(pk__in=[user.pk for user in users]).delete()
+            platform.delete()
@@ -0,0 +1,64 @@
+import os
+import random
+import tempfile
+import time
+
+from django.core.management.base import BaseCommand
+
+from cinebase.benchmark import format_summary, timed
+from media_app.trending import TrendingEngine
+
+
+class Command(BaseCommand):
+    """
+    Benchmark the in-memory trending engine without touching the database.
+    """
+
+    help = "Benchmark the cost of recording a review and of top-k queries in the trending engine."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--media", type=int, default=1_000_000, help="Number of media with a score.")
+        parser.add_argument("--reviews", type=int, default=100_000, help="Number of reviews to record after seeding.")
+        parser.add_argument("--deletes", type=int, default=1_000, help="Number of reviews to delete after seeding.")
+        parser.add_argument("--queries", type=int, default=1_000, help="Number of top-k queries.")
+        parser.add_argument("--k", type=int, default=10, help="Number of media per query.")
+        parser.add_argument("--seed", type=int, default=0, help="Seed of the random review stream.")
+
+    def handle(self, *args, **options):
+        rng = random.Random(options["seed"])
+        media_count = options["media"]
+        engine = TrendingEngine(landmark=time.time() - 86400)
+        now = engine.landmark
+
+        def review_time():
+            return now + rng.random() * 86400
+
+        seeding = time.perf_counter()
+        for media_id in range(1, media_count + 1):
+            engine.record(media_id, rng.randint(1, 5), review_time())
+        seeding = time.perf_counter() - seeding
+        self.stdout.write(
+            f"Seeded {media_count} media in {seeding:.2f}s, "
+            f"scores take {engine.scores.buffer_info()[1] * engine.scores.itemsize / 2 ** 20:.1f} MiB"
+        )
+
+        # Popular media get most of the reviews, like real traffic.
+        reviews = [
+            (min(media_count, int(rng.paretovariate(1.2))), rng.randint(1, 5), review_time())
+            for _ in range(options["reviews"])
+        ]
+        self.stdout.write(format_summary("record review", [timed(engine.record, *review) for review in reviews]))
+
+        deletes = rng.sample(reviews, min(options["deletes"], len(reviews)))
+        self.stdout.write(format_summary("delete review", [timed(engine.discard, *review) for review in deletes]))
+
+        k = options["k"]
+        self.stdout.write(format_summary(f"top {k}", [timed(engine.top, k) for _ in range(options["queries"])]))
+        self.stdout.write(format_summary(
+            f"recently reviewed {k}", [timed(engine.recently_reviewed, k) for _ in range(options["queries"])]
+        ))
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "trending.snapshot")
+            self.stdout.write(format_summary("snapshot", [timed(engine.snapshot, path)]))
+            self.stdout.write(format_summary("load snapshot", [timed(TrendingEngine.load, path)]))
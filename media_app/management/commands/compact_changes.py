@@ -0,0 +1,25 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from media_app.changes import compact
+
+
+class Command(BaseCommand):
+    """
+    Compact the change log, keeping the latest change of every object.
+    """
+
+    help = (
+        "Delete changes superseded by a later change of the same object, and deletions older than "
+        "--retention-days, so the change log grows with the catalog instead of with its write history."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--retention-days", type=int, default=None, help="Days deletions are kept, CHANGE_LOG['RETENTION_DAYS'] by default.")
+        parser.add_argument("--batch-size", type=int, default=10_000, help="Sequence numbers compacted per DELETE.")
+
+    def handle(self, *args, **options):
+        retention = None if options["retention_days"] is None else timedelta(days=options["retention_days"])
+        deleted = compact(retention, batch_size=options["batch_size"])
+        self.stdout.write(f"Deleted {deleted} changes from the change log.")
@@ -0,0 +1,48 @@
+import os
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+
+from media_app.export import COMPRESSIONS, EXTENSIONS, export
+
+
+class Command(BaseCommand):
+    """
+    Export streaming platforms, media and reviews as columnar files for the data team.
+    """
+
+    help = (
+        "Export streaming platforms, media and reviews to Parquet or Arrow files, with reviews partitioned by "
+        "streaming platform. --incremental only exports reviews updated since the previous export to the directory."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("directory", help="Directory to write the files to.")
+        parser.add_argument("--format", dest="file_format", choices=sorted(EXTENSIONS), default="parquet", help="File format.")
+        parser.add_argument("--compression", default="zstd", help="Compression codec: zstd or lz4, and for Parquet also snappy, gzip, brotli or none.")
+        parser.add_argument("--batch-size", type=int, default=10_000, help="Rows per record batch.")
+        parser.add_argument("--jobs", type=int, default=os.cpu_count(), help="Streaming platforms exported in parallel.")
+        parser.add_argument("--incremental", action="store_true", help="Only export reviews updated since the previous export.")
+        parser.add_argument("--lag", type=int, default=60, help="Seconds the watermark trails the export, to wait for open transactions.")
+
+    def handle(self, *args, **options):
+        if options["compression"] not in COMPRESSIONS[options["file_format"]]:
+            codecs = ", ".join(COMPRESSIONS[options["file_format"]])
+            raise CommandError(f"{options['file_format']} files support the {codecs} compressions.")
+
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            raise CommandError("Exporting requires pyarrow, install it from requirements.txt.")
+
+        counts = export(
+            options["directory"],
+            file_format=options["file_format"],
+            compression=options["compression"],
+            batch_size=options["batch_size"],
+            jobs=options["jobs"],
+            incremental=options["incremental"],
+            lag=timedelta(seconds=options["lag"]),
+        )
+        summary = ", ".join(f"{rows} {table.replace('_', ' ')}" for table, rows in counts.items())
+        self.stdout.write(f"Exported {summary} to {options['directory']}.")
@@ -0,0 +1,64 @@
+import json
+import os
+import pstats
+import statistics
+
+from django.core.management.base import BaseCommand, CommandError
+
+from cinebase.profiling import METADATA_EXTENSION, CProfiler, profiling_settings
+
+
+class Command(BaseCommand):
+    """
+    Aggregate the saved request profiles into the functions that cost the most across requests.
+    """
+
+    help = (
+        "Merge the cProfile profiles saved by the profiling middleware, optionally only those of a view or path, "
+        "and print the top functions. Sampling profiles are listed, to open in speedscope."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--directory", default=None, help="Directory of the profiles, PROFILING['DIRECTORY'] by default.")
+        parser.add_argument("--view", default=None, help="Only aggregate profiles of this URL name, such as streaming_platform-list.")
+        parser.add_argument("--path", default=None, help="Only aggregate profiles of paths starting with this prefix.")
+        parser.add_argument("--sort", choices=["cumulative", "tottime", "ncalls"], default="cumulative", help="Order of the functions.")
+        parser.add_argument("--limit", type=int, default=25, help="Number of functions to print.")
+        parser.add_argument("--delete", action="store_true", help="Delete the aggregated profiles afterwards.")
+
+    def handle(self, *args, **options):
+        directory = str(options["directory"] or profiling_settings().get("DIRECTORY", ""))
+        profiles = []
+        for name in sorted(os.listdir(directory)) if os.path.isdir(directory) else []:
+            if not name.endswith(METADATA_EXTENSION):
+                continue
+            with open(os.path.join(directory, name)) as metadata_file:
+                metadata = json.load(metadata_file)
+            if options["view"] is not None and metadata["view"] != options["view"]:
+                continue
+            if options["path"] is not None and not metadata["path"].startswith(options["path"]):
+                continue
+            profiles.append(metadata)
+
+        if not profiles:
+            raise CommandError(f"No matching profiles in {directory}.")
+
+        durations = [metadata["duration_ms"] for metadata in profiles]
+        self.stdout.write(
+            f"{len(profiles)} profiled requests, {statistics.fmean(durations):.1f} ms mean, {max(durations):.1f} ms max."
+        )
+
+        sampled = [metadata["file"] for metadata in profiles if not metadata["file"].endswith(CProfiler.extension)]
+        if sampled:
+            self.stdout.write(f"Sampling profiles, open them in https://www.speedscope.app: {', '.join(sampled)}")
+
+        paths = [os.path.join(directory, metadata["file"]) for metadata in profiles if metadata["file"].endswith(CProfiler.extension)]
+        if paths:
+            stats = pstats.Stats(*paths, stream=self.stdout)
+            stats.strip_dirs().sort_stats(options["sort"]).print_stats(options["limit"])
+
+        if options["delete"]:
+            for metadata in profiles:
+                os.remove(os.path.join(directory, metadata["file"]))
+                os.remove(os.path.join(directory, metadata["id"] + METADATA_EXTENSION))
+            self.stdout.write(f"Deleted {len(profiles)} profiles.")
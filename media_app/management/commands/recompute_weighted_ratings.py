@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from media_app import changes
+from media_app.cache import media_cache
+from media_app.models import Media
+from media_app.ratings import prior, recompute_weighted_ratings
+
+
+class Command(BaseCommand):
+    """
+    Recompute the weighted rating of every media, after the prior changed.
+    """
+
+    help = "Recompute the weighted rating of every media from WEIGHTED_RATING with a single UPDATE."
+
+    def handle(self, *args, **options):
+        mean, weight = prior()
+        with transaction.atomic():
+            updated = recompute_weighted_ratings(Media.all_objects.all())
+            changes.record(Media, Media.all_objects.values_list("pk", flat=True).iterator())
+        media_cache.invalidate_all()
+        self.stdout.write(f"Recomputed the weighted rating of {updated} media with a prior of {mean} over {weight} reviews.")
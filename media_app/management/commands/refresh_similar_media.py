@@ -0,0 +1,39 @@
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from media_app.similarity import refresh
+
+
+class Command(BaseCommand):
+    """
+    Refresh the precomputed similar media of media whose reviews changed.
+    """
+
+    help = (
+        "Recompute the most similar media by cosine similarity of their ratings, for media with reviews "
+        "written since the last refresh. Deleted reviews are only accounted for by a --full refresh."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--neighbours", type=int, default=20, help="Similar media stored per media.")
+        parser.add_argument("--block-size", type=int, default=1000, help="Media whose similarities are computed at once.")
+        parser.add_argument("--jobs", type=int, default=os.cpu_count(), help="Worker processes computing blocks in parallel.")
+        parser.add_argument("--full", action="store_true", help="Recompute the similar media of every media.")
+
+    def handle(self, *args, **options):
+        try:
+            import numpy  # noqa: F401
+            import scipy  # noqa: F401
+        except ImportError:
+            raise CommandError("Refreshing similar media requires numpy and scipy, install them from requirements.txt.")
+
+        refreshed = refresh(
+            timezone.now(),
+            count=options["neighbours"],
+            block_size=options["block_size"],
+            jobs=options["jobs"],
+            full=options["full"],
+        )
+        self.stdout.write(f"Refreshed the similar media of {refreshed} media.")
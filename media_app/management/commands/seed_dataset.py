@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS
+
+from media_app.seed import seed
+
+
+class Command(BaseCommand):
+    """
+    Fill a database with the deterministic dataset used by the performance tests and benchmarks.
+    """
+
+    help = "Insert the seed dataset of users, streaming platforms, media and reviews, unless the database already has it."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, help="Number of users, SEED_DATASET['USERS'] by default.")
+        parser.add_argument("--platforms", type=int, help="Number of streaming platforms, SEED_DATASET['PLATFORMS'] by default.")
+        parser.add_argument("--media", type=int, help="Number of media, SEED_DATASET['MEDIA'] by default.")
+        parser.add_argument("--reviews-per-media", type=int, help="Number of reviews of every media, SEED_DATASET['REVIEWS_PER_MEDIA'] by default.")
+        parser.add_argument("--seed", type=int, help="Seed of the random dataset, SEED_DATASET['SEED'] by default.")
+        parser.add_argument("--database", default=DEFAULT_DB_ALIAS, help="Database to fill.")
+
+    def handle(self, *args, **options):
+        sizes = {
+            name: options[name]
+            for name in ("users", "platforms", "media", "reviews_per_media", "seed")
+            if options[name] is not None
+        }
+        if seed(using=options["database"], **sizes):
+            self.stdout.write("Inserted the seed dataset.")
+        else:
+            self.stdout.write("The database already has the seed dataset.")
@@ -0,0 +1,156 @@
+import json
+import os
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+BOOT_SCRIPT = """
+import json, sys, time
+
+start = time.perf_counter()
+import django
+from django.apps.config import AppConfig
+from django.conf import settings
+
+ready_times = {}
+create_app_config = AppConfig.create.__func__
+
+def create(cls, entry):
+    app_config = create_app_config(cls, entry)
+    ready = app_config.ready
+
+    def timed_ready():
+        ready_start = time.perf_counter()
+        ready()
+        ready_times[app_config.label] = (time.perf_counter() - ready_start) * 1000
+
+    app_config.ready = timed_ready
+    return app_config
+
+AppConfig.create = classmethod(create)
+
+phases = {}
+phase_start = time.perf_counter()
+settings.INSTALLED_APPS
+phases["settings"] = (time.perf_counter() - phase_start) * 1000
+
+phase_start = time.perf_counter()
+django.setup(set_prefix=False)
+phases["apps"] = (time.perf_counter() - phase_start) * 1000
+
+phase_start = time.perf_counter()
+from django.core.handlers.wsgi import WSGIHandler
+handler = WSGIHandler()
+phases["middleware"] = (time.perf_counter() - phase_start) * 1000
+
+phase_start = time.perf_counter()
+from django.urls import get_resolver
+get_resolver().url_patterns
+phases["urlconf"] = (time.perf_counter() - phase_start) * 1000
+
+boot = (time.perf_counter() - start) * 1000
+
+from django.test import Client
+client = Client(HTTP_HOST=sys.argv[2])
+requests = []
+for _ in range(2):
+    request_start = time.perf_counter()
+    status = client.get(sys.argv[1]).status_code
+    requests.append({"status": status, "ms": (time.perf_counter() - request_start) * 1000})
+
+print(json.dumps({"phases": phases, "ready": ready_times, "boot": boot, "requests": requests}))
+"""
+
+
+class ImportNode:
+    """
+    An imported module with its own and cumulative import time in microseconds.
+    """
+
+    def __init__(self, name, self_us, cumulative_us):
+        self.name = name
+        self.self_us = self_us
+        self.cumulative_us = cumulative_us
+        self.children = []
+
+
+def parse_import_times(stderr):
+    """
+    Build the import tree from the output of `python -X importtime`, which lists children before their parents.
+    """
+    pending = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        node = ImportNode(name.strip(), int(self_us), int(cumulative_us))
+        node.children = pending.pop(depth + 1, [])
+        pending.setdefault(depth, []).append(node)
+    return pending.get(0, [])
+
+
+class Command(BaseCommand):
+    """
+    Report worker boot time, import costs and first-request latency in a fresh interpreter.
+    """
+
+    help = "Measure worker boot time (import tree, app ready timings, URLconf) and first-request latency."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--path", default="/api/media/", help="Path requested to measure first-request latency.")
+        parser.add_argument("--host", default="localhost", help="Host header sent with the request.")
+        parser.add_argument("--min-ms", type=float, default=5.0, help="Hide imports cheaper than this.")
+        parser.add_argument("--depth", type=int, default=4, help="Deepest level of the import tree to show.")
+        parser.add_argument("--boot-target-ms", type=float, default=600.0, help="Fail if booting takes longer.")
+        parser.add_argument("--first-request-target-ms", type=float, default=150.0, help="Fail if the first request takes longer.")
+
+    def handle(self, *args, **options):
+        env = dict(os.environ, DJANGO_SETTINGS_MODULE=settings.SETTINGS_MODULE)
+        process = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", BOOT_SCRIPT, options["path"], options["host"]],
+            capture_output=True, text=True, env=env, cwd=settings.BASE_DIR,
+        )
+        if process.returncode != 0:
+            raise CommandError(f"Booting a fresh interpreter failed:\n{process.stderr[-2000:]}")
+
+        report = json.loads(process.stdout.strip().splitlines()[-1])
+
+        self.stdout.write("Import tree (cumulative ms):")
+        roots = sorted(parse_import_times(process.stderr), key=lambda node: node.cumulative_us, reverse=True)
+        for root in roots:
+            self.write_node(root, 0, options)
+
+        self.stdout.write("\nBoot phases (ms):")
+        for phase, duration in report["phases"].items():
+            self.stdout.write(f"  {phase:<24} {duration:9.1f}")
+
+        self.stdout.write("\nAppConfig.ready (ms):")
+        for label, duration in sorted(report["ready"].items(), key=lambda item: item[1], reverse=True):
+            self.stdout.write(f"  {label:<24} {duration:9.1f}")
+
+        first, warm = report["requests"]
+        self.stdout.write(f"\nBoot total:    {report['boot']:9.1f} ms (target {options['boot_target_ms']:.0f} ms)")
+        self.stdout.write(f"First request: {first['ms']:9.1f} ms (target {options['first_request_target_ms']:.0f} ms, status {first['status']})")
+        self.stdout.write(f"Warm request:  {warm['ms']:9.1f} ms")
+
+        failures = []
+        if report["boot"] > options["boot_target_ms"]:
+            failures.append("boot time")
+        if first["ms"] > options["first_request_target_ms"]:
+            failures.append("first-request latency")
+        if failures:
+            raise CommandError(f"Startup target missed: {', '.join(failures)}.")
+
+    def write_node(self, node, depth, options):
+        """
+        Write an import and its expensive children as an indented tree.
+        """
+        if node.cumulative_us < options["min_ms"] * 1000 or depth >= options["depth"]:
+            return
+
+        self.stdout.write(f"  {node.cumulative_us / 1000:9.1f} {'  ' * depth}{node.name}")
+        for child in sorted(node.children, key=lambda child: child.cumulative_us, reverse=True):
+            self.write_node(child, depth + 1, options)
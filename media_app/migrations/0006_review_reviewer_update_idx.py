@@ -0,0 +1,19 @@
+# Generated by Django 5.1 on 2026-10-19 16:39
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('media_app', '0005_media_user_rating_alter_media_avg_rating'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='review',
+            index=models.Index(fields=['reviewer', 'update', 'id'], name='review_reviewer_update_idx'),
+        ),
+    ]
@@ -0,0 +1,102 @@
+# Generated by Django 5.1 on 2026-10-19 16:50
+
+import django.db.models.deletion
+import django.db.models.manager
+from django.conf import settings
+from django.db import migrations, models
+
+
+# On PostgreSQL the archive is partitioned by range on "created". The primary key of a partitioned
+# table has to include the partition key, and partitions are created by the archive_reviews command.
+POSTGRESQL_REVIEW_ARCHIVE = [
+    '''
+    CREATE TABLE "media_app_review_archive" (
+        "id" bigint NOT NULL,
+        "rating" integer NOT NULL CHECK ("rating" >= 0),
+        "description" varchar(200) NOT NULL,
+        "active" boolean NOT NULL,
+        "created" timestamp with time zone NOT NULL,
+        "update" timestamp with time zone NOT NULL,
+        "archived" timestamp with time zone NOT NULL,
+        "media_id" bigint NOT NULL REFERENCES "media_app_media" ("id") DEFERRABLE INITIALLY DEFERRED,
+        "reviewer_id" integer NOT NULL REFERENCES "auth_user" ("id") DEFERRABLE INITIALLY DEFERRED,
+        PRIMARY KEY ("id", "created")
+    ) PARTITION BY RANGE ("created")
+    ''',
+    'CREATE INDEX "review_archive_media_idx" ON "media_app_review_archive" ("media_id", "created")',
+    'CREATE INDEX "review_archive_reviewer_idx" ON "media_app_review_archive" ("reviewer_id")',
+]
+
+
+def partition_review_archive(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        # Dropping the plain table through the schema editor also discards its deferred constraints and indexes.
+        schema_editor.delete_model(apps.get_model('media_app', 'ArchivedReview'))
+        for statement in POSTGRESQL_REVIEW_ARCHIVE:
+            schema_editor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('media_app', '0006_review_reviewer_update_idx'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='media',
+            options={'default_manager_name': 'all_objects'},
+        ),
+        migrations.AlterModelOptions(
+            name='review',
+            options={'default_manager_name': 'all_objects'},
+        ),
+        migrations.AlterModelManagers(
+            name='media',
+            managers=[
+                ('all_objects', django.db.models.manager.Manager()),
+            ],
+        ),
+        migrations.AlterModelManagers(
+            name='review',
+            managers=[
+                ('all_objects', django.db.models.manager.Manager()),
+            ],
+        ),
+        migrations.RemoveIndex(
+            model_name='review',
+            name='review_reviewer_update_idx',
+        ),
+        migrations.AddIndex(
+            model_name='media',
+            index=models.Index(condition=models.Q(('active', True)), fields=['streaming_platform'], name='media_active_platform_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='review',
+            index=models.Index(condition=models.Q(('active', True)), fields=['reviewer', 'update', 'id'], name='review_reviewer_update_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='review',
+            index=models.Index(condition=models.Q(('active', True)), fields=['media', 'created'], name='review_active_media_idx'),
+        ),
+        migrations.CreateModel(
+            name='ArchivedReview',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('rating', models.PositiveIntegerField()),
+                ('description', models.CharField(max_length=200)),
+                ('active', models.BooleanField()),
+                ('created', models.DateTimeField()),
+                ('update', models.DateTimeField()),
+                ('archived', models.DateTimeField(auto_now_add=True)),
+                ('media', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_reviews', to='media_app.media')),
+                ('reviewer', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'db_table': 'media_app_review_archive',
+                'indexes': [models.Index(fields=['media', 'created'], name='review_archive_media_idx')],
+            },
+        ),
+        migrations.RunPython(partition_review_archive, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.1 on 2026-10-19 17:09
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('media_app', '0007_review_archive_and_active_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SimilarMedia',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.FloatField()),
+                ('computed', models.DateTimeField()),
+                ('media', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='similar_media', to='media_app.media')),
+                ('similar', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='media_app.media')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['media', '-score'], name='similar_media_score_idx')],
+                'constraints': [models.UniqueConstraint(fields=('media', 'similar'), name='similar_media_unique')],
+            },
+        ),
+    ]
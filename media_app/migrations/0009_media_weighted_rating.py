@@ -0,0 +1,29 @@
+# Generated by Django 5.1 on 2026-10-19 17:15
+
+import media_app.ratings
+from django.db import migrations, models
+
+
+def backfill_weighted_ratings(apps, schema_editor):
+    Media = apps.get_model("media_app", "Media")
+    media_app.ratings.recompute_weighted_ratings(Media._base_manager.all())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('media_app', '0008_similar_media'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='media',
+            name='weighted_rating',
+            field=models.FloatField(default=media_app.ratings.prior_mean),
+        ),
+        migrations.RunPython(backfill_weighted_ratings, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='media',
+            index=models.Index(condition=models.Q(('active', True)), fields=['-weighted_rating', 'id'], name='media_active_weighted_idx'),
+        ),
+    ]
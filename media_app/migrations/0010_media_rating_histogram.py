@@ -0,0 +1,73 @@
+# Generated by Django 5.1 on 2026-10-19 17:20
+
+from django.db import migrations, models
+from django.db.models import Count, Q
+
+from media_app.ratings import RATING_COUNT_FIELDS, RATINGS, weighted_rating
+
+
+def backfill_rating_histograms(apps, schema_editor):
+    # Archived reviews still count towards the ratings of their media.
+    Media = apps.get_model("media_app", "Media")
+    histograms = {}
+    for model_name in ("Review", "ArchivedReview"):
+        model = apps.get_model("media_app", model_name)
+        counts = (
+            model._base_manager.filter(active=True)
+            .values("media_id")
+            .annotate(**{f"rating_{rating}_count": Count("id", filter=Q(rating=rating)) for rating in RATINGS})
+        )
+        for row in counts:
+            histogram = histograms.setdefault(row["media_id"], dict.fromkeys(RATING_COUNT_FIELDS, 0))
+            for field in RATING_COUNT_FIELDS:
+                histogram[field] += row[field]
+
+    batch = []
+    for media in Media._base_manager.only("id").iterator(chunk_size=1000):
+        histogram = histograms.get(media.id, dict.fromkeys(RATING_COUNT_FIELDS, 0))
+        for field, count in histogram.items():
+            setattr(media, field, count)
+        media.user_rating = sum(histogram.values())
+        media.avg_rating = sum(rating * histogram[f"rating_{rating}_count"] for rating in RATINGS) / media.user_rating if media.user_rating else 0
+        media.weighted_rating = weighted_rating(media.avg_rating, media.user_rating)
+        batch.append(media)
+        if len(batch) == 1000:
+            Media._base_manager.bulk_update(batch, RATING_COUNT_FIELDS + ["user_rating", "avg_rating", "weighted_rating"])
+            batch = []
+    Media._base_manager.bulk_update(batch, RATING_COUNT_FIELDS + ["user_rating", "avg_rating", "weighted_rating"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('media_app', '0009_media_weighted_rating'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='media',
+            name='rating_1_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='media',
+            name='rating_2_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='media',
+            name='rating_3_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='media',
+            name='rating_4_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='media',
+            name='rating_5_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_rating_histograms, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.1 on 2026-10-19 18:10
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def backfill_reviewer_usernames(apps, schema_editor):
+    User = apps.get_model("auth", "User")
+    username = Subquery(User.objects.filter(pk=OuterRef("reviewer_id")).values("username")[:1])
+    for model_name in ("Review", "ArchivedReview"):
+        apps.get_model("media_app", model_name)._base_manager.update(reviewer_username=username)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('media_app', '0012_change_log'),
+        ('auth', '0012_alter_user_first_name_max_length'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='review',
+            name='reviewer_username',
+            field=models.CharField(default='', editable=False, max_length=150),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='archivedreview',
+            name='reviewer_username',
+            field=models.CharField(default='', editable=False, max_length=150),
+            preserve_default=False,
+        ),
+        migrations.RunPython(backfill_reviewer_usernames, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='review',
+            index=models.Index(condition=models.Q(('active', True)), fields=['media', 'reviewer_username', 'created'], name='review_active_media_user_idx'),
+        ),
+    ]
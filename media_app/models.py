@@ -2,6 +2,13 @@ from django.contrib.auth.models import User
 from django.core.validators import MaxValueValidator, MinValueValidator
 from django.db import models
 
+from media_app.ratings import prior_mean, rating_percentiles
+
+
+class ActiveManager(models.Manager):
+    def get_queryset(self):
+        return super().get_queryset().filter(active=True)
+
 
 class StreamingPlatform(models.Model):
     name = models.CharField(max_length=30)
@@ -18,13 +25,39 @@ class Media(models.Model):
     active = models.BooleanField(default=True)
     avg_rating = models.FloatField(null=True, default=0)
     user_rating = models.IntegerField(validators=[MinValueValidator(1), MaxValueValidator(5)])
+    weighted_rating = models.FloatField(default=prior_mean)
+    rating_1_count = models.PositiveIntegerField(default=0)
+    rating_2_count = models.PositiveIntegerField(default=0)
+    rating_3_count = models.PositiveIntegerField(default=0)
+    rating_4_count = models.PositiveIntegerField(default=0)
+    rating_5_count = models.PositiveIntegerField(default=0)
     created = models.DateTimeField(auto_now_add=True)
 
+    objects = ActiveManager()
+    all_objects = models.Manager()
+
+    class Meta:
+        default_manager_name = "all_objects"
+        indexes = [
+            models.Index(fields=["streaming_platform"], condition=models.Q(active=True), name="media_active_platform_idx"),
+            models.Index(fields=["-weighted_rating", "id"], condition=models.Q(active=True), name="media_active_weighted_idx"),
+        ]
+
     def __str__(self):
         return self.title
 
+    @property
+    def rating_histogram(self):
+        return {str(rating): getattr(self, f"rating_{rating}_count") for rating in range(1, 6)}
+
+    @property
+    def rating_percentiles(self):
+        return rating_percentiles(self.rating_histogram)
+
 class Review(models.Model):
     reviewer = models.ForeignKey(User, on_delete=models.CASCADE)
+    # Copy of the reviewer's username, so review listings never load or join the user.
+    reviewer_username = models.CharField(max_length=150, editable=False)
     rating = models.PositiveIntegerField(validators=[MinValueValidator(1), MaxValueValidator(5)])
     description = models.CharField(max_length=200)
     media = models.ForeignKey(Media, on_delete=models.CASCADE, related_name="reviews")
@@ -32,5 +65,78 @@ class Review(models.Model):
     created = models.DateTimeField(auto_now_add=True)
     update = models.DateTimeField(auto_now=True)
 
+    objects = ActiveManager()
+    all_objects = models.Manager()
+
+    class Meta:
+        default_manager_name = "all_objects"
+        indexes = [
+            models.Index(fields=["reviewer", "update", "id"], condition=models.Q(active=True), name="review_reviewer_update_idx"),
+            models.Index(fields=["media", "created"], condition=models.Q(active=True), name="review_active_media_idx"),
+            models.Index(fields=["media", "reviewer_username", "created"], condition=models.Q(active=True), name="review_active_media_user_idx"),
+            models.Index(fields=["update"], name="review_update_idx"),
+        ]
+
+    def save(self, *args, **kwargs):
+        if not self.reviewer_username:
+            self.reviewer_username = self.reviewer.username
+        super().save(*args, **kwargs)
+
+    def __str__(self):
+        return str(self.rating) + " | " + self.media.title
+
+class ArchivedReview(models.Model):
+    id = models.BigIntegerField(primary_key=True)
+    reviewer = models.ForeignKey(User, on_delete=models.CASCADE, related_name="+")
+    reviewer_username = models.CharField(max_length=150, editable=False)
+    rating = models.PositiveIntegerField()
+    description = models.CharField(max_length=200)
+    media = models.ForeignKey(Media, on_delete=models.CASCADE, related_name="archived_reviews")
+    active = models.BooleanField()
+    created = models.DateTimeField()
+    update = models.DateTimeField()
+    archived = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = "media_app_review_archive"
+        indexes = [
+            models.Index(fields=["media", "created"], name="review_archive_media_idx"),
+        ]
+
+    def __str__(self):
+        return str(self.rating) + " | " + self.media.title
+
+class SimilarMedia(models.Model):
+    media = models.ForeignKey(Media, on_delete=models.CASCADE, related_name="similar_media")
+    similar = models.ForeignKey(Media, on_delete=models.CASCADE, related_name="+")
+    score = models.FloatField()
+    computed = models.DateTimeField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["media", "similar"], name="similar_media_unique"),
+        ]
+        indexes = [
+            models.Index(fields=["media", "-score"], name="similar_media_score_idx"),
+        ]
+
+    def __str__(self):
+        return self.media.title + " | " + self.similar.title
+
+class Change(models.Model):
+    UPSERT = "upsert"
+    DELETE = "delete"
+
+    table = models.CharField(max_length=20)
+    object_id = models.BigIntegerField()
+    operation = models.CharField(max_length=6, choices=[(UPSERT, "Upsert"), (DELETE, "Delete")])
+    created = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = "media_app_change_log"
+        indexes = [
+            models.Index(fields=["table", "object_id", "id"], name="change_log_object_idx"),
+        ]
+
     def __str__(self):
-        return str(self.rating) + " | " + self.media.title
\ No newline at end of file
+        return f"{self.id} | {self.operation} {self.table} {self.object_id}"
@@ -0,0 +1,95 @@
+"""
+Weighted (Bayesian average) ratings of media.
+
+A media with few reviews is pulled towards a global prior, as if it had PRIOR_WEIGHT extra reviews
+rating it PRIOR_MEAN, so a single 5-star review no longer outranks thousands of 4.8-star ones.
+"""
+
+import math
+from bisect import bisect_left
+from itertools import accumulate
+
+from django.conf import settings
+from django.db.models import ExpressionWrapper, F, FloatField, Value
+from django.db.models.functions import Coalesce
+
+
+def prior():
+    """
+    Return the configured prior mean rating and its weight in number of reviews.
+    """
+    options = getattr(settings, "WEIGHTED_RATING", {})
+    return float(options.get("PRIOR_MEAN", 3.0)), float(options.get("PRIOR_WEIGHT", 10))
+
+
+def prior_mean():
+    """
+    Return the weighted rating of a media without reviews.
+    """
+    return prior()[0]
+
+
+def weighted_rating(avg_rating, count):
+    """
+    Return the weighted rating of a media from its mean rating and number of ratings.
+    """
+    mean, weight = prior()
+    return (weight * mean + (avg_rating or 0) * count) / (weight + count)
+
+
+def weighted_rating_expression():
+    """
+    Return a database expression computing the weighted rating of every media row.
+    """
+    mean, weight = prior()
+    return ExpressionWrapper(
+        (Value(weight * mean) + Coalesce(F("avg_rating"), Value(0.0)) * F("user_rating")) / (Value(weight) + F("user_rating")),
+        output_field=FloatField(),
+    )
+
+
+def recompute_weighted_ratings(queryset):
+    """
+    Recompute the weighted rating of every media in the queryset with a single UPDATE, returning the number of media.
+    """
+    return queryset.update(weighted_rating=weighted_rating_expression())
+
+
+RATINGS = range(1, 6)
+
+RATING_COUNT_FIELDS = [f"rating_{rating}_count" for rating in RATINGS]
+
+PERCENTILES = {"p25": 0.25, "p50": 0.50, "p75": 0.75, "p90": 0.90}
+
+
+def rating_percentiles(histogram):
+    """
+    Return the nearest-rank percentiles of the ratings counted in a histogram, None without ratings.
+    """
+    total = sum(histogram.values())
+    if not total:
+        return dict.fromkeys(PERCENTILES)
+
+    cumulative = list(accumulate(histogram[str(rating)] for rating in RATINGS))
+    return {
+        name: RATINGS[bisect_left(cumulative, max(1, math.ceil(total * fraction)))]
+        for name, fraction in PERCENTILES.items()
+    }
+
+
+def apply_rating_change(media, added=None, removed=None):
+    """
+    Move ratings in and out of the histogram of a locked media and recompute its aggregates from the histogram.
+    """
+    if removed is not None:
+        field = f"rating_{removed}_count"
+        setattr(media, field, max(0, getattr(media, field) - 1))
+    if added is not None:
+        field = f"rating_{added}_count"
+        setattr(media, field, getattr(media, field) + 1)
+
+    counts = [getattr(media, field) for field in RATING_COUNT_FIELDS]
+    media.user_rating = sum(counts)
+    media.avg_rating = sum(rating * count for rating, count in zip(RATINGS, counts)) / media.user_rating if media.user_rating else 0
+    media.weighted_rating = weighted_rating(media.avg_rating, media.user_rating)
+    media.save(update_fields=RATING_COUNT_FIELDS + ["user_rating", "avg_rating", "weighted_rating"])
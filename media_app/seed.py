@@ -0,0 +1,85 @@
+"""
+Deterministic dataset of users, streaming platforms, media and reviews, large enough to measure query performance.
+
+Rows are written with bulk inserts, so model signals do not run: nothing is recorded in the change log, published or
+cached. The rating fields of every media are derived from its reviews as the review endpoints maintain them.
+"""
+
+import random
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.db import DEFAULT_DB_ALIAS, transaction
+
+from media_app.models import Media, Review, StreamingPlatform
+from media_app.ratings import RATINGS, weighted_rating
+
+PREFIX = "seed_"
+
+
+def dataset_settings():
+    """
+    Return the size and random seed of the dataset, from SEED_DATASET in the settings.
+    """
+    options = {"users": 1000, "platforms": 10, "media": 5000, "reviews_per_media": 20, "seed": 0}
+    options.update((key.lower(), value) for key, value in getattr(settings, "SEED_DATASET", {}).items())
+    return options
+
+
+def is_seeded(using=DEFAULT_DB_ALIAS):
+    return StreamingPlatform.objects.using(using).filter(name__startswith=PREFIX).exists()
+
+
+def seed(using=DEFAULT_DB_ALIAS, **options):
+    """
+    Insert the dataset into the database, unless it already has it, and return whether it was inserted.
+    Options override the sizes of dataset_settings(). Every media gets reviews_per_media reviews from distinct users.
+    """
+    if is_seeded(using):
+        return False
+
+    options = {**dataset_settings(), **options}
+    rng = random.Random(options["seed"])
+    batch_size = 2000
+
+    with transaction.atomic(using=using):
+        # Seed users cannot log in, so creating them hashes no password.
+        users = User.objects.using(using).bulk_create(
+            (User(username=f"{PREFIX}{index}", password=make_password(None)) for index in range(options["users"])),
+            batch_size=batch_size,
+        )
+        platforms = StreamingPlatform.objects.using(using).bulk_create(
+            StreamingPlatform(name=f"{PREFIX}{index}", about="Seed dataset", website=f"https://seed-{index}.example.com")
+            for index in range(options["platforms"])
+        )
+
+        ratings = [
+            [rng.choice(RATINGS) for _ in range(min(options["reviews_per_media"], len(users)))]
+            for _ in range(options["media"])
+        ]
+        media_objects = []
+        for index, media_ratings in enumerate(ratings):
+            media_object = Media(
+                title=f"{PREFIX}{index}",
+                storyline="Seed dataset",
+                streaming_platform=rng.choice(platforms),
+                active=rng.random() < 0.95,
+                user_rating=len(media_ratings),
+                avg_rating=sum(media_ratings) / len(media_ratings) if media_ratings else 0,
+            )
+            for rating in RATINGS:
+                setattr(media_object, f"rating_{rating}_count", media_ratings.count(rating))
+            media_object.weighted_rating = weighted_rating(media_object.avg_rating, media_object.user_rating)
+            media_objects.append(media_object)
+        media_objects = Media.objects.using(using).bulk_create(media_objects, batch_size=batch_size)
+
+        Review.objects.using(using).bulk_create(
+            (
+                Review(reviewer=reviewer, reviewer_username=reviewer.username, rating=rating, description="Seed dataset", media=media_object)
+                for media_object, media_ratings in zip(media_objects, ratings)
+                for reviewer, rating in zip(rng.sample(users, len(media_ratings)), media_ratings)
+            ),
+            batch_size=batch_size,
+        )
+    return True
@@ -0,0 +1,130 @@
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from media_app import changes, events, trending
+from media_app.cache import media_cache, platform_cache, review_page_cache
+from media_app.api.serializers import ReviewSerializer
+from media_app.models import (ArchivedReview, Change, Media, Review,
+                              StreamingPlatform)
+
+
+def has_listeners(media_id):
+    """
+    Return whether an event for the media could reach a subscriber, so unwatched writes skip the serialization.
+    """
+    return events.uses_postgres_relay() or events.broker.has_subscribers(media_id)
+
+
+@receiver(post_save, sender=Review)
+def publish_review_saved(sender, instance=None, created=False, **kwargs):
+    """
+    Signal to stream a created or updated review to the subscribers of its media.
+    """
+    if has_listeners(instance.media_id):
+        event_type = "review.created" if created else "review.updated"
+        events.publish(instance.media_id, event_type, ReviewSerializer(instance).data)
+
+
+@receiver(post_delete, sender=Review)
+def publish_review_deleted(sender, instance=None, **kwargs):
+    """
+    Signal to stream the id of a deleted review to the subscribers of its media.
+    """
+    if has_listeners(instance.media_id):
+        events.publish(instance.media_id, "review.deleted", {"id": instance.id})
+
+
+@receiver(post_save, sender=Review)
+def count_review_trending(sender, instance=None, created=False, **kwargs):
+    """
+    Signal to count a new review towards the trending media once it is committed.
+    """
+    if created:
+        transaction.on_commit(lambda: trending.record_review(instance.media_id, instance.rating, instance.created))
+
+
+@receiver(post_delete, sender=Review)
+def discard_review_trending(sender, instance=None, **kwargs):
+    """
+    Signal to remove a deleted review from the trending media once the deletion is committed.
+    """
+    transaction.on_commit(lambda: trending.discard_review(instance.media_id, instance.rating, instance.created))
+
+
+@receiver(post_save, sender=Media)
+def publish_media_rating(sender, instance=None, **kwargs):
+    """
+    Signal to stream the current rating of a media to its subscribers.
+    """
+    if has_listeners(instance.id):
+        events.publish(instance.id, "media.rating", {
+            "avg_rating": instance.avg_rating,
+            "user_rating": instance.user_rating,
+        })
+
+
+@receiver([post_save, post_delete], sender=Media)
+def invalidate_cached_media(sender, instance=None, **kwargs):
+    """
+    Signal to drop a saved or deleted media from the object cache.
+    """
+    media_cache.invalidate(instance.pk)
+
+
+@receiver([post_save, post_delete], sender=Review)
+def invalidate_cached_review_pages(sender, instance=None, **kwargs):
+    """
+    Signal to outdate the cached review list pages of the media of a saved or deleted review.
+    """
+    review_page_cache.invalidate(instance.media_id)
+
+
+@receiver(post_save, sender=User)
+def rename_reviewer(sender, instance=None, created=False, update_fields=None, **kwargs):
+    """
+    Signal to copy a changed username to the reviews of the user, recording them in the change log and outdating their cached pages.
+    Saves that only write other fields, such as the last login, are skipped.
+    """
+    if created or update_fields is not None and "username" not in update_fields:
+        return
+
+    ArchivedReview.objects.filter(reviewer=instance).exclude(reviewer_username=instance.username).update(reviewer_username=instance.username)
+    reviews = Review.all_objects.filter(reviewer=instance).exclude(reviewer_username=instance.username)
+    renamed = list(reviews.values_list("id", "media_id"))
+    if not renamed:
+        return
+
+    reviews.update(reviewer_username=instance.username)
+    changes.record(Review, [review_id for review_id, _ in renamed])
+    for media_id in {media_id for _, media_id in renamed}:
+        review_page_cache.invalidate(media_id)
+
+
+@receiver([post_save, post_delete], sender=StreamingPlatform)
+def invalidate_cached_platform(sender, instance=None, **kwargs):
+    """
+    Signal to drop a saved or deleted streaming platform from the object cache.
+    """
+    platform_cache.invalidate(instance.pk)
+
+
+@receiver(post_save, sender=StreamingPlatform)
+@receiver(post_save, sender=Media)
+@receiver(post_save, sender=Review)
+def record_saved_change(sender, instance=None, **kwargs):
+    """
+    Signal to record a saved streaming platform, media or review in the change log, in the transaction of the save.
+    """
+    changes.record(sender, [instance.pk])
+
+
+@receiver(post_delete, sender=StreamingPlatform)
+@receiver(post_delete, sender=Media)
+@receiver(post_delete, sender=Review)
+def record_deleted_change(sender, instance=None, **kwargs):
+    """
+    Signal to record a deleted streaming platform, media or review in the change log, in the transaction of the deletion.
+    """
+    changes.record(sender, [instance.pk], Change.DELETE)
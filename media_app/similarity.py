@@ -0,0 +1,190 @@
+"""
+Item-item cosine similarity of media over the reviewer x media rating matrix.
+
+NumPy and SciPy are only needed by the offline refresh, so they are imported lazily and the
+web workers never load them. The similarity matrix is never materialized: it is computed one
+block of media at a time, optionally on several processes, and only the top neighbours are kept.
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+
+from django.db import transaction
+from django.db.models import Count, Max, Min
+
+from media_app.models import Review, SimilarMedia
+
+# Matrix and thresholds shared with the worker processes, which inherit them when forked.
+_matrix = None
+_thresholds = None
+
+
+def load_ratings(chunk_size=100_000):
+    """
+    Load the active reviews as a sparse reviewer x media matrix, with one column per media id.
+    Reviews are read in keyset-paginated chunks and packed into typed arrays, so Python objects
+    only ever exist for one chunk.
+    """
+    import numpy as np
+    from scipy import sparse
+
+    reviewers, media, ratings = [], [], []
+    last_id = 0
+    while True:
+        rows = list(
+            Review.objects.filter(id__gt=last_id)
+            .order_by("id")
+            .values_list("id", "reviewer_id", "media_id", "rating")[:chunk_size]
+        )
+        if not rows:
+            break
+        chunk = np.array(rows, dtype=np.int64)
+        reviewers.append(chunk[:, 1].astype(np.int32))
+        media.append(chunk[:, 2].astype(np.int32))
+        ratings.append(chunk[:, 3].astype(np.float32))
+        last_id = rows[-1][0]
+
+    if not ratings:
+        return sparse.csc_matrix((0, 0), dtype=np.float32)
+
+    _, rows = np.unique(np.concatenate(reviewers), return_inverse=True)
+    columns = np.concatenate(media)
+    return sparse.csc_matrix(
+        (np.concatenate(ratings), (rows, columns)),
+        shape=(rows.max() + 1, columns.max() + 1),
+    )
+
+
+def normalize_columns(matrix):
+    """
+    Scale every media column to unit length, so the dot product of two columns is their cosine similarity.
+    """
+    import numpy as np
+    from scipy import sparse
+
+    norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=0)).ravel())
+    inverse = np.divide(1.0, norms, out=np.zeros_like(norms), where=norms > 0)
+    return (matrix @ sparse.diags(inverse.astype(np.float32))).tocsc()
+
+
+def _share(matrix, thresholds):
+    global _matrix, _thresholds
+    _matrix, _thresholds = matrix, thresholds
+
+
+def neighbours(media_ids, count):
+    """
+    Compute the most similar media of a block of media from the shared normalized matrix.
+    Returns the neighbours of every media and, when thresholds are shared, the media whose stored
+    neighbours a changed similarity would displace.
+    """
+    import numpy as np
+
+    block = (_matrix[:, media_ids].T @ _matrix).tocsr()
+    results, displaced = [], set()
+    for row, media_id in enumerate(media_ids):
+        start, end = block.indptr[row], block.indptr[row + 1]
+        columns, scores = block.indices[start:end], block.data[start:end]
+        keep = (columns != media_id) & (scores > 0)
+        columns, scores = columns[keep], scores[keep]
+
+        if _thresholds is not None:
+            displaced.update(columns[scores > _thresholds[columns]].tolist())
+
+        if len(scores) > count:
+            top = np.argpartition(-scores, count)[:count]
+            columns, scores = columns[top], scores[top]
+        order = np.argsort(-scores, kind="stable")
+        results.append((media_id, columns[order].tolist(), scores[order].tolist()))
+    return results, displaced
+
+
+def _blocks(media_ids, block_size):
+    media_ids = sorted(media_ids)
+    return [media_ids[start:start + block_size] for start in range(0, len(media_ids), block_size)]
+
+
+def compute(media_ids, count, block_size, jobs):
+    """
+    Yield the neighbours and displaced media of every block of media, computing blocks in parallel when jobs > 1.
+    """
+    blocks = _blocks(media_ids, block_size)
+    if jobs > 1 and len(blocks) > 1:
+        with ProcessPoolExecutor(max_workers=jobs, initializer=_share, initargs=(_matrix, _thresholds)) as executor:
+            yield from executor.map(neighbours, blocks, [count] * len(blocks))
+    else:
+        for block in blocks:
+            yield neighbours(block, count)
+
+
+def save(results, computed):
+    """
+    Replace the stored neighbours of a block of media in one transaction.
+    """
+    with transaction.atomic():
+        SimilarMedia.objects.filter(media_id__in=[media_id for media_id, _, _ in results]).delete()
+        SimilarMedia.objects.bulk_create(
+            SimilarMedia(media_id=media_id, similar_id=similar_id, score=score, computed=computed)
+            for media_id, similar_ids, scores in results
+            for similar_id, score in zip(similar_ids, scores)
+        )
+
+
+def stored_thresholds(size, count):
+    """
+    Return, per media id, the score a new neighbour must beat to enter its stored top neighbours.
+    Media with fewer than `count` neighbours accept any positive score.
+    """
+    import numpy as np
+
+    thresholds = np.zeros(size, dtype=np.float32)
+    full = dict(
+        SimilarMedia.objects.values("media_id")
+        .annotate(total=Count("id"), minimum=Min("score"))
+        .filter(media_id__lt=size, total__gte=count)
+        .values_list("media_id", "minimum")
+    )
+    thresholds[list(full)] = list(full.values())
+    return thresholds
+
+
+def last_computed():
+    """
+    Return when the stored neighbours were last refreshed, or None if they never were.
+    """
+    return SimilarMedia.objects.aggregate(last=Max("computed"))["last"]
+
+
+def refresh(computed, count=20, block_size=1000, jobs=1, full=False):
+    """
+    Recompute and store the top neighbours of media, returning the number of media refreshed.
+    Unless `full` is set, only media with reviews written since the last refresh are recomputed, plus
+    the media whose stored neighbours list one of them or would now include one of them.
+    """
+    matrix = normalize_columns(load_ratings())
+    reviewed = set(matrix.getnnz(axis=0).nonzero()[0].tolist())
+    since = None if full else last_computed()
+
+    if since is None:
+        _share(matrix, None)
+        for results, _ in compute(reviewed, count, block_size, jobs):
+            save(results, computed)
+        SimilarMedia.objects.filter(computed__lt=computed).delete()
+        return len(reviewed)
+
+    changed = set(Review.all_objects.filter(update__gte=since).values_list("media_id", flat=True).distinct())
+    listing = set(SimilarMedia.objects.filter(similar_id__in=changed).values_list("media_id", flat=True).distinct())
+
+    _share(matrix, stored_thresholds(matrix.shape[1], count))
+    displaced = set()
+    for results, block_displaced in compute(changed & reviewed, count, block_size, jobs):
+        save(results, computed)
+        displaced |= block_displaced
+
+    _share(matrix, None)
+    others = ((listing | displaced) & reviewed) - changed
+    for results, _ in compute(others, count, block_size, jobs):
+        save(results, computed)
+
+    # Media that lost all their reviews have no neighbours anymore.
+    SimilarMedia.objects.filter(media_id__in=(changed | listing) - reviewed).delete()
+    return len((changed | listing | displaced) & reviewed)
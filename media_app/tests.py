@@ -1,10 +1,43 @@
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import threading
+from datetime import timedelta
+from io import BytesIO, StringIO
+from unittest import mock
+
 from django.contrib.auth.models import User
-from django.urls import reverse
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.db import DEFAULT_DB_ALIAS, connection, connections
+from django.http import JsonResponse
+from django.test import override_settings, tag
+from django.test.utils import CaptureQueriesContext
+from django.urls import resolve, reverse
+from django.utils import timezone
 from rest_framework import status
 from rest_framework.authtoken.models import Token
-from rest_framework.test import APIRequestFactory, APITestCase
+from rest_framework.response import Response
+from rest_framework.test import (APIRequestFactory, APITestCase,
+                                 APITransactionTestCase)
+from rest_framework.views import APIView
 
-from media_app.api.views import ReviewList
+from media_app import events, trending
+from media_app.api.coalescing import (Flight, SingleFlight, coalesced,
+                                      coalescing_key, flights)
+from media_app.api.idempotency import IdempotencyMixin
+from media_app.api.throttling import MediaBatchThrottle
+from media_app.archive import ensure_archive_partitions
+from media_app.changes import oldest_open_write
+from media_app.cache import (ObjectCache, ResultCache, media_cache,
+                             platform_cache, review_page_cache)
+from media_app.api.serializers import ReviewSerializer
+from media_app.api.views import (MediaBatchAPIView, MediaBulkAPIView,
+                                 ReviewCreate, ReviewDetail, ReviewList,
+                                 format_event, review_events)
+from media_app.management.commands.startup_report import parse_import_times
 
 from .models import *
 
@@ -41,6 +74,26 @@ class StreamingPlatformTestCase(APITestCase):
         
         self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
 
+    def test_streaming_platform_create_idempotent(self):
+        """
+        Test that an admin retrying a streaming platform creation with the same Idempotency-Key creates it once.
+        """
+        self.client.force_authenticate(User.objects.create_superuser(username="testcase_admin", password="password"))
+        data = {
+            "name": "Retried",
+            "about": "Test",
+            "website": "https://test.com"
+        }
+
+        responses = [
+            self.client.post(reverse("streaming_platform-list"), data, HTTP_IDEMPOTENCY_KEY="platform-create")
+            for _ in range(2)
+        ]
+
+        self.assertEqual([response.status_code for response in responses], [status.HTTP_201_CREATED] * 2)
+        self.assertEqual(responses[1].data, responses[0].data)
+        self.assertEqual(StreamingPlatform.objects.filter(name="Retried").count(), 1)
+
     def test_stream_platform_list(self):
         """
         Test listing streaming platforms.
@@ -84,6 +137,47 @@ class MediaTestCase(APITestCase):
             active=True
         )
 
+    def test_media_ordering_weighted_rating(self):
+        """
+        Test that media can be sorted by weighted rating, which favours many good reviews over a single perfect one.
+        """
+        for title, avg_rating, user_rating in (("Single", 5, 1), ("Popular", 4.8, 100)):
+            Media.objects.create(
+                title=title,
+                storyline="Test",
+                streaming_platform=self.streaming_platform,
+                avg_rating=avg_rating,
+                user_rating=user_rating,
+                active=True
+            )
+        out = StringIO()
+        call_command("recompute_weighted_ratings", stdout=out)
+
+        self.assertIn("Recomputed the weighted rating of 3 media", out.getvalue())
+
+        response = self.client.get(reverse("media-list"), {"ordering": "-weighted_rating"})
+
+        self.assertEqual([media["title"] for media in response.data], ["Popular", "Single", "Test"])
+        self.assertAlmostEqual(response.data[0]["weighted_rating"], (10 * 3.0 + 4.8 * 100) / 110)
+
+    def test_media_rating_histogram_embedded(self):
+        """
+        Test that the rating histogram is only embedded on request, without extra queries.
+        The second request is served by the object cache without any query at all.
+        """
+        Media.objects.filter(pk=self.media_object.pk).update(rating_3_count=2, rating_4_count=2)
+        self.client.credentials()
+
+        response = self.client.get(reverse("media-detail", args=(self.media_object.id,)))
+
+        self.assertNotIn("rating_histogram", response.data)
+        self.assertNotIn("rating_3_count", response.data)
+
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse("media-detail", args=(self.media_object.id,)), {"include": "histogram"})
+
+        self.assertEqual(response.data["rating_histogram"], {"1": 0, "2": 0, "3": 2, "4": 2, "5": 0})
+
     def test_media_create_201(self):
         """
         Test that an admin can create a new media object.
@@ -104,6 +198,25 @@ class MediaTestCase(APITestCase):
         
         self.assertEqual(response.status_code, status.HTTP_201_CREATED)
 
+    def test_media_create_idempotent(self):
+        """
+        Test that an admin retrying a media creation with the same Idempotency-Key creates it once.
+        """
+        self.client.force_authenticate(self.admin_user)
+        data = {
+            "title": "Retried",
+            "storyline": "This is a test media",
+            "streaming_platform": self.streaming_platform.id,
+            "user_rating": 4,
+            "active": True
+        }
+
+        responses = [self.client.post(reverse("media-list"), data, HTTP_IDEMPOTENCY_KEY="media-create") for _ in range(2)]
+
+        self.assertEqual([response.status_code for response in responses], [status.HTTP_201_CREATED] * 2)
+        self.assertEqual(responses[1]["Idempotent-Replayed"], "true")
+        self.assertEqual(Media.objects.filter(title="Retried").count(), 1)
+
     def test_media_create_400(self):
         """
         Test that media creation fails with incomplete data.
@@ -139,6 +252,37 @@ class MediaTestCase(APITestCase):
         
         self.assertEqual(response.status_code, status.HTTP_200_OK)
 
+    def test_media_list_representation(self):
+        """
+        Test that media lists, including those nested in streaming platforms, neither read nor return the storyline the detail returns.
+        """
+        for url in (reverse("media-list"), reverse("streaming_platform-detail", args=(self.streaming_platform.id,))):
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(url)
+
+            media_list = response.data if url == reverse("media-list") else response.data["media"]
+            self.assertEqual([media["id"] for media in media_list], [self.media_object.id])
+            self.assertNotIn("storyline", media_list[0])
+            self.assertFalse(any("storyline" in query["sql"] for query in queries))
+
+        response = self.client.get(reverse("media-detail", args=(self.media_object.id,)))
+
+        self.assertEqual(response.data["storyline"], "Test")
+
+    def test_media_inactive_hidden(self):
+        """
+        Test that inactive media are excluded from the list and detail endpoints.
+        """
+        Media.objects.filter(pk=self.media_object.pk).update(active=False)
+
+        response = self.client.get(reverse("media-list"))
+
+        self.assertEqual(response.data, [])
+
+        response = self.client.get(reverse("media-detail", args=(self.media_object.id,)))
+
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
     def test_media_detail_404(self):
         """
         Test retrieving a media object that does not exist.
@@ -167,6 +311,106 @@ class MediaTestCase(APITestCase):
         
         self.assertEqual(response.status_code, status.HTTP_200_OK)
 
+    def test_media_detail_patch(self):
+        """
+        Test that a partial update writes only the changed columns and is not blocked by concurrent rating updates.
+        """
+        self.client.force_authenticate(self.admin_user)
+        url = reverse("media-detail", args=(self.media_object.id,))
+        etag = self.client.get(url)["ETag"]
+        Media.objects.filter(pk=self.media_object.pk).update(avg_rating=4.5, user_rating=2)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.patch(url, {"title": "Test - Edited", "storyline": "Test"}, format="json", HTTP_IF_MATCH=etag)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response["ETag"], etag)
+        self.assertEqual((response.data["title"], response.data["avg_rating"]), ("Test - Edited", 4.5))
+
+        update = next(query["sql"] for query in queries if query["sql"].startswith("UPDATE"))
+
+        self.assertIn('"title"', update)
+        self.assertNotIn('"storyline"', update)
+        self.assertNotIn('"avg_rating"', update)
+        self.assertEqual(self.client.get(url)["ETag"], response["ETag"])
+
+        response = self.client.patch(url, {"title": "Test"}, format="json", HTTP_IF_MATCH="*")
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.patch(url, {"title": "Test"}, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse(any(query["sql"].startswith("UPDATE") for query in queries))
+
+    def test_media_edit_weighted_rating(self):
+        """
+        Test that media created with a mean or number of ratings get the matching weighted rating, and that edits
+        leave the rating aggregates to the reviews.
+        """
+        self.client.force_authenticate(self.admin_user)
+        data = {"title": "New", "storyline": "Test", "streaming_platform": self.streaming_platform.id, "user_rating": 5, "avg_rating": 5.0}
+        response = self.client.post(reverse("media-list"), data, format="json")
+        expected = (5, 5.0, (10 * 3.0 + 5.0 * 5) / 15)
+
+        self.assertAlmostEqual(response.data["weighted_rating"], expected[2])
+
+        url = reverse("media-detail", args=(response.data["id"],))
+        aggregates = {"user_rating": 1, "avg_rating": 1.0, "weighted_rating": 1.0}
+        response = self.client.patch(url, aggregates, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        response = self.client.put(url, {"title": "Edited", "storyline": "Test", "streaming_platform": self.streaming_platform.id, **aggregates}, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["title"], "Edited")
+        self.assertEqual(tuple(Media.objects.filter(pk=response.data["id"]).values_list("user_rating", "avg_rating", "weighted_rating").get()), expected)
+
+        del data["user_rating"], data["avg_rating"]
+        response = self.client.put(url, data, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_media_detail_patch_412(self):
+        """
+        Test that an update based on an outdated ETag fails instead of overwriting a concurrent edit.
+        """
+        self.client.force_authenticate(self.admin_user)
+        url = reverse("media-detail", args=(self.media_object.id,))
+        etag = self.client.get(url)["ETag"]
+        self.client.patch(url, {"storyline": "Edited concurrently"}, format="json")
+
+        response = self.client.patch(url, {"title": "Test - Edited"}, format="json", HTTP_IF_MATCH=etag)
+
+        self.assertEqual(response.status_code, status.HTTP_412_PRECONDITION_FAILED)
+        self.assertEqual(response["ETag"], self.client.get(url)["ETag"])
+        self.assertEqual(Media.objects.get(pk=self.media_object.pk).title, "Test")
+
+        response = self.client.put(url, {"title": "Test"}, format="json", HTTP_IF_MATCH=f'W/{etag}, "other"')
+
+        self.assertEqual(response.status_code, status.HTTP_412_PRECONDITION_FAILED)
+
+        response = self.client.patch(reverse("media-detail", args=(0,)), {"title": "Test"}, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_media_detail_write_permissions(self):
+        """
+        Test that only admin users can update or delete a media.
+        """
+        url = reverse("media-detail", args=(self.media_object.id,))
+        self.client.credentials()
+
+        self.assertEqual(self.client.patch(url, {"title": "Edited"}, format="json").status_code, status.HTTP_401_UNAUTHORIZED)
+
+        self.client.force_authenticate(self.user)
+
+        self.assertEqual(self.client.patch(url, {"title": "Edited"}, format="json").status_code, status.HTTP_403_FORBIDDEN)
+        self.assertEqual(self.client.delete(url).status_code, status.HTTP_403_FORBIDDEN)
+        self.assertEqual(Media.objects.get(pk=self.media_object.pk).title, "Test")
+
     def test_media_detail_put_400(self):
         """
         Test that updating a media object with invalid data fails.
@@ -199,6 +443,254 @@ class MediaTestCase(APITestCase):
         
         self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
 
+        response = self.client.delete(reverse("media-detail", args=(self.media_object.id,)))
+
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual(response.data, {"Error": "Media not found"})
+
+
+class MediaBatchTestCase(APITestCase):
+    """
+    Test case for the batch media endpoint.
+    """
+
+    def setUp(self):
+        """
+        Set up test data, including media objects with reviews.
+        """
+        cache.clear()
+        self.user = User.objects.create_user(username="test_user", password="password")
+        self.other_user = User.objects.create_user(username="other_user", password="password")
+        self.factory = APIRequestFactory()
+        self.streaming_platform = StreamingPlatform.objects.create(
+            name="Test",
+            about="Test",
+            website="https://www.test.com"
+        )
+        self.media_object = Media.objects.create(
+            title="Test",
+            storyline="Test",
+            streaming_platform=self.streaming_platform,
+            user_rating=4,
+            active=True
+        )
+        self.media_object_2 = Media.objects.create(
+            title="Test 2",
+            storyline="Test",
+            streaming_platform=self.streaming_platform,
+            user_rating=4,
+            active=True
+        )
+        for user in (self.user, self.other_user):
+            Review.objects.create(
+                reviewer=user,
+                rating=4,
+                description="Test",
+                media=self.media_object,
+                active=True
+            )
+
+    def test_media_batch_preserves_order_and_reports_missing(self):
+        """
+        Test that results follow the requested order and unknown ids are reported as missing.
+        """
+        ids = f"{self.media_object_2.id},9999,{self.media_object.id}"
+
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse("media-batch"), {"ids": ids})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([item["id"] for item in response.data["results"]], [self.media_object_2.id, self.media_object.id])
+        self.assertEqual(response.data["missing"], [9999])
+        self.assertNotIn("platform", response.data["results"][0])
+
+    def test_media_batch_include(self):
+        """
+        Test that the platform and latest reviews are embedded when requested.
+        """
+        ids = f"{self.media_object.id},{self.media_object_2.id}"
+
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse("media-batch"), {"ids": ids, "include": "platform,reviews"})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        first, second = response.data["results"]
+        self.assertEqual(first["platform"]["name"], "Test")
+        self.assertEqual(len(first["latest_reviews"]), 2)
+        self.assertEqual(second["latest_reviews"], [])
+
+    def test_media_batch_400(self):
+        """
+        Test that missing, malformed and oversized id lists are rejected.
+        """
+        oversized = ",".join(str(pk) for pk in range(1, MediaBatchAPIView.max_batch_size + 2))
+
+        for ids in ("", "1,abc", oversized):
+            response = self.client.get(reverse("media-batch"), {"ids": ids})
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_media_batch_throttle_weight(self):
+        """
+        Test that a batch is recorded once per started group of ids and rejected when it would exceed the rate.
+        """
+        ids = ",".join(str(pk) for pk in range(1, 26))
+        request = self.factory.get("/api/media/batch/", {"ids": ids})
+        request.user = self.user
+        request.query_params = request.GET
+
+        throttle = MediaBatchThrottle()
+        throttle.num_requests = 5
+
+        self.assertTrue(throttle.allow_request(request, None))
+        self.assertEqual(len(throttle.history), 3)
+        self.assertFalse(throttle.allow_request(request, None))
+
+
+class MediaBulkTestCase(APITestCase):
+    """
+    Test case for the bulk media write endpoint.
+    """
+
+    def setUp(self):
+        """
+        Set up an admin user and media objects to update and delete.
+        """
+        cache.clear()
+        self.admin_user = User.objects.create_superuser(username="test_user_admin", password="password")
+        self.client.force_authenticate(self.admin_user)
+        self.url = reverse("media-bulk")
+        self.streaming_platform = StreamingPlatform.objects.create(
+            name="Test",
+            about="Test",
+            website="https://www.test.com"
+        )
+        self.media_objects = [
+            Media.objects.create(
+                title=f"Test {index}",
+                storyline="Test",
+                streaming_platform=self.streaming_platform,
+                user_rating=4,
+                active=True
+            )
+            for index in range(2)
+        ]
+
+    def item(self, title, **fields):
+        """
+        Return the data of a valid media to create.
+        """
+        return {"title": title, "storyline": "Test", "streaming_platform": self.streaming_platform.id, "user_rating": 3, **fields}
+
+    def test_media_bulk_create(self):
+        """
+        Test that valid media are created in batches with a fixed number of queries, and invalid ones reported by index.
+        """
+        items = [self.item(f"New {index}") for index in range(50)]
+        items += [{"title": "Incomplete"}, self.item("Unknown platform", streaming_platform=0), "Not a media"]
+
+        with self.assertNumQueries(5):
+            response = self.client.post(self.url, items, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_207_MULTI_STATUS)
+        self.assertEqual([created["index"] for created in response.data["created"]], list(range(50)))
+        self.assertEqual([error["index"] for error in response.data["errors"]], [50, 51, 52])
+        self.assertIn("user_rating", response.data["errors"][0]["errors"])
+        self.assertEqual(Media.objects.filter(title__startswith="New").count(), 50)
+
+        with mock.patch.object(MediaBulkAPIView, "batch_size", 2):
+            response = self.client.post(self.url, [self.item(f"Batched {index}") for index in range(3)], format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Media.objects.get(pk=response.data["created"][2]["id"]).title, "Batched 2")
+
+    def test_media_bulk_update(self):
+        """
+        Test that only changed columns are written, with a fixed number of queries, and that invalid items are reported.
+        """
+        media_object, other = self.media_objects
+        Media.objects.filter(pk=media_object.pk).update(avg_rating=4.5)
+        items = [
+            {"id": media_object.id, "title": "Renamed"},
+            {"id": other.id, "title": other.title, "streaming_platform": self.streaming_platform.id},
+            {"title": "No id"},
+            {"id": 0, "title": "Unknown"},
+            {"id": other.id, "streaming_platform": 0},
+        ]
+
+        with self.assertNumQueries(6):
+            response = self.client.patch(self.url, items, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_207_MULTI_STATUS)
+        self.assertEqual((response.data["updated"], response.data["unchanged"]), ([media_object.id], [other.id]))
+        self.assertEqual([error["index"] for error in response.data["errors"]], [2, 3, 4])
+
+        media_object.refresh_from_db()
+
+        self.assertEqual((media_object.title, media_object.avg_rating), ("Renamed", 4.5))
+
+        items = [{"id": media_object.id, "title": "Title"}, {"id": other.id, "active": False}]
+
+        with self.assertNumQueries(6):
+            response = self.client.patch(self.url, items, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse(Media.all_objects.get(pk=other.id).active)
+
+    def test_media_bulk_weighted_rating(self):
+        """
+        Test that media created in bulk with a mean or number of ratings get the matching weighted rating, and that
+        bulk updates leave the rating aggregates to the reviews.
+        """
+        response = self.client.post(self.url, [self.item("New", avg_rating=5.0)], format="json")
+        media_object = Media.objects.get(pk=response.data["created"][0]["id"])
+
+        self.assertAlmostEqual(media_object.weighted_rating, (10 * 3.0 + 5.0 * 3) / 13)
+
+        response = self.client.patch(self.url, [{"id": media_object.id, "user_rating": 1, "avg_rating": 1.0}], format="json")
+        media_object.refresh_from_db()
+
+        self.assertEqual(response.data["unchanged"], [media_object.id])
+        self.assertEqual((media_object.user_rating, media_object.avg_rating), (3, 5.0))
+        self.assertAlmostEqual(media_object.weighted_rating, (10 * 3.0 + 5.0 * 3) / 13)
+
+    def test_media_bulk_delete(self):
+        """
+        Test that media are deleted by id with the reviews that cascade from them, reporting unknown ids.
+        """
+        media_object = self.media_objects[0]
+        Review.objects.create(reviewer=self.admin_user, rating=4, description="Test", media=media_object, active=True)
+
+        response = self.client.delete(self.url, [media_object.id, 0, "x"], format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_207_MULTI_STATUS)
+        self.assertEqual(response.data["deleted"], [media_object.id])
+        self.assertEqual([error["index"] for error in response.data["errors"]], [1, 2])
+        self.assertFalse(Media.all_objects.filter(pk=media_object.id).exists())
+        self.assertFalse(Review.all_objects.filter(media=media_object.id).exists())
+
+    def test_media_bulk_400(self):
+        """
+        Test that requests that are not a list, are too large or have no valid item are rejected, and that writes are restricted to admins.
+        """
+        for data in ({"title": "Test"}, []):
+            self.assertEqual(self.client.post(self.url, data, format="json").status_code, status.HTTP_400_BAD_REQUEST)
+            self.assertEqual(self.client.patch(self.url, data, format="json").status_code, status.HTTP_400_BAD_REQUEST)
+
+        response = self.client.post(self.url, [self.item("Test", streaming_platform="abc")], format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("streaming_platform", response.data["errors"][0]["errors"])
+
+        with mock.patch.object(MediaBulkAPIView, "max_items", 1):
+            response = self.client.delete(self.url, [1, 2], format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.client.patch(self.url, [{"id": 0}], format="json").status_code, status.HTTP_400_BAD_REQUEST)
+
+        self.client.force_authenticate(User.objects.create_user(username="test_user", password="password"))
+
+        self.assertEqual(self.client.delete(self.url, [1], format="json").status_code, status.HTTP_403_FORBIDDEN)
+
 
 class ReviewTestCase(APITestCase):
     """
@@ -209,6 +701,7 @@ class ReviewTestCase(APITestCase):
         """
         Set up test data, including users, media objects, and reviews.
         """
+        cache.clear()
         self.user = User.objects.create_user(username="testcase", password="password")
         self.token = Token.objects.get(user__username=self.user)
         self.client.credentials(HTTP_AUTHORIZATION="Token " + self.token.key)
@@ -260,6 +753,86 @@ class ReviewTestCase(APITestCase):
         
         self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
 
+    def test_review_create_idempotent(self):
+        """
+        Test that retries with the same Idempotency-Key replay the first response without creating or throttling again,
+        and that the key cannot be reused for a different review.
+        """
+        url = reverse("review-create", args=(self.media_object.id,))
+        data = {"rating": 5, "description": "Test", "media": self.media_object.id, "active": True}
+
+        responses = [self.client.post(url, data, format="json", HTTP_IDEMPOTENCY_KEY="review-create") for _ in range(3)]
+
+        self.assertEqual([response.status_code for response in responses], [status.HTTP_201_CREATED] * 3)
+        self.assertNotIn("Idempotent-Replayed", responses[0])
+        self.assertEqual(responses[2]["Idempotent-Replayed"], "true")
+        self.assertEqual(responses[2].data, responses[0].data)
+        self.assertEqual(Review.objects.filter(media=self.media_object).count(), 1)
+
+        response = self.client.post(url, {**data, "rating": 4}, format="json", HTTP_IDEMPOTENCY_KEY="review-create")
+
+        self.assertEqual(response.status_code, status.HTTP_422_UNPROCESSABLE_ENTITY)
+
+        response = self.client.post(url, data, format="json", HTTP_IDEMPOTENCY_KEY="k" * 256)
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_review_create_idempotency_in_progress(self):
+        """
+        Test that a retry is rejected while the first request with its Idempotency-Key is still running.
+        """
+        url = reverse("review-create", args=(self.media_object.id,))
+
+        with mock.patch("media_app.api.idempotency.cache") as idempotency_cache, \
+                mock.patch.object(IdempotencyMixin, "get_fingerprint", return_value="fingerprint"):
+            idempotency_cache.add.return_value = False
+            for stored in (("pending", "fingerprint"), None):
+                idempotency_cache.get.return_value = stored
+                response = self.client.post(url, {"rating": 5}, format="json", HTTP_IDEMPOTENCY_KEY="review-create")
+
+                self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+
+    def test_review_create_idempotency_released(self):
+        """
+        Test that a key is released when its request fails or is throttled, so the request can be retried.
+        """
+        url = reverse("review-create", args=(self.media_object.id,))
+        data = {"rating": 5, "description": "Test", "media": self.media_object.id, "active": True}
+
+        with mock.patch.object(ReviewCreate, "perform_create", side_effect=RuntimeError), self.assertLogs("django.request", "ERROR"):
+            with self.assertRaises(RuntimeError):
+                self.client.post(url, data, format="json", HTTP_IDEMPOTENCY_KEY="review-create")
+
+        response = self.client.post(url, data, format="json", HTTP_IDEMPOTENCY_KEY="review-create")
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        for _ in range(2):
+            response = self.client.post(url, data, format="json", HTTP_IDEMPOTENCY_KEY="review-create-throttled")
+
+            self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+            self.assertNotIn("Idempotent-Replayed", response)
+
+        response = self.client.post(url, data, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+    def test_review_create_weighted_rating(self):
+        """
+        Test that creating a review updates the weighted rating of the media.
+        """
+        data = {
+            "rating": 5,
+            "description": "Test",
+            "media": self.media_object.id,
+        }
+
+        self.client.post(reverse("review-create", args=(self.media_object.id,)), data, format="json")
+        self.media_object.refresh_from_db()
+
+        self.assertAlmostEqual(self.media_object.avg_rating, 5.0)
+        self.assertAlmostEqual(self.media_object.weighted_rating, (10 * 3.0 + 5.0 * 1) / 11)
+
     def test_review_create_unauthneticated(self):
         """
         Test that unauthenticated users cannot create reviews.
@@ -294,18 +867,128 @@ class ReviewTestCase(APITestCase):
         
         self.assertEqual(response.status_code, status.HTTP_200_OK)
 
-    def test_review_list(self):
-        """
-        Test listing all reviews for a media object.
-        """
-        response = self.client.get(reverse("review-list", args=(self.media_object.id,)))
-        
-        self.assertEqual(response.status_code, status.HTTP_200_OK)
-    
-    def test_swagger_fake_view_returns_empty_queryset(self):
+    def test_review_rating_histogram(self):
         """
-        Test that the get_queryset method returns an empty queryset 
-        when accessed by Swagger (i.e., swagger_fake_view is True).
+        Test that creating, updating and deleting reviews keeps the rating histogram and aggregates of the media in sync.
+        """
+        data = {
+            "rating": 4,
+            "description": "Test",
+            "media": self.media_object.id,
+        }
+        response = self.client.post(reverse("review-create", args=(self.media_object.id,)), data, format="json")
+        review_id = response.data["id"]
+
+        response = self.client.patch(reverse("review-detail", args=(review_id,)), {"rating": 5}, format="json")
+        response = self.client.get(reverse("media-ratings", args=(self.media_object.id,)))
+
+        self.assertEqual(response.data["histogram"], {"1": 0, "2": 0, "3": 0, "4": 0, "5": 1})
+        self.assertEqual(response.data["percentiles"], {"p25": 5, "p50": 5, "p75": 5, "p90": 5})
+        self.assertEqual((response.data["user_rating"], response.data["avg_rating"]), (1, 5.0))
+
+        self.client.delete(reverse("review-detail", args=(review_id,)))
+        response = self.client.get(reverse("media-ratings", args=(self.media_object.id,)))
+
+        self.assertEqual(response.data["histogram"]["5"], 0)
+        self.assertEqual(response.data["percentiles"]["p50"], None)
+        self.assertEqual((response.data["user_rating"], response.data["avg_rating"]), (0, 0))
+
+    def test_review_deactivate_rating_histogram(self):
+        """
+        Test that deactivating a review removes its rating from the histogram of its media.
+        """
+        self.media_object_2.rating_2_count = 1
+        self.media_object_2.save()
+
+        self.client.patch(reverse("review-detail", args=(self.review.id,)), {"active": False}, format="json")
+        self.media_object_2.refresh_from_db()
+
+        self.assertEqual(self.media_object_2.rating_histogram["2"], 0)
+
+    def test_review_inactive_rating_histogram(self):
+        """
+        Test that inactive reviews never count towards the histogram, even when deactivated while being written.
+        """
+        data = {
+            "rating": 4,
+            "description": "Test",
+            "media": self.media_object.id,
+            "active": False,
+        }
+        self.client.post(reverse("review-create", args=(self.media_object.id,)), data, format="json")
+        self.media_object.refresh_from_db()
+
+        self.assertEqual(sum(self.media_object.rating_histogram.values()), 0)
+
+        Review.all_objects.filter(pk=self.review.pk).update(active=False)
+        serializer = ReviewSerializer(self.review, data={"active": True}, partial=True)
+        serializer.is_valid()
+        ReviewDetail().perform_update(serializer)
+        self.media_object_2.refresh_from_db()
+
+        self.assertEqual(self.media_object_2.rating_histogram["2"], 1)
+
+        Review.all_objects.filter(pk=self.review.pk).update(active=False)
+        ReviewDetail().perform_destroy(self.review)
+        self.media_object_2.refresh_from_db()
+
+        self.assertEqual(self.media_object_2.rating_histogram["2"], 1)
+
+    def test_review_reactivate(self):
+        """
+        Test that the reviewer can still reach an inactive review to reactivate it, while other users get 404.
+        """
+        self.client.patch(reverse("review-detail", args=(self.review.id,)), {"active": False}, format="json")
+        response = self.client.patch(reverse("review-detail", args=(self.review.id,)), {"active": True}, format="json")
+        self.media_object_2.refresh_from_db()
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self.media_object_2.rating_histogram["2"], 1)
+
+        Review.all_objects.filter(pk=self.review.pk).update(active=False)
+        self.client.force_authenticate(User.objects.create_user(username="other", password="password"))
+
+        self.assertEqual(self.client.get(reverse("review-detail", args=(self.review.id,))).status_code, status.HTTP_404_NOT_FOUND)
+
+        self.client.force_authenticate(None)
+        self.client.credentials()
+
+        self.assertEqual(self.client.get(reverse("review-detail", args=(self.review.id,))).status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_review_create_inactive_media(self):
+        """
+        Test that reviewing an inactive or missing media returns 404.
+        """
+        self.media_object.active = False
+        self.media_object.save()
+
+        data = {"rating": 4, "description": "Test", "media": self.media_object.id}
+        response = self.client.post(reverse("review-create", args=(self.media_object.id,)), data, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual(self.client.post(reverse("review-create", args=(0,)), data, format="json").status_code, status.HTTP_404_NOT_FOUND)
+        self.assertFalse(Review.all_objects.filter(media=self.media_object).exists())
+
+    def test_media_ratings_not_found(self):
+        """
+        Test that the rating distribution of an unknown media returns 404.
+        """
+        response = self.client.get(reverse("media-ratings", args=(999,)))
+
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_review_list(self):
+        """
+        Test listing all reviews for a media object.
+        """
+        response = self.client.get(reverse("review-list", args=(self.media_object.id,)))
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+    
+    def test_swagger_fake_view_returns_empty_queryset(self):
+        """
+        Test that the get_queryset method returns an empty queryset 
+        when accessed by Swagger (i.e., swagger_fake_view is True).
         """
 
         request = self.factory.get("/api/reviews/")
@@ -334,6 +1017,164 @@ class ReviewTestCase(APITestCase):
         
         self.assertEqual(response.status_code, status.HTTP_200_OK)
 
+    def test_review_user_feed(self):
+        """
+        Test that a user's reviews are returned newest update first with keyset cursors.
+        """
+        newer_review = Review.objects.create(
+            reviewer=self.user,
+            rating=5,
+            description="Test",
+            media=self.media_object,
+            active=True
+        )
+
+        response = self.client.get(reverse("reviews-user"), {"username": self.user.username, "size": 1})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([review["id"] for review in response.data["results"]], [newer_review.id])
+        self.assertEqual(response.data["results"][0]["reviewer"], self.user.username)
+
+        response = self.client.get(response.data["next"])
+
+        self.assertEqual([review["id"] for review in response.data["results"]], [self.review.id])
+
+    def test_review_user_unknown(self):
+        """
+        Test that an unknown username returns an empty feed.
+        """
+        response = self.client.get(reverse("reviews-user"), {"username": "unknown"})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["results"], [])
+
+    def test_review_list_excludes_inactive(self):
+        """
+        Test that inactive reviews are hidden unless the "active" filter is given.
+        """
+        Review.objects.filter(pk=self.review.pk).update(active=False)
+
+        response = self.client.get(reverse("review-list", args=(self.media_object_2.id,)))
+
+        self.assertEqual(response.data["results"], [])
+
+        response = self.client.get(reverse("review-list", args=(self.media_object_2.id,)), {"active": False})
+
+        self.assertEqual([review["id"] for review in response.data["results"]], [self.review.id])
+
+    def test_review_archive(self):
+        """
+        Test that inactive reviews are moved to the archive and listed by the archive endpoint.
+        """
+        Review.objects.filter(pk=self.review.pk).update(active=False)
+
+        call_command("archive_reviews", stdout=StringIO())
+
+        self.assertFalse(Review.all_objects.filter(pk=self.review.pk).exists())
+
+        response = self.client.get(reverse("review-archive-list", args=(self.media_object_2.id,)))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([review["id"] for review in response.data["results"]], [self.review.id])
+        self.assertEqual(response.data["results"][0]["reviewer"], self.user.username)
+
+    def test_review_create_archived(self):
+        """
+        Test that a user whose review of a media was archived cannot review it again.
+        """
+        Review.objects.filter(pk=self.review.pk).update(active=False)
+        call_command("archive_reviews", stdout=StringIO())
+
+        data = {"rating": 4, "description": "Test", "media": self.media_object_2.id}
+        response = self.client.post(reverse("review-create", args=(self.media_object_2.id,)), data, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Review.all_objects.filter(media=self.media_object_2).exists())
+
+    def test_review_archive_older_than(self):
+        """
+        Test that active reviews are only archived once they are older than the given age.
+        """
+        call_command("archive_reviews", older_than=1, stdout=StringIO())
+
+        self.assertTrue(Review.objects.filter(pk=self.review.pk).exists())
+
+        Review.objects.filter(pk=self.review.pk).update(update=timezone.now() - timedelta(days=2))
+        call_command("archive_reviews", older_than=1, stdout=StringIO())
+
+        self.assertTrue(ArchivedReview.objects.filter(pk=self.review.pk).exists())
+
+    def test_review_archive_partitions(self):
+        """
+        Test that yearly archive partitions are only created on PostgreSQL.
+        """
+        with mock.patch("media_app.archive.connection") as connection:
+            connection.vendor = "sqlite"
+            ensure_archive_partitions({2024})
+
+            connection.cursor.assert_not_called()
+
+            connection.vendor = "postgresql"
+            ensure_archive_partitions({2024})
+
+            statement = connection.cursor.return_value.__enter__.return_value.execute.call_args.args[0]
+            self.assertIn("PARTITION OF", statement)
+            self.assertIn("FROM ('2024-01-01') TO ('2025-01-01')", statement)
+
+    def test_review_user_me(self):
+        """
+        Test listing the authenticated user's own reviews.
+        """
+        response = self.client.get(reverse("reviews-user-me"))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([review["id"] for review in response.data["results"]], [self.review.id])
+
+    def test_review_list_reviewer_username(self):
+        """
+        Test that review listings and the username filter read the username copied on the review, without loading or joining users.
+        """
+        other_user = User.objects.create_user(username="other", password="password")
+        Review.objects.create(reviewer=other_user, rating=4, description="Test", media=self.media_object_2, active=True)
+        url = reverse("review-list", args=(self.media_object_2.id,))
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+            filtered = self.client.get(url, {"reviewer__username": "other"})
+
+        self.assertEqual([review["reviewer"] for review in response.data["results"]], ["testcase", "other"])
+        self.assertEqual([review["reviewer"] for review in filtered.data["results"]], ["other"])
+        self.assertFalse([query for query in queries.captured_queries if "auth_user" in query["sql"] and "media_app_review" in query["sql"]])
+
+    def test_reviewer_rename(self):
+        """
+        Test that a changed username is copied to the reviews of the user, and that saves of other fields skip the reviews.
+        """
+        Review.objects.filter(pk=self.review.pk).update(active=False)
+        call_command("archive_reviews", stdout=StringIO())
+        review = Review.objects.create(reviewer=self.user, rating=4, description="Test", media=self.media_object, active=True)
+        url = reverse("review-list", args=(self.media_object.id,))
+        self.client.get(url)
+
+        with self.assertNumQueries(1):
+            self.user.save(update_fields=["last_login"])
+
+        self.user.username = "renamed"
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.save()
+
+        self.assertEqual(self.client.get(url).data["results"][0]["reviewer"], "renamed")
+        self.assertEqual(ArchivedReview.objects.get(pk=self.review.pk).reviewer_username, "renamed")
+        self.assertEqual(Change.objects.filter(table="reviews", object_id=review.pk).count(), 2)
+
+        with self.assertNumQueries(3):
+            self.user.save()
+
+        self.client.credentials()
+        response = self.client.get(reverse("reviews-user-me"))
+
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
 
 class IsAdminOrReadOnlyPermissionTestCase(APITestCase):
     """
@@ -389,3 +1230,1822 @@ class IsAdminOrReadOnlyPermissionTestCase(APITestCase):
         response = self.client.post(reverse("streaming_platform-list"), data)
         
         self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+
+class SchemaTestCase(APITestCase):
+    """
+    Test case for the cached OpenAPI schema endpoints.
+    """
+
+    def setUp(self):
+        """
+        Reset throttling state between tests.
+        """
+        cache.clear()
+
+    def test_schema_etag(self):
+        """
+        Test that the schema is served with an ETag and revalidated with 304.
+        """
+        response = self.client.get(reverse("schema"))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response["Cache-Control"], "public, no-cache")
+
+        response = self.client.get(reverse("schema"), HTTP_IF_NONE_MATCH=response["ETag"])
+
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        response = self.client.get(reverse("schema"), {"format": "json"}, HTTP_IF_NONE_MATCH=response["ETag"])
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response["ETag"].endswith('-json"'))
+
+    def test_schema_content_addressed(self):
+        """
+        Test that Swagger UI links the schema by hash and that the hashed URL is cacheable forever.
+        """
+        response = self.client.get(reverse("swagger-ui"))
+        schema_hash = response.data["schema_url"].split("v=")[1]
+
+        response = self.client.get(reverse("schema"), {"v": schema_hash})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn("immutable", response["Cache-Control"])
+
+
+class ReviewStreamTestCase(APITestCase):
+    """
+    Test case for streaming review events over Server-Sent Events.
+    """
+
+    def setUp(self):
+        """
+        Set up a media object with a reviewer, and a broker without subscriptions left over from other tests.
+        """
+        cache.clear()
+        broker = events.EventBroker()
+        for patcher in (mock.patch("media_app.events.broker", broker), mock.patch.object(events.relay, "broker", broker)):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.user = User.objects.create_user(username="test_user", password="password")
+        self.streaming_platform = StreamingPlatform.objects.create(
+            name="Test",
+            about="Test",
+            website="https://www.test.com"
+        )
+        self.media_object = Media.objects.create(
+            title="Test",
+            storyline="Test",
+            streaming_platform=self.streaming_platform,
+            user_rating=0,
+            active=True
+        )
+
+    async def test_stream_events(self):
+        """
+        Test that published events are relayed, idle streams get keepalives and closing unsubscribes.
+        """
+        stream = review_events(self.media_object.id)
+        await anext(stream)
+
+        events.broker.publish(self.media_object.id, "review.deleted", {"id": 1})
+        chunk = await anext(stream)
+
+        self.assertIn("event: review.deleted\n", chunk)
+        self.assertIn('data: {"id": 1}\n\n', chunk)
+
+        with mock.patch("media_app.api.views.REVIEW_STREAM_KEEPALIVE_SECONDS", 0.01):
+            self.assertEqual(await anext(stream), ": keepalive\n\n")
+
+        await stream.aclose()
+
+        self.assertFalse(events.broker.has_subscribers(self.media_object.id))
+
+    def test_slow_subscriber_resyncs(self):
+        """
+        Test that a subscriber whose queue overflows gets a single resync event instead of its backlog.
+        """
+        broker = events.EventBroker(max_pending=2)
+
+        async def overflow():
+            subscription = broker.subscribe(self.media_object.id)
+            for review_id in range(3):
+                broker.publish(self.media_object.id, "review.deleted", {"id": review_id})
+            await asyncio.sleep(0)
+            return [subscription.queue.get_nowait() for _ in range(subscription.queue.qsize())]
+
+        self.assertEqual(asyncio.run(overflow()), [events.RESYNC])
+        self.assertEqual(format_event(events.RESYNC), "event: resync\ndata: {}\n\n")
+
+    def test_closed_subscriber_unsubscribed(self):
+        """
+        Test that subscriptions whose event loop has closed are dropped on the next publish.
+        """
+        broker = events.EventBroker()
+
+        async def subscribe():
+            return broker.subscribe(self.media_object.id), broker.subscribe(self.media_object.id)
+
+        closed, other = asyncio.run(subscribe())
+        broker.unsubscribe(other)
+        broker.publish(self.media_object.id + 1, "review.deleted", {"id": 1})
+
+        self.assertTrue(broker.has_subscribers(self.media_object.id))
+
+        broker.publish(self.media_object.id, "review.deleted", {"id": 1})
+        broker.unsubscribe(closed)
+
+        self.assertFalse(broker.has_subscribers(self.media_object.id))
+
+    def test_review_signals_publish(self):
+        """
+        Test that review and rating changes are published after commit, and only while someone is subscribed.
+        """
+        with mock.patch.object(events.broker, "publish") as publish:
+            with self.captureOnCommitCallbacks(execute=True):
+                review = Review.objects.create(reviewer=self.user, rating=5, media=self.media_object, active=True)
+
+            publish.assert_not_called()
+
+            with mock.patch.object(events.broker, "has_subscribers", return_value=True):
+                with self.captureOnCommitCallbacks(execute=True):
+                    review.description = "Updated"
+                    review.save()
+                    self.media_object.save()
+                    review.delete()
+
+        event_types = [call.args[1] for call in publish.call_args_list]
+
+        self.assertEqual(event_types, ["review.updated", "media.rating", "review.deleted"])
+        self.assertEqual(publish.call_args_list[0].args[2]["description"], "Updated")
+
+    @override_settings(MEDIA_EVENTS_BACKEND="postgresql")
+    def test_postgres_relay(self):
+        """
+        Test that events are sent through NOTIFY and that notifications are dispatched to local subscribers.
+        """
+        with mock.patch("media_app.events.connection") as connection:
+            Review.objects.create(reviewer=self.user, rating=5, media=self.media_object, active=True)
+
+        cursor = connection.cursor.return_value.__enter__.return_value
+        channel, payload = cursor.execute.call_args.args[1]
+
+        self.assertEqual(channel, "media_events")
+
+        async def relay():
+            with mock.patch.object(events.relay, "listen", mock.AsyncMock()) as listen:
+                subscription = events.subscribe(self.media_object.id)
+                events.subscribe(self.media_object.id)
+                events.relay.dispatch(payload)
+                events.broker.resync_all()
+                await asyncio.sleep(0)
+                events.broker.unsubscribe(subscription)
+            return listen.call_count, [subscription.queue.get_nowait()["type"] for _ in range(2)]
+
+        self.assertEqual(asyncio.run(relay()), (1, ["review.created", "resync"]))
+
+
+class ReviewStreamViewTestCase(APITransactionTestCase):
+    """
+    Test case for the Server-Sent Events endpoint of reviews.
+    Streams look media up outside the request thread, so the media is committed for them to see it.
+    """
+
+    def setUp(self):
+        """
+        Set up a media object, and a broker without subscriptions left over from other tests.
+        """
+        cache.clear()
+        patcher = mock.patch("media_app.events.broker", events.EventBroker())
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.streaming_platform = StreamingPlatform.objects.create(
+            name="Test",
+            about="Test",
+            website="https://www.test.com"
+        )
+        self.media_object = Media.objects.create(
+            title="Test",
+            storyline="Test",
+            streaming_platform=self.streaming_platform,
+            user_rating=0,
+            active=True
+        )
+
+    async def test_stream(self):
+        """
+        Test that the stream is served as uncached Server-Sent Events starting with a retry hint, and does not hold an
+        admission slot while it is open.
+        """
+        from cinebase.admission import AdmissionController
+
+        controller = AdmissionController()
+        with mock.patch("cinebase.admission.controller", controller):
+            response = await self.async_client.get(reverse("review-stream", args=(self.media_object.id,)))
+
+        self.assertEqual(response["Content-Type"], "text/event-stream")
+        self.assertEqual(response["Cache-Control"], "no-cache")
+        self.assertEqual(await anext(response.streaming_content), b"retry: 5000\n\n")
+        self.assertEqual(controller.default.active, 0)
+
+    async def test_stream_holds_no_connection(self):
+        """
+        Test that the media is looked up outside the request thread, whose database connection is closed before the stream starts.
+        """
+        wrappers = []
+
+        def lookup(pk):
+            wrappers.append(connections[DEFAULT_DB_ALIAS])
+            return self.media_object
+
+        wrapper_class = type(connections[DEFAULT_DB_ALIAS])
+        with mock.patch.object(media_cache, "get", side_effect=lookup), mock.patch.object(wrapper_class, "close", autospec=True) as close:
+            response = await self.async_client.get(reverse("review-stream", args=(self.media_object.id,)))
+
+        self.assertEqual(await anext(response.streaming_content), b"retry: 5000\n\n")
+        self.assertEqual(len(wrappers), 1)
+        self.assertIsNot(wrappers[0], connections[DEFAULT_DB_ALIAS])
+        close.assert_called_once_with(wrappers[0])
+
+    async def test_stream_media_not_found(self):
+        """
+        Test that streaming an unknown media returns 404.
+        """
+        response = await self.async_client.get(reverse("review-stream", args=(999,)))
+
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class TrendingTestCase(APITestCase):
+    """
+    Test case for the trending and recently reviewed media rails.
+    """
+
+    def setUp(self):
+        """
+        Set up media objects with reviews, and unload the trending engine of previous tests.
+        """
+        cache.clear()
+        patcher = mock.patch.object(trending, "_engine", None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.user = User.objects.create_user(username="test_user", password="password")
+        self.other_user = User.objects.create_user(username="other_user", password="password")
+        self.streaming_platform = StreamingPlatform.objects.create(
+            name="Test",
+            about="Test",
+            website="https://www.test.com"
+        )
+        self.media_objects = [
+            Media.objects.create(
+                title=f"Test {index}",
+                storyline="Test",
+                streaming_platform=self.streaming_platform,
+                user_rating=0,
+                active=True
+            )
+            for index in range(3)
+        ]
+        Review.objects.create(reviewer=self.user, rating=5, media=self.media_objects[0], active=True)
+        Review.objects.create(reviewer=self.user, rating=2, media=self.media_objects[1], active=True)
+
+    def test_trending(self):
+        """
+        Test that trending media are ranked by rating-weighted reviews, including reviews written after loading.
+        """
+        response = self.client.get(reverse("media-trending"))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([media["id"] for media in response.data], [self.media_objects[0].id, self.media_objects[1].id])
+        self.assertAlmostEqual(response.data[0]["trending_score"], 5, places=3)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Review.objects.create(reviewer=self.user, rating=4, media=self.media_objects[2], active=True)
+            Review.objects.create(reviewer=self.other_user, rating=4, media=self.media_objects[2], active=True)
+
+        response = self.client.get(reverse("media-trending"), {"limit": 1})
+
+        self.assertEqual([media["id"] for media in response.data], [self.media_objects[2].id])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Review.objects.filter(media=self.media_objects[2]).delete()
+
+        response = self.client.get(reverse("media-trending"), {"limit": 1})
+
+        self.assertEqual([media["id"] for media in response.data], [self.media_objects[0].id])
+
+    def test_recently_reviewed(self):
+        """
+        Test that recently reviewed media are listed latest first, leaving out inactive media.
+        """
+        Media.all_objects.filter(pk=self.media_objects[0].pk).update(active=False)
+
+        response = self.client.get(reverse("media-recently-reviewed"))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([media["id"] for media in response.data], [self.media_objects[1].id])
+
+    def test_trending_limit(self):
+        """
+        Test that an invalid limit returns 400.
+        """
+        for limit in ("abc", 0, 101):
+            response = self.client.get(reverse("media-trending"), {"limit": limit})
+
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_engine_candidates(self):
+        """
+        Test that the candidate list stays exact when media drop out of it and when scores are rebased.
+        """
+        engine = trending.TrendingEngine(half_life=10.0, max_candidates=2, max_recent=2, landmark=0.0)
+        for media_id, rating in ((1, 5), (2, 4), (3, 3), (4, 2)):
+            engine.record(media_id, rating, 0.0)
+
+        self.assertEqual([media_id for media_id, _ in engine.top(2, now=0.0)], [1, 2])
+        self.assertEqual([media_id for media_id, _ in engine.recently_reviewed(3)], [4, 3])
+
+        engine.record(3, 3, 0.0)
+        engine.record(4, 1, -1.0)
+
+        self.assertEqual([media_id for media_id, _ in engine.top(2, now=0.0)], [3, 1])
+        self.assertEqual([media_id for media_id, _ in engine.recently_reviewed(3)], [3, 4])
+
+        engine.discard(1, 5, 0.0)
+        engine.discard(99, 5, 0.0)
+
+        self.assertEqual([media_id for media_id, _ in engine.top(2, now=0.0)], [3, 2])
+
+        engine.discard(3, 6, 0.0)
+        engine.discard(2, 4, 0.0)
+
+        self.assertEqual([media_id for media_id, _ in engine.top(2, now=0.0)], [4])
+
+        engine.record(4, 2, 1000.0)
+
+        self.assertEqual(engine.landmark, 1000.0)
+        self.assertEqual([media_id for media_id, _ in engine.top(1, now=1000.0)], [4])
+        self.assertAlmostEqual(engine.top(1, now=1010.0)[0][1], 1.0)
+
+
+
+class TrendingSnapshotTestCase(APITransactionTestCase):
+    """
+    Test case for trending snapshots, which are refreshed from the database on a background thread.
+    """
+
+    def setUp(self):
+        """
+        Set up media objects with reviews, a snapshot directory, and no trending engine loaded.
+        """
+        for patcher in (
+            mock.patch.object(trending, "_engine", None),
+            mock.patch.object(trending, "_last_snapshot", 0.0),
+            mock.patch.object(trending, "SNAPSHOT_LAG_SECONDS", 0),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, "trending.snapshot")
+
+        self.user = User.objects.create_user(username="test_user", password="password")
+        self.streaming_platform = StreamingPlatform.objects.create(
+            name="Test",
+            about="Test",
+            website="https://www.test.com"
+        )
+        self.media_objects = [
+            Media.objects.create(
+                title=f"Test {index}",
+                storyline="Test",
+                streaming_platform=self.streaming_platform,
+                user_rating=0,
+                active=True
+            )
+            for index in range(3)
+        ]
+        Review.objects.create(reviewer=self.user, rating=5, media=self.media_objects[0], active=True)
+
+    def test_snapshot(self):
+        """
+        Test that snapshots are refreshed periodically and loaded by a restarted process, which replays newer reviews.
+        """
+        with self.settings(TRENDING={"SNAPSHOT_PATH": self.path, "SNAPSHOT_SECONDS": 3600}):
+            trending.get_engine()
+            Review.objects.create(reviewer=self.user, rating=2, media=self.media_objects[1], active=True)
+
+            self.assertIsNone(trending.maybe_snapshot())
+
+            trending._last_snapshot = 0.0
+            trending.maybe_snapshot().join()
+
+            snapshot, saved = trending.TrendingEngine.load(self.path)
+
+            self.assertEqual([media_id for media_id, _ in snapshot.top(3)], [self.media_objects[0].id, self.media_objects[1].id])
+            self.assertEqual(snapshot.recently_reviewed(1)[0][0], self.media_objects[1].id)
+
+            with mock.patch("media_app.trending.time.time", return_value=saved):
+                trending.refresh_snapshot(self.path)
+
+            self.assertEqual(trending.TrendingEngine.load(self.path)[1], saved)
+
+            Review.objects.create(reviewer=self.user, rating=4, media=self.media_objects[2], active=True)
+            trending._engine = None
+            engine = trending.get_engine()
+
+        self.assertEqual([media_id for media_id, _ in engine.top(3)], [media_object.id for media_object in self.media_objects[::2] + self.media_objects[1:2]])
+
+    def test_snapshot_shared_path(self):
+        """
+        Test that a process snapshotting to the path another process used keeps the reviews only the other process saw.
+        """
+        with self.settings(TRENDING={"SNAPSHOT_PATH": self.path, "SNAPSHOT_SECONDS": 3600}):
+            first = trending.get_engine()
+            trending._engine = None
+            second = trending.get_engine()
+            Review.objects.create(reviewer=self.user, rating=4, media=self.media_objects[1], active=True)
+
+            self.assertEqual(len(first.top(3)), 1)
+            self.assertEqual(len(second.top(3)), 2)
+
+            for engine in (second, first):
+                trending._engine, trending._last_snapshot = engine, 0.0
+                trending.maybe_snapshot().join()
+            trending._engine = None
+            restarted = trending.get_engine()
+
+        self.assertEqual([media_id for media_id, _ in restarted.top(3)], [self.media_objects[0].id, self.media_objects[1].id])
+
+    def test_snapshot_refreshes_engine(self):
+        """
+        Test that refreshing the snapshot replaces the engine of the process with one counting the reviews written
+        through other processes, including the reviews newer than the snapshot, unless the process has no engine loaded.
+        """
+        with self.settings(TRENDING={"SNAPSHOT_PATH": self.path, "SNAPSHOT_SECONDS": 3600}):
+            engine = trending.get_engine()
+            trending._engine = None
+            Review.objects.create(reviewer=self.user, rating=4, media=self.media_objects[1], active=True)
+            trending._engine = engine
+
+            self.assertEqual(len(engine.top(3)), 1)
+
+            for lag in (3600, 0):
+                with self.subTest(lag=lag), mock.patch.object(trending, "SNAPSHOT_LAG_SECONDS", lag):
+                    trending._last_snapshot = 0.0
+                    trending.maybe_snapshot().join()
+
+                    self.assertIsNot(trending._engine, engine)
+                    self.assertEqual([media_id for media_id, _ in trending._engine.top(3)], [self.media_objects[0].id, self.media_objects[1].id])
+
+            trending._engine = None
+            trending.refresh_snapshot(self.path)
+
+        self.assertIsNone(trending._engine)
+
+
+class SimilarMediaTestCase(APITestCase):
+    """
+    Test case for the precomputed similar media.
+    """
+
+    def setUp(self):
+        """
+        Set up media objects reviewed by overlapping groups of users.
+        """
+        cache.clear()
+        self.users = [User.objects.create_user(username=f"user_{index}", password="password") for index in range(3)]
+        self.streaming_platform = StreamingPlatform.objects.create(
+            name="Test",
+            about="Test",
+            website="https://www.test.com"
+        )
+        self.media_objects = [
+            Media.objects.create(
+                title=f"Test {index}",
+                storyline="Test",
+                streaming_platform=self.streaming_platform,
+                user_rating=0,
+                active=True
+            )
+            for index in range(4)
+        ]
+        for user, media_index, rating in ((0, 0, 5), (0, 1, 5), (1, 0, 4), (1, 1, 4), (1, 2, 1), (2, 2, 5), (2, 3, 5)):
+            self.review(user, media_index, rating)
+
+    def review(self, user, media_index, rating):
+        """
+        Create a review of one of the media objects by one of the users.
+        """
+        return Review.objects.create(reviewer=self.users[user], rating=rating, media=self.media_objects[media_index], active=True)
+
+    def similar_ids(self, media_index):
+        """
+        Return the ids of the similar media listed for one of the media objects.
+        """
+        response = self.client.get(reverse("media-similar", args=(self.media_objects[media_index].id,)))
+        return [similar["similar"]["id"] for similar in response.data]
+
+    def test_similar_media(self):
+        """
+        Test that similar media are ranked by the cosine similarity of their ratings, leaving out inactive media.
+        """
+        call_command("refresh_similar_media", jobs=1, stdout=StringIO())
+
+        self.assertEqual(self.similar_ids(0), [self.media_objects[1].id, self.media_objects[2].id])
+        self.assertEqual(self.similar_ids(3), [self.media_objects[2].id])
+
+        response = self.client.get(reverse("media-similar", args=(self.media_objects[0].id,)))
+
+        self.assertAlmostEqual(response.data[0]["score"], 1.0, places=5)
+
+        Media.all_objects.filter(pk=self.media_objects[1].pk).update(active=False)
+
+        self.assertEqual(self.similar_ids(0), [self.media_objects[2].id])
+
+        call_command("refresh_similar_media", jobs=1, neighbours=1, full=True, stdout=StringIO())
+
+        self.assertEqual(SimilarMedia.objects.filter(media=self.media_objects[0]).count(), 1)
+
+    def test_refresh_incremental(self):
+        """
+        Test that an incremental refresh updates media whose reviews changed and the media they now resemble.
+        """
+        call_command("refresh_similar_media", jobs=1, stdout=StringIO())
+        self.review(2, 0, 5)
+        out = StringIO()
+
+        call_command("refresh_similar_media", jobs=1, stdout=out)
+
+        self.assertIn("Refreshed the similar media of 4 media.", out.getvalue())
+        self.assertEqual(self.similar_ids(3), [self.media_objects[2].id, self.media_objects[0].id])
+
+        for review in Review.objects.filter(media=self.media_objects[3]):
+            review.active = False
+            review.save()
+        call_command("refresh_similar_media", jobs=1, stdout=StringIO())
+
+        self.assertEqual(self.similar_ids(3), [])
+        self.assertNotIn(self.media_objects[3].id, self.similar_ids(2))
+
+    @tag("serial")
+    def test_refresh_parallel(self):
+        """
+        Test that blocks of media can be computed on several processes.
+        """
+        call_command("refresh_similar_media", jobs=2, block_size=1, full=True, stdout=StringIO())
+
+        self.assertEqual(self.similar_ids(0), [self.media_objects[1].id, self.media_objects[2].id])
+
+        Review.objects.all().delete()
+        call_command("refresh_similar_media", full=True, stdout=StringIO())
+
+        self.assertFalse(SimilarMedia.objects.exists())
+
+    def test_refresh_requires_numpy(self):
+        """
+        Test that the refresh fails with a clear error when numpy is not installed.
+        """
+        with mock.patch.dict(sys.modules, {"numpy": None}):
+            with self.assertRaises(CommandError):
+                call_command("refresh_similar_media", stdout=StringIO())
+
+
+class ObjectCacheTestCase(APITestCase):
+    """
+    Test case for the read-through object cache of media and streaming platforms.
+    """
+
+    def setUp(self):
+        """
+        Set up an admin user and a media object, with empty caches.
+        """
+        cache.clear()
+        media_cache.clear_local()
+        platform_cache.clear_local()
+        self.admin_user = User.objects.create_superuser(username="test_user_admin", password="password")
+        self.streaming_platform = StreamingPlatform.objects.create(
+            name="Test",
+            about="Test",
+            website="https://www.test.com"
+        )
+        self.media_object = Media.objects.create(
+            title="Test",
+            storyline="Test",
+            streaming_platform=self.streaming_platform,
+            user_rating=0,
+            active=True
+        )
+        self.url = reverse("media-detail", args=(self.media_object.id,))
+
+    def test_media_detail_cache_tiers(self):
+        """
+        Test that a media is loaded once, then served from the local tier, then from the shared tier once local entries are gone.
+        """
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url)
+
+        self.assertEqual(response["X-Cache"], "miss")
+
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url)
+
+        self.assertEqual(response["X-Cache"], "local")
+        self.assertEqual(response.data["title"], "Test")
+
+        media_cache.clear_local()
+
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url)
+
+        self.assertEqual(response["X-Cache"], "shared")
+
+    def test_media_detail_invalidated_on_save(self):
+        """
+        Test that saving or deleting a media drops it from the cache, and that entries written before a save are outdated once it commits.
+        """
+        self.client.get(self.url)
+        stale = cache.get(f"objects:media_app.media:{self.media_object.id}")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.media_object.title = "Updated"
+            self.media_object.save()
+
+        response = self.client.get(self.url)
+
+        self.assertEqual(response["X-Cache"], "miss")
+        self.assertEqual(response.data["title"], "Updated")
+
+        cache.set(f"objects:media_app.media:{self.media_object.id}", stale)
+        media_cache.clear_local()
+
+        self.assertEqual(media_cache.lookup(self.media_object.id)[1], "miss")
+
+        self.media_object.delete()
+
+        self.assertEqual(self.client.get(self.url).status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_media_detail_include_platform(self):
+        """
+        Test that the streaming platform is embedded from the cache on request, and refreshed when it is saved.
+        """
+        response = self.client.get(self.url, {"include": "platform"})
+
+        self.assertEqual(response.data["platform"]["name"], "Test")
+        self.assertNotIn("platform", self.client.get(self.url).data)
+
+        self.streaming_platform.name = "Updated"
+        self.streaming_platform.save()
+
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url, {"include": "platform"})
+
+        self.assertEqual(response.data["platform"]["name"], "Updated")
+
+    def test_invalidate_all(self):
+        """
+        Test that recomputing the weighted ratings outdates every cached media.
+        """
+        media_cache.get(self.media_object.id)
+
+        for _ in range(2):
+            with self.captureOnCommitCallbacks(execute=True):
+                call_command("recompute_weighted_ratings", stdout=StringIO())
+            media_cache.clear_local()
+
+            self.assertEqual(media_cache.lookup(self.media_object.id)[1], "miss")
+
+        self.assertEqual(cache.get("objects:media_app.media:generation"), 2)
+
+    def test_concurrent_version_bump(self):
+        """
+        Test that a version created concurrently by another process is still incremented.
+        """
+        with mock.patch("media_app.cache.shared_cache") as shared_cache:
+            shared_cache.incr.side_effect = [ValueError, 2]
+            shared_cache.add.return_value = False
+            with self.captureOnCommitCallbacks(execute=True):
+                media_cache.invalidate(self.media_object.id)
+
+        self.assertEqual(shared_cache.incr.call_count, 2)
+
+    def test_local_eviction_and_expiry(self):
+        """
+        Test that the local tier keeps at most max_entries objects, tracks their size and drops them once expired.
+        """
+        other = Media.objects.create(
+            title="Other",
+            storyline="Test",
+            streaming_platform=self.streaming_platform,
+            user_rating=0,
+            active=True
+        )
+        object_cache = ObjectCache(Media.objects.all(), max_entries=1)
+
+        self.assertIsNone(object_cache.report()["hit_ratio"])
+        self.assertEqual(set(object_cache.get_many([self.media_object.id, other.id, 0])), {self.media_object.id, other.id})
+
+        report = object_cache.report()
+
+        self.assertEqual((report["entries"], report["miss"]), (1, 3))
+        self.assertEqual(report["bytes"], len(object_cache.local[other.id][1]))
+        self.assertEqual(object_cache.lookup(other.id)[1], "local")
+
+        object_cache.local_timeout = -1
+        object_cache.clear_local()
+        object_cache.get_many([other.id])
+
+        self.assertEqual(object_cache.lookup(other.id)[1], "shared")
+        self.assertEqual(object_cache.report()["hit_ratio"], 0.5)
+
+    def test_cache_disabled(self):
+        """
+        Test that a disabled cache reads every object from the database.
+        """
+        object_cache = ObjectCache(Media.objects.all(), enabled=False)
+
+        with self.assertNumQueries(2):
+            self.assertEqual(object_cache.lookup(self.media_object.id), (self.media_object, "miss"))
+            self.assertEqual(object_cache.get_many([self.media_object.id]), {self.media_object.id: self.media_object})
+
+    def test_cache_stats(self):
+        """
+        Test that the cache counters are only reported to admin users.
+        """
+        url = reverse("media-cache-stats")
+
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_401_UNAUTHORIZED)
+
+        self.client.force_authenticate(self.admin_user)
+        self.client.get(self.url)
+        response = self.client.get(url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertGreaterEqual(response.data["media"]["miss"], 1)
+        self.assertIn("bytes", response.data["streaming_platforms"])
+        self.assertIn("coalesced_ratio", response.data["coalescing"])
+
+
+class ReviewPageCacheTestCase(APITestCase):
+    """
+    Test case for the cache of review list pages, versioned per media.
+    """
+
+    def setUp(self):
+        """
+        Set up two media objects, the first with more reviews than fit on a page, with an empty cache.
+        """
+        cache.clear()
+        self.user = User.objects.create_user(username="test_user", password="password")
+        self.streaming_platform = StreamingPlatform.objects.create(
+            name="Test",
+            about="Test",
+            website="https://www.test.com"
+        )
+        self.media_object, self.other = [
+            Media.objects.create(title=f"Test {index}", storyline="Test", streaming_platform=self.streaming_platform, user_rating=0, active=True)
+            for index in range(2)
+        ]
+        Review.objects.bulk_create(
+            Review(reviewer=self.user, reviewer_username=self.user.username, rating=4, description=f"Test {index}", media=self.media_object, active=True)
+            for index in range(25)
+        )
+        self.url = reverse("review-list", args=(self.media_object.id,))
+
+    def test_review_page_cache(self):
+        """
+        Test that a page is queried once per filter and page combination, then served with its pagination links without queries.
+        """
+        response = self.client.get(self.url)
+
+        self.assertEqual((response["X-Cache"], response.data["count"], len(response.data["results"])), ("miss", 25, 20))
+
+        with self.assertNumQueries(0):
+            cached = self.client.get(self.url, {"size": 20})
+
+        self.assertEqual(cached["X-Cache"], "shared")
+        self.assertEqual(cached.data["results"], response.data["results"])
+        self.assertEqual(cached.data["next"], f"http://testserver{self.url}?page=2&size=20")
+        self.assertIsNone(cached.data["previous"])
+
+        for params in ({"page": 2}, {"size": 5}, {"reviewer__username": "test_user"}, {"active": "true"}):
+            self.assertEqual(self.client.get(self.url, params)["X-Cache"], "miss")
+
+        with self.assertNumQueries(0):
+            last = self.client.get(self.url, {"page": 2})
+
+        self.assertEqual((len(last.data["results"]), last.data["next"]), (5, None))
+
+    def test_review_write_outdates_media_pages(self):
+        """
+        Test that a review write outdates every cached page of its media once committed, and only of its media.
+        """
+        other_url = reverse("review-list", args=(self.other.id,))
+        for url in (self.url, other_url):
+            self.client.get(url)
+            self.client.get(url, {"page": 2})
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Review.objects.create(reviewer=self.user, rating=5, description="New", media=self.media_object, active=True)
+
+        self.assertEqual(self.client.get(self.url)["X-Cache"], "miss")
+        self.assertEqual(self.client.get(self.url, {"page": 2}).data["count"], 26)
+        self.assertEqual(self.client.get(other_url)["X-Cache"], "shared")
+
+    def test_review_page_cache_disabled(self):
+        """
+        Test that pages are always queried when the cache is disabled, and that an unused cache has no hit ratio.
+        """
+        with mock.patch.object(review_page_cache, "enabled", False):
+            self.client.get(self.url)
+
+            self.assertEqual(self.client.get(self.url)["X-Cache"], "miss")
+
+        self.assertIsNone(ResultCache("test").report()["hit_ratio"])
+
+
+class CoalescingTestCase(APITestCase):
+    """
+    Test case for the coalescing of identical concurrent reads.
+    """
+
+    def setUp(self):
+        """
+        Set up a media object, with an empty cache.
+        """
+        cache.clear()
+        self.streaming_platform = StreamingPlatform.objects.create(
+            name="Test",
+            about="Test",
+            website="https://www.test.com"
+        )
+        self.media_object = Media.objects.create(title="Test", storyline="Test", streaming_platform=self.streaming_platform, user_rating=0, active=True)
+        self.url = reverse("media-detail", args=(self.media_object.id,))
+
+    def test_identical_requests_share_response(self):
+        """
+        Test that a request identical to one in flight answers with its response without queries, and that others run their view.
+        """
+        response = self.client.get(self.url)
+
+        self.assertNotIn("X-Coalesced", response)
+        self.assertEqual(flights.flights, {})
+
+        flight = Flight()
+        flight.result = (200, {"ETag": response["ETag"], "X-Cache": "miss"}, json.dumps(response.data))
+        flight.done.set()
+        key = coalescing_key(APIRequestFactory().get(self.url))
+        with mock.patch.dict(flights.flights, {key: flight}):
+            with self.assertNumQueries(0):
+                shared = self.client.get(self.url)
+            other = self.client.get(self.url, {"include": "platform"})
+
+        self.assertEqual((shared.status_code, shared["X-Coalesced"], shared["ETag"]), (200, "true", response["ETag"]))
+        self.assertEqual(shared.data, response.data)
+        self.assertNotIn("X-Coalesced", other)
+
+    def test_waiting_requests(self):
+        """
+        Test that requests waiting for a computation in flight share its result, and compute their own if it fails or takes too long.
+        """
+        single_flight = SingleFlight(wait_timeout=5)
+        flight = single_flight.flights["key"] = Flight()
+        compute = mock.Mock(return_value="computed")
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(single_flight.run("key", compute))) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        flight.result = "shared"
+        flight.done.set()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(results, ["shared"] * 4)
+        compute.assert_not_called()
+
+        flight.result = None
+        self.assertEqual(single_flight.run("key", compute), "computed")
+        single_flight.wait_timeout = 0
+        single_flight.flights["key"] = Flight()
+        self.assertEqual(single_flight.run("key", compute), "computed")
+        del single_flight.flights["key"]
+
+        self.assertEqual(single_flight.run("key", compute), "computed")
+        with self.assertRaises(ValueError):
+            single_flight.run("key", mock.Mock(side_effect=ValueError))
+
+        report = single_flight.report()
+        self.assertEqual((report["leader"], report["local"], report["timeouts"], report["in_flight"]), (4, 4, 1, 0))
+        self.assertEqual(report["coalesced_ratio"], 0.5)
+
+    def test_shared_flights(self):
+        """
+        Test that requests wait for the result of the worker holding the shared lock, and only while it holds it.
+        """
+        single_flight = SingleFlight(shared=True, wait_timeout=0.05, poll_interval=0.01)
+        compute = mock.Mock(return_value="computed")
+
+        self.assertEqual(single_flight.run("first", compute), "computed")
+        self.assertIsNone(cache.get("first:lock"))
+
+        cache.set_many({"second:lock": "token", "second:token": "shared"})
+        self.assertEqual(single_flight.run("second", compute), "shared")
+
+        cache.set("third:lock", "token")
+        self.assertEqual(single_flight.run("third", compute), "computed")
+        with mock.patch.object(cache, "get_many", return_value={}):
+            self.assertEqual(single_flight.run("third", compute), "computed")
+
+        with self.assertRaises(ValueError):
+            single_flight.run("fourth", mock.Mock(side_effect=ValueError))
+        self.assertIsNone(cache.get("fourth:lock"))
+        self.assertIsNone(single_flight.run("fifth", lambda: None))
+        with mock.patch.object(cache, "add", return_value=False):
+            self.assertEqual(single_flight.run("sixth", compute), "computed")
+
+        report = single_flight.report()
+        self.assertEqual((report["leader"], report["shared"], report["timeouts"]), (6, 1, 1))
+        self.assertEqual(compute.call_count, 4)
+
+    def test_server_errors_not_shared(self):
+        """
+        Test that server error responses are not shared, and that a disabled registry always computes.
+        """
+        class FailingView(APIView):
+            @coalesced
+            def get(self, request):
+                return Response({"Error": "Failed"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+        with mock.patch.object(flights, "run", side_effect=lambda key, compute: self.assertIsNone(compute())):
+            response = FailingView.as_view()(APIRequestFactory().get("/failing/"))
+
+        self.assertEqual(response.status_code, status.HTTP_500_INTERNAL_SERVER_ERROR)
+        self.assertEqual(SingleFlight(enabled=False).run("key", lambda: "computed"), "computed")
+        self.assertIsNone(SingleFlight().report()["coalesced_ratio"])
+
+
+class AnalyticsExportTestCase(APITransactionTestCase):
+    """
+    Test case for the columnar analytics exports. Rows are committed, so platforms can be exported on several threads.
+    """
+
+    def setUp(self):
+        """
+        Set up two streaming platforms with a media each, and reviews of both.
+        """
+        self.admin_user = User.objects.create_superuser(username="test_user_admin", password="password")
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.platforms = [
+            StreamingPlatform.objects.create(name=f"Test {index}", about="Test", website="https://www.test.com")
+            for index in range(2)
+        ]
+        self.media_objects = [
+            Media.objects.create(title=f"Test {index}", storyline="Test", streaming_platform=platform, user_rating=0, active=True)
+            for index, platform in enumerate(self.platforms)
+        ]
+        self.reviews = [
+            Review.objects.create(reviewer=self.admin_user, rating=rating, description="Test", media=media_object, active=True)
+            for rating, media_object in ((4, self.media_objects[0]), (5, self.media_objects[0]), (3, self.media_objects[1]))
+        ]
+
+    def export(self, **options):
+        """
+        Run the export command into the temporary directory and return its output.
+        """
+        out = StringIO()
+        call_command("export_analytics", self.directory.name, lag=0, stdout=out, **options)
+        return out.getvalue()
+
+    def test_export_full_and_incremental(self):
+        """
+        Test that every table is exported, reviews partitioned by platform, and that incremental exports only add updated reviews.
+        """
+        import pyarrow.dataset as ds
+        import pyarrow.parquet as pq
+
+        self.assertIn("Exported 2 streaming platforms, 2 media, 3 reviews", self.export(jobs=2))
+
+        media = pq.read_table(os.path.join(self.directory.name, "media"))
+
+        self.assertEqual(sorted(media.column("title").to_pylist()), ["Test 0", "Test 1"])
+
+        reviews = ds.dataset(os.path.join(self.directory.name, "reviews"), partitioning="hive").to_table()
+
+        self.assertEqual(sorted(reviews.column("rating").to_pylist()), [3, 4, 5])
+        self.assertEqual(sorted(reviews.column("platform").to_pylist()), sorted([self.platforms[0].id] * 2 + [self.platforms[1].id]))
+
+        self.reviews[2].description = "Edited"
+        self.reviews[2].save()
+
+        self.assertIn("1 reviews", self.export(jobs=1, incremental=True))
+        self.assertIn("0 reviews", self.export(jobs=1, incremental=True))
+
+        reviews = ds.dataset(os.path.join(self.directory.name, "reviews"), partitioning="hive").to_table()
+
+        self.assertEqual(reviews.filter(ds.field("id") == self.reviews[2].id).column("description").to_pylist(), ["Test", "Edited"])
+
+    def test_export_arrow(self):
+        """
+        Test that tables can be exported as Arrow IPC files, that a first incremental export exports every review, and that Parquet-only compressions are rejected.
+        """
+        import pyarrow as pa
+
+        self.assertIn("3 reviews", self.export(jobs=1, file_format="arrow", compression="lz4", incremental=True))
+        path = os.path.join(self.directory.name, "streaming_platforms", os.listdir(os.path.join(self.directory.name, "streaming_platforms"))[0])
+
+        with pa.ipc.open_file(path) as reader:
+            self.assertEqual(reader.read_all().column("name").to_pylist(), ["Test 0", "Test 1"])
+
+        with self.assertRaises(CommandError):
+            self.export(file_format="arrow", compression="snappy")
+
+    def test_export_endpoint(self):
+        """
+        Test that admins can stream a table as Arrow record batches or download it as Parquet, optionally since a time.
+        """
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        url = reverse("media-export", args=("reviews",))
+
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_401_UNAUTHORIZED)
+
+        self.client.force_authenticate(self.admin_user)
+        response = self.client.get(url)
+
+        self.assertEqual(response["Content-Type"], "application/vnd.apache.arrow.stream")
+        self.assertEqual(pa.ipc.open_stream(b"".join(response.streaming_content)).read_all().num_rows, 3)
+
+        since = (self.reviews[1].update - timedelta(microseconds=1)).isoformat()
+        response = self.client.get(url, {"output": "parquet", "since": since})
+
+        self.assertEqual(pq.read_table(BytesIO(b"".join(response.streaming_content))).column("rating").to_pylist(), [5, 3])
+
+    def test_export_errors(self):
+        """
+        Test that unknown tables, formats and times are rejected, and that exports fail clearly without pyarrow.
+        """
+        self.client.force_authenticate(self.admin_user)
+        url = reverse("media-export", args=("media",))
+
+        self.assertEqual(self.client.get(reverse("media-export", args=("users",))).status_code, status.HTTP_404_NOT_FOUND)
+
+        for params in ({"output": "csv"}, {"since": "2024-01-01T00:00:00Z"}):
+            self.assertEqual(self.client.get(url, params).status_code, status.HTTP_400_BAD_REQUEST)
+
+        url = reverse("media-export", args=("reviews",))
+
+        for since in ("yesterday", "2024-13-01T00:00:00"):
+            self.assertEqual(self.client.get(url, {"since": since}).status_code, status.HTTP_400_BAD_REQUEST)
+
+        with mock.patch.dict(sys.modules, {"pyarrow": None}), self.assertLogs("django.request", "ERROR"):
+            self.assertEqual(self.client.get(url).status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+
+            with self.assertRaises(CommandError):
+                self.export()
+
+
+@override_settings(CHANGE_LOG={"LAG": 0, "PAGE_SIZE": 500, "RETENTION_DAYS": 7})
+class ChangeFeedTestCase(APITestCase):
+    """
+    Test case for the change log of streaming platforms, media and reviews, and its feed.
+    """
+
+    def setUp(self):
+        """
+        Set up an admin user, a regular user and a media object, with an empty change log.
+        """
+        cache.clear()
+        self.admin_user = User.objects.create_superuser(username="test_user_admin", password="password")
+        self.regular_user = User.objects.create_user(username="test_user", password="password")
+        self.streaming_platform = StreamingPlatform.objects.create(
+            name="Test",
+            about="Test",
+            website="https://www.test.com"
+        )
+        self.media_object = Media.objects.create(
+            title="Test",
+            storyline="Test",
+            streaming_platform=self.streaming_platform,
+            user_rating=0,
+            active=True
+        )
+        self.url = reverse("media-changes")
+        self.client.force_authenticate(self.admin_user)
+
+    def read(self, since=0, **params):
+        """
+        Read a page of the change feed after the given sequence number.
+        """
+        response = self.client.get(self.url, {"since": since, **params})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data
+
+    def test_change_feed(self):
+        """
+        Test that writes are listed once per object in sequence order with their data, page by page, and deletions without data.
+        """
+        review_url = reverse("review-create", args=(self.media_object.id,))
+        self.client.force_authenticate(self.regular_user)
+        self.client.post(review_url, {"rating": 4, "description": "Test", "media": self.media_object.id}, format="json")
+        self.client.force_authenticate(self.admin_user)
+        review = Review.objects.get()
+
+        page = self.read()
+
+        self.assertEqual(
+            [(change["table"], change["id"], change["operation"]) for change in page["changes"]],
+            [("streaming_platforms", self.streaming_platform.id, "upsert"), ("reviews", review.id, "upsert"), ("media", self.media_object.id, "upsert")],
+        )
+        self.assertEqual(page["changes"][1]["data"]["reviewer"], "test_user")
+        self.assertEqual(page["changes"][2]["data"]["user_rating"], 1)
+        self.assertEqual(page["next"], page["changes"][-1]["seq"])
+        self.assertFalse(page["has_more"])
+
+        first = self.read(size=1)
+
+        self.assertEqual(([change["table"] for change in first["changes"]], first["has_more"]), (["streaming_platforms"], True))
+        self.assertEqual([change["table"] for change in self.read(first["next"])["changes"]], ["reviews", "media"])
+
+        self.client.force_authenticate(self.regular_user)
+        self.client.delete(reverse("review-detail", args=(review.id,)))
+        self.client.force_authenticate(self.admin_user)
+        Review.objects.create(reviewer=self.admin_user, rating=5, description="Test", media=self.media_object).delete()
+
+        changes = self.read(page["next"])["changes"]
+
+        self.assertEqual([(change["table"], change["operation"]) for change in changes], [("reviews", "delete"), ("media", "upsert"), ("reviews", "delete")])
+        self.assertIsNone(changes[0]["data"])
+        self.assertEqual(self.read(changes[-1]["seq"]), {"changes": [], "next": changes[-1]["seq"], "has_more": False})
+
+    def test_change_feed_bulk_writes(self):
+        """
+        Test that bulk and queryset writes, which bypass model signals, are recorded.
+        """
+        since = self.read()["next"]
+        response = self.client.post(reverse("media-bulk"), [
+            {"title": "New", "storyline": "Test", "streaming_platform": self.streaming_platform.id, "user_rating": 3},
+        ], format="json")
+        self.client.patch(reverse("media-bulk"), [{"id": self.media_object.id, "title": "Renamed"}], format="json")
+
+        changes = self.read(since)["changes"]
+
+        self.assertEqual([change["id"] for change in changes], [response.data["created"][0]["id"], self.media_object.id])
+        self.assertEqual(changes[1]["data"]["title"], "Renamed")
+
+        since = changes[-1]["seq"]
+        call_command("recompute_weighted_ratings", stdout=StringIO())
+
+        self.assertEqual(len(self.read(since)["changes"]), 2)
+
+    def test_change_feed_lag_and_errors(self):
+        """
+        Test that recent changes are held back for the lag, and that invalid reads are rejected.
+        """
+        with override_settings(CHANGE_LOG={"LAG": 60}):
+            self.assertEqual(self.read()["changes"], [])
+
+        for params in ({"since": "latest"}, {"since": -1}, {"size": 0}):
+            self.assertEqual(self.client.get(self.url, params).status_code, status.HTTP_400_BAD_REQUEST)
+
+        self.client.force_authenticate(self.regular_user)
+
+        self.assertEqual(self.client.get(self.url).status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_change_feed_open_transactions(self):
+        """
+        Test that on PostgreSQL, changes written after the oldest open write transaction started are held back until it ends.
+        """
+        self.assertIsNone(oldest_open_write())
+
+        with mock.patch("media_app.changes.connection") as connection:
+            connection.vendor = "postgresql"
+            cursor = connection.cursor.return_value.__enter__.return_value
+            cursor.fetchone.return_value = (timezone.now() - timedelta(minutes=1),)
+
+            self.assertEqual(self.read()["changes"], [])
+            self.assertIn("pg_stat_activity", cursor.execute.call_args.args[0])
+
+            cursor.fetchone.return_value = (None,)
+
+            self.assertEqual(
+                [(change["table"], change["id"]) for change in self.read()["changes"]],
+                [("streaming_platforms", self.streaming_platform.id), ("media", self.media_object.id)],
+            )
+
+    def test_compact_changes(self):
+        """
+        Test that compaction keeps the latest change of every object, and drops deletions once they are older than the retention.
+        """
+        for title in ("First", "Second"):
+            self.media_object.title = title
+            self.media_object.save()
+        Review.objects.create(reviewer=self.admin_user, rating=5, description="Test", media=self.media_object).delete()
+        out = StringIO()
+
+        call_command("compact_changes", batch_size=2, stdout=out)
+
+        self.assertEqual(out.getvalue(), "Deleted 3 changes from the change log.\n")
+        self.assertEqual(
+            list(Change.objects.order_by("id").values_list("table", "operation")),
+            [("streaming_platforms", "upsert"), ("media", "upsert"), ("reviews", "delete")],
+        )
+        self.assertEqual(self.read()["changes"][1]["data"]["title"], "Second")
+
+        call_command("compact_changes", retention_days=0, stdout=out)
+
+        self.assertEqual(Change.objects.count(), 2)
+
+        Change.objects.all().delete()
+        call_command("compact_changes", stdout=out)
+
+        self.assertTrue(out.getvalue().endswith("Deleted 0 changes from the change log.\n"))
+
+
+class ProfilingTestCase(APITestCase):
+    """
+    Test case for the request profiling middleware and the profile report.
+    """
+
+    def setUp(self):
+        """
+        Set up an admin user and a regular user, with profiling enabled into a temporary directory.
+        """
+        cache.clear()
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.enterContext(override_settings(PROFILING={"ENABLED": True, "SAMPLE_RATE": 0, "DIRECTORY": self.directory.name}))
+        self.admin_user = User.objects.create_superuser(username="test_user_admin", password="password")
+        self.regular_user = User.objects.create_user(username="test_user", password="password")
+        self.url = reverse("streaming_platform-list")
+
+    def metadata(self, response):
+        """
+        Return the saved metadata of the profile of a response.
+        """
+        with open(os.path.join(self.directory.name, response["X-Profile-Id"] + ".meta.json")) as metadata_file:
+            return json.load(metadata_file)
+
+    def test_profile_header(self):
+        """
+        Test that requests of admin users, authenticated by token or session, are profiled on demand, and others are
+        not, even with the session of an admin user when their token is another user's.
+        """
+        token = Token.objects.get(user=self.admin_user)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {token.key}")
+        response = self.client.get(self.url, HTTP_X_PROFILE="cprofile")
+        metadata = self.metadata(response)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual((metadata["view"], metadata["user"], metadata["trigger"]), ("streaming_platform-list", self.admin_user.id, "header"))
+        self.assertTrue(os.path.exists(os.path.join(self.directory.name, metadata["file"])))
+
+        self.client.credentials()
+        self.client.force_login(self.admin_user)
+
+        self.assertIn("X-Profile-Id", self.client.get(self.url, HTTP_X_PROFILE="cprofile"))
+
+        self.client.logout()
+        token = Token.objects.get(user=self.regular_user)
+        for authorization in (f"Token {token.key}", "Token invalid", None):
+            self.client.credentials(**({"HTTP_AUTHORIZATION": authorization} if authorization else {}))
+
+            self.assertNotIn("X-Profile-Id", self.client.get(self.url, HTTP_X_PROFILE="cprofile"))
+
+        self.assertNotIn("X-Profile-Id", self.client.get(self.url))
+
+        self.client.force_login(self.admin_user)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {token.key}")
+
+        self.assertNotIn("X-Profile-Id", self.client.get(self.url, HTTP_X_PROFILE="cprofile"))
+
+    def test_profile_sampling(self):
+        """
+        Test that sampled requests are profiled with the default profiler, in speedscope format for the sampling profiler,
+        recording the user authenticated by their token outside of the API views too.
+        """
+        options = {"ENABLED": True, "SAMPLE_RATE": 1, "PROFILER": "sampling", "DIRECTORY": self.directory.name}
+        token = Token.objects.get(user=self.regular_user)
+        with override_settings(PROFILING=options):
+            self.client = self.client_class()
+            response = self.client.get("/api/missing/", HTTP_AUTHORIZATION=f"Token {token.key}")
+        metadata = self.metadata(response)
+
+        self.assertEqual((metadata["status"], metadata["view"], metadata["trigger"]), (404, None, "sample"))
+        self.assertEqual(metadata["user"], self.regular_user.id)
+
+        with open(os.path.join(self.directory.name, metadata["file"])) as profile_file:
+            self.assertEqual(json.load(profile_file)["exporter"], "pyinstrument")
+
+        with mock.patch.dict(sys.modules, {"pyinstrument": None}), self.assertLogs("cinebase.profiling", "WARNING"):
+            self.client.force_login(self.admin_user)
+            response = self.client.get(self.url, HTTP_X_PROFILE="sampling")
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotIn("X-Profile-Id", response)
+
+    def test_profiling_disabled(self):
+        """
+        Test that the middleware removes itself from the middleware chain when profiling is disabled.
+        """
+        from django.core.exceptions import MiddlewareNotUsed
+
+        from cinebase.profiling import ProfilingMiddleware
+
+        with override_settings(PROFILING={"ENABLED": False}), self.assertRaises(MiddlewareNotUsed):
+            ProfilingMiddleware(lambda request: None)
+
+    def test_profile_report(self):
+        """
+        Test that cProfile profiles are aggregated per view or path, sampling profiles listed, and profiles deleted on request.
+        """
+        self.client.force_login(self.admin_user)
+        for _ in range(2):
+            self.client.get(self.url, HTTP_X_PROFILE="cprofile")
+        out = StringIO()
+
+        call_command("profile_report", sort="tottime", limit=5, stdout=out)
+
+        self.assertIn("2 profiled requests", out.getvalue())
+        self.assertIn("function calls", out.getvalue())
+        self.assertNotIn("speedscope", out.getvalue())
+
+        self.client.get(self.url, HTTP_X_PROFILE="sampling")
+        self.client.get(reverse("media-list"), HTTP_X_PROFILE="sampling")
+        out = StringIO()
+        call_command("profile_report", view="media-list", stdout=out)
+
+        self.assertIn("1 profiled requests", out.getvalue())
+        self.assertIn(".speedscope.json", out.getvalue())
+        self.assertNotIn("function calls", out.getvalue())
+
+        out = StringIO()
+        call_command("profile_report", path="/api/media/streaming_platform/", delete=True, stdout=out)
+
+        self.assertIn("3 profiled requests", out.getvalue())
+        self.assertIn("Deleted 3 profiles.", out.getvalue())
+        self.assertEqual(len(os.listdir(self.directory.name)), 2)
+
+        with self.assertRaises(CommandError):
+            call_command("profile_report", directory=os.path.join(self.directory.name, "missing"))
+
+
+@override_settings(ACCESS_LOG={"ENABLED": True, "SAMPLE_RATE": 1.0, "SAMPLE_RATES": {"review-list": 0}, "SLOW_MS": 1000})
+class AccessLogTestCase(APITestCase):
+    """
+    Test case for the structured access log and its analyzer.
+    """
+
+    def setUp(self):
+        """
+        Set up an admin user authenticated by token and a media object, with empty caches.
+        """
+        cache.clear()
+        media_cache.clear_local()
+        platform_cache.clear_local()
+        self.admin_user = User.objects.create_superuser(username="test_user_admin", password="password")
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {Token.objects.get(user=self.admin_user).key}")
+        self.streaming_platform = StreamingPlatform.objects.create(
+            name="Test",
+            about="Test",
+            website="https://www.test.com"
+        )
+        self.media_object = Media.objects.create(
+            title="Test",
+            storyline="Test",
+            streaming_platform=self.streaming_platform,
+            user_rating=0,
+            active=True
+        )
+
+    def test_access_log_fields(self):
+        """
+        Test that a line records the route, user, status, latency, database cost, size and cache status of each request.
+        """
+        url = reverse("media-detail", args=(self.media_object.id,))
+        with self.assertLogs("cinebase.access", "INFO") as logs:
+            response = self.client.get(url)
+            self.client.get(url)
+            self.client.get(reverse("review-list", args=(self.media_object.id,)))
+            self.client.credentials()
+            self.client.get("/api/missing/")
+        first, second, missing = [record.fields for record in logs.records]
+
+        self.assertEqual(logs.records[0].getMessage(), f"GET {url} 200")
+        self.assertEqual(
+            {key: first[key] for key in ("route", "user", "status", "bytes", "cache", "sampled")},
+            {"route": "media-detail", "user": self.admin_user.id, "status": 200, "bytes": len(response.content), "cache": "miss", "sampled": True},
+        )
+        self.assertEqual((second["cache"], second["queries"]), ("local", first["queries"] - 1))
+        self.assertGreater(first["latency_ms"], first["query_ms"])
+        self.assertEqual((missing["route"], missing["user"], missing["status"]), (None, None, 404))
+
+    def test_access_log_unsampled_errors_and_slow_requests(self):
+        """
+        Test that requests of a route sampled out are still logged when they fail or are slow.
+        """
+        url = reverse("review-list", args=(self.media_object.id,))
+        self.client.raise_request_exception = False
+        with self.assertLogs("cinebase.access", "INFO") as logs, self.assertLogs("django.request", "ERROR"):
+            with mock.patch.object(ReviewList, "get_queryset", side_effect=RuntimeError):
+                self.client.get(url)
+            with override_settings(ACCESS_LOG={"ENABLED": True, "SAMPLE_RATES": {"review-list": 0.5}, "SLOW_MS": 0}):
+                self.client = self.client_class()
+                with mock.patch("cinebase.access_log.random.random", return_value=0.9):
+                    self.client.get(url)
+
+        self.assertEqual([(record.fields["status"], record.fields["sampled"]) for record in logs.records], [(500, False), (200, False)])
+        self.assertEqual(logs.records[1].fields["sample_rate"], 0.5)
+
+    def test_access_log_async(self):
+        """
+        Test that requests to async views are logged, with the queries their ORM calls run in other threads.
+        """
+        from django.utils.functional import SimpleLazyObject
+
+        from cinebase.access_log import AccessLogMiddleware
+
+        async def view(request):
+            await ArchivedReview.objects.aexists()
+            return JsonResponse({})
+
+        middleware = AccessLogMiddleware(view)
+        request = APIRequestFactory().get("/stream/")
+        request.user = SimpleLazyObject(lambda: self.admin_user)
+
+        with self.assertLogs("cinebase.access", "INFO") as logs:
+            asyncio.run(middleware(request))
+            str(request.user)
+            asyncio.run(middleware(request))
+
+        self.assertEqual([(record.fields["queries"], record.fields["user"]) for record in logs.records], [(1, None), (1, self.admin_user.id)])
+
+    def test_access_log_disabled(self):
+        """
+        Test that the middleware removes itself from the middleware chain when the access log is disabled.
+        """
+        from django.core.exceptions import MiddlewareNotUsed
+
+        from cinebase.access_log import AccessLogMiddleware
+
+        with override_settings(ACCESS_LOG={"ENABLED": False}), self.assertRaises(MiddlewareNotUsed):
+            AccessLogMiddleware(lambda request: None)
+
+    def test_background_handler(self):
+        """
+        Test that records are written as JSON lines by the background thread, and dropped rather than blocking when the queue is full.
+        """
+        import logging
+        import queue
+
+        from cinebase.access_log import BackgroundHandler, JsonFormatter
+
+        out = StringIO()
+        handler = BackgroundHandler(stream=out)
+        handler.setFormatter(JsonFormatter())
+        record = logging.LogRecord("cinebase.access", logging.INFO, __file__, 1, "GET %s", ("/",), None)
+        record.fields = {"status": 200}
+        handler.handle(record)
+        try:
+            raise ValueError("Test")
+        except ValueError:
+            handler.handle(logging.LogRecord("cinebase", logging.ERROR, __file__, 1, "Failed", (), sys.exc_info()))
+        with mock.patch.object(handler.queue, "put_nowait", side_effect=queue.Full):
+            handler.handle(record)
+        handler.close()
+        handler.close()
+        first, second = [json.loads(line) for line in out.getvalue().splitlines()]
+
+        self.assertEqual((first["message"], first["status"], first["logger"]), ("GET /", 200, "cinebase.access"))
+        self.assertIn("ValueError: Test", second["exception"])
+        self.assertEqual(handler.dropped, 1)
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "access.log")
+            handler = BackgroundHandler(filename=path)
+            handler.handle(record)
+            handler.close()
+
+            with open(path) as log_file:
+                self.assertEqual(log_file.read(), "GET /\n")
+
+    def test_analyze_access_log(self):
+        """
+        Test that the analyzer reports per-route counts scaled by sample rate, latency percentiles and errors, ignoring other lines.
+        """
+        def line(route, latency_ms, status_code=200, sample_rate=1.0, sampled=True):
+            return json.dumps({
+                "logger": "cinebase.access", "route": route, "status": status_code, "latency_ms": latency_ms,
+                "queries": 2, "query_ms": 1.0, "sample_rate": sample_rate, "sampled": sampled,
+            })
+
+        lines = [line("media-detail", latency) for latency in range(1, 101)]
+        lines += [line("review-list", 10, sample_rate=0.1), line("review-list", 5000, status_code=500, sample_rate=0.1, sampled=False)]
+        lines += [line(None, 3, status_code=404), json.dumps({"logger": "django.request"}), "Traceback (most recent call last):"]
+        out = StringIO()
+
+        with tempfile.NamedTemporaryFile("w", suffix=".log") as log_file:
+            log_file.write("\n".join(lines))
+            log_file.flush()
+            call_command("analyze_access_log", log_file.name, sort="requests", stdout=out)
+
+        report = out.getvalue().splitlines()
+
+        self.assertTrue(report[0].startswith("route"))
+        self.assertEqual(report[1].split()[:5], ["media-detail", "100", "50.0", "95.0", "99.0"])
+        self.assertEqual(report[2].split()[:2], ["review-list", "10"])
+        self.assertEqual(report[2].split()[-1], "1")
+        self.assertEqual(report[3].split()[0], "(unresolved)")
+        self.assertEqual(report[4], "Skipped 1 lines that are not JSON.")
+
+        out = StringIO()
+        with mock.patch("sys.stdin", StringIO(line("review-list", 5000, status_code=500, sampled=False))):
+            call_command("analyze_access_log", "-", stdout=out)
+
+        self.assertEqual(out.getvalue().splitlines()[1].split()[1:3], ["0", "0.0"])
+
+        for path in ("missing.log", "-"):
+            with mock.patch("sys.stdin", StringIO()), self.assertRaises(CommandError):
+                call_command("analyze_access_log", path)
+
+
+class AdmissionTestCase(APITestCase):
+    """
+    Test case for admission control and load shedding.
+    """
+
+    def setUp(self):
+        """
+        Set up an admin user and a regular user authenticated by token, with an empty cache.
+        """
+        cache.clear()
+        self.admin_user = User.objects.create_superuser(username="test_user_admin", password="password")
+        self.user = User.objects.create_user(username="test_user", password="password")
+        self.token = Token.objects.get(user=self.user)
+
+    def wait_until(self, condition):
+        deadline = timezone.now() + timedelta(seconds=5)
+        while not condition():
+            self.assertLess(timezone.now(), deadline)
+            threading.Event().wait(0.001)
+
+    def test_pool_priorities(self):
+        """
+        Test that anonymous reads leave the reserved slots to priority requests, and that queued priority requests are admitted first.
+        """
+        from cinebase.admission import HIGH, LOW, Pool
+
+        pool = Pool("test", 4, reserved=0.25, queue_size=2)
+
+        self.assertEqual([pool.acquire(LOW, 0) for _ in range(4)], [True, True, True, False])
+        self.assertEqual([pool.acquire(HIGH, 0) for _ in range(2)], [True, False])
+
+        results = {}
+        threads = {priority: threading.Thread(target=lambda priority=priority: results.update({priority: pool.acquire(priority, 5)})) for priority in (LOW, HIGH)}
+        threads[LOW].start()
+        self.wait_until(lambda: pool.waiting[LOW])
+        threads[HIGH].start()
+        self.wait_until(lambda: pool.waiting[HIGH])
+
+        self.assertFalse(pool.acquire(LOW, 5))
+
+        pool.release()
+        threads[HIGH].join()
+
+        self.assertEqual(results, {HIGH: True})
+
+        pool.release()
+        pool.release()
+        threads[LOW].join()
+
+        self.assertEqual(results, {HIGH: True, LOW: True})
+        self.assertTrue(pool.acquire(HIGH, 0))
+        self.assertFalse(pool.acquire(HIGH, 0.01))
+
+        report = pool.report()
+        self.assertEqual((report["active"], report["waiting"]), (4, {HIGH: 0, LOW: 0}))
+        self.assertEqual({key: report[HIGH][key] for key in ("admitted", "queued", "rejected", "timeouts")}, {"admitted": 3, "queued": 1, "rejected": 1, "timeouts": 1})
+        self.assertEqual({key: report[LOW][key] for key in ("admitted", "queued", "rejected", "timeouts")}, {"admitted": 4, "queued": 1, "rejected": 2, "timeouts": 0})
+
+    def test_overloaded_route_sheds_requests(self):
+        """
+        Test that requests to a full pool get 503 with Retry-After, that other routes are not affected, and that slots are given back.
+        """
+        from cinebase.admission import HIGH, AdmissionController
+
+        controller = AdmissionController(limit=2, routes={"media-list": 1}, queue_timeout=0, low_priority_queue_timeout=0, retry_after=3)
+        url = reverse("media-list")
+
+        with mock.patch("cinebase.admission.controller", controller):
+            controller.pool("media-list").acquire(HIGH, 0)
+            with self.assertNoLogs("django.request"):
+                shed = [self.client.get(url), self.client.post(url, {}), self.client.get(url, HTTP_AUTHORIZATION=f"Token {self.token.key}")]
+            other = self.client.get(reverse("streaming_platform-list"))
+            controller.pool("media-list").release()
+            admitted = self.client.get(url)
+
+        self.assertEqual([response.status_code for response in shed], [status.HTTP_503_SERVICE_UNAVAILABLE] * 3)
+        self.assertEqual((shed[0]["Retry-After"], shed[0].json()), ("3", {"Error": "The service is overloaded, retry later"}))
+        self.assertEqual((other.status_code, admitted.status_code), (status.HTTP_200_OK, status.HTTP_200_OK))
+        report = controller.report()
+        self.assertEqual((report["media-list"]["active"], report["default"]["active"]), (0, 0))
+        self.assertEqual((report["media-list"]["low"]["rejected"], report["media-list"]["high"]["rejected"]), (1, 2))
+
+    def test_streaming_response_holds_slot(self):
+        """
+        Test that a streaming response keeps its slot until its content is sent and it is closed.
+        """
+        from cinebase.admission import AdmissionController
+
+        controller = AdmissionController(routes={"media-export": 2}, queue_timeout=0, low_priority_queue_timeout=0)
+        pool = controller.pool("media-export")
+        self.client.force_authenticate(self.admin_user)
+
+        with mock.patch("cinebase.admission.controller", controller):
+            response = self.client.get(reverse("media-export", args=("media",)))
+
+            self.assertEqual((response.status_code, pool.active), (status.HTTP_200_OK, 1))
+
+            b"".join(response.streaming_content)
+
+            self.assertEqual(pool.active, 0)
+
+    async def test_async_admission(self):
+        """
+        Test that under ASGI requests are admitted on the event loop, that requests queueing for a slot do not block it,
+        and that a queued request cancelled by its client disconnecting never takes a slot.
+        """
+        from asgiref.sync import iscoroutinefunction
+
+        from cinebase.admission import HIGH, LOW, AdmissionController, AdmissionMiddleware
+
+        async def get_response(request):
+            return JsonResponse({})
+
+        def request(method="get"):
+            request = getattr(APIRequestFactory(), method)(reverse("media-list"))
+            request.resolver_match = resolve(request.path)
+            return request
+
+        controller = AdmissionController(limit=1, reserved=0, queue_timeout=5, low_priority_queue_timeout=0)
+        middleware = AdmissionMiddleware(get_response)
+
+        self.assertTrue(iscoroutinefunction(middleware))
+        self.assertTrue(iscoroutinefunction(middleware.process_view))
+
+        with mock.patch("cinebase.admission.controller", controller):
+            admitted = request()
+            self.assertIsNone(await middleware.process_view(admitted, None, (), {}))
+
+            shed = await middleware.process_view(request(), None, (), {})
+            self.assertEqual(shed.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+
+            queued_request = request("post")
+            queued = asyncio.ensure_future(middleware.process_view(queued_request, None, (), {}))
+            pool = controller.pool("media-list")
+            while not pool.waiting[HIGH]:
+                await asyncio.sleep(0.001)
+            await middleware(admitted)
+
+            self.assertIsNone(await queued)
+            self.assertEqual(pool.report()["active"], 1)
+
+            cancelled = asyncio.ensure_future(middleware.process_view(request("post"), None, (), {}))
+            while not pool.waiting[HIGH]:
+                await asyncio.sleep(0.001)
+            cancelled.cancel()
+
+            with self.assertRaises(asyncio.CancelledError):
+                await cancelled
+            self.assertFalse(await pool.aacquire(LOW, 0.01))
+
+            await middleware(queued_request)
+
+            self.assertEqual((pool.active, pool.waiting), (0, {HIGH: 0, LOW: 0}))
+
+    def test_admission_stats(self):
+        """
+        Test that the admission counters are only reported to admin users.
+        """
+        url = reverse("admission-stats")
+
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_401_UNAUTHORIZED)
+
+        self.client.force_authenticate(self.admin_user)
+        response = self.client.get(url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.data["enabled"])
+        self.assertEqual(response.data["pools"]["media-list"]["limit"], 8)
+        self.assertGreaterEqual(response.data["pools"]["default"]["low"]["admitted"], 2)
+
+    def test_admission_disabled(self):
+        """
+        Test that the middleware removes itself from the middleware chain when admission control is disabled.
+        """
+        from django.core.exceptions import MiddlewareNotUsed
+
+        from cinebase.admission import AdmissionMiddleware
+
+        with override_settings(ADMISSION={"ENABLED": False}), self.assertRaises(MiddlewareNotUsed):
+            AdmissionMiddleware(lambda request: None)
+
+
+class SeedDatasetTestCase(APITestCase):
+    """
+    Test case for the seed dataset of the performance tests.
+    """
+
+    def test_seed_dataset(self):
+        """
+        Test that the dataset is inserted once, with distinct reviewers per media and ratings matching the reviews.
+        """
+        out = StringIO()
+        call_command("seed_dataset", users=5, platforms=2, media=4, reviews_per_media=3, stdout=out)
+
+        self.assertEqual(out.getvalue(), "Inserted the seed dataset.\n")
+        self.assertEqual((User.objects.count(), StreamingPlatform.objects.count(), Media.all_objects.count(), Review.objects.count()), (5, 2, 4, 12))
+        for media_object in Media.all_objects.all():
+            reviews = Review.objects.filter(media=media_object)
+            ratings = [review.rating for review in reviews]
+            self.assertEqual(len({review.reviewer_username for review in reviews}), 3)
+            self.assertEqual((media_object.user_rating, media_object.avg_rating), (3, sum(ratings) / 3))
+            self.assertEqual(media_object.rating_histogram, {str(rating): ratings.count(rating) for rating in range(1, 6)})
+
+        out = StringIO()
+        call_command("seed_dataset", stdout=out)
+
+        self.assertEqual(out.getvalue(), "The database already has the seed dataset.\n")
+        self.assertEqual(Review.objects.count(), 12)
+
+
+@tag("seeded")
+class SeededPerformanceTestCase(APITestCase):
+    """
+    Performance tests against the seed dataset, run by `manage.py test --seeded`.
+    """
+
+    def setUp(self):
+        """
+        Set up the most reviewed active media of the dataset, with an empty cache.
+        """
+        cache.clear()
+        self.media_object = Media.objects.order_by("-user_rating", "id").first()
+
+    def test_review_list_queries(self):
+        """
+        Test that a page of reviews takes a count and a page query however many reviews and users there are.
+        """
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse("review-list", args=(self.media_object.id,)))
+
+        self.assertEqual(response.data["count"], self.media_object.user_rating)
+        self.assertTrue(all(review["reviewer"].startswith("seed_") for review in response.data["results"]))
+
+    def test_media_list_queries(self):
+        """
+        Test that the full media list, sorted by weighted rating, takes a single query.
+        """
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse("media-list"), {"ordering": "-weighted_rating"})
+
+        self.assertEqual(len(response.data), Media.objects.count())
+        self.assertEqual(response.data[0]["id"], Media.objects.order_by("-weighted_rating").first().id)
+
+    def test_user_reviews_queries(self):
+        """
+        Test that a page of a user's reviews takes a user query and a page query.
+        """
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse("reviews-user"), {"username": "seed_0"})
+
+        self.assertTrue(response.data["results"])
+        self.assertEqual({review["reviewer"] for review in response.data["results"]}, {"seed_0"})
+
+
+class StartupReportTestCase(APITestCase):
+    """
+    Test case for the startup report helpers.
+    """
+
+    def test_parse_import_times(self):
+        """
+        Test that the import tree is rebuilt from the post-order output of -X importtime.
+        """
+        stderr = "\n".join([
+            "import time: self [us] | cumulative | imported package",
+            "import time:       100 |        100 |     child.grandchild",
+            "import time:       200 |        300 |   child",
+            "import time:        50 |        350 | parent",
+            "import time:        10 |         10 | sibling",
+        ])
+
+        parent, sibling = parse_import_times(stderr)
+
+        self.assertEqual((parent.name, parent.cumulative_us), ("parent", 350))
+        self.assertEqual(parent.children[0].name, "child")
+        self.assertEqual(parent.children[0].children[0].name, "child.grandchild")
+        self.assertEqual(sibling.children, [])
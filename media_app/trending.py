@@ -0,0 +1,299 @@
+"""
+Trending and recently reviewed media, ranked in memory from review events.
+
+Scores use forward decay: a review adds `rating * 2 ** ((created - landmark) / half_life)` to its media,
+so stored scores never have to be decayed in place and the ranking only changes when a review is recorded.
+The current score of a media is its stored score scaled by `2 ** ((landmark - now) / half_life)`.
+"""
+
+import heapq
+import itertools
+import json
+import os
+import tempfile
+import threading
+import time
+from array import array
+from bisect import bisect_left, insort
+from collections import OrderedDict
+from datetime import datetime, timezone
+
+from django.conf import settings
+from django.db import connection
+
+from media_app.models import Review
+
+# Scores are rebased on a new landmark before the growth factor can lose precision or overflow.
+RENORMALIZE_AFTER_HALF_LIVES = 64
+
+
+class TrendingEngine:
+    """
+    Time-decayed review scores of every media, kept in a flat array of doubles indexed by media id.
+    The highest scores are mirrored in a sorted candidate list, so the top k are read in O(k).
+    """
+
+    def __init__(self, half_life=86400.0, max_candidates=1000, max_recent=1000, landmark=None):
+        self.half_life = half_life
+        self.max_candidates = max_candidates
+        self.max_recent = max_recent
+        self.landmark = time.time() if landmark is None else landmark
+        self.scores = array("d")
+        # Ascending (score, media_id) pairs. Every media outside the list scores at most `outside_max`,
+        # and every candidate scores at least that much.
+        self.candidates = []
+        self.outside_max = 0.0
+        self.recent = OrderedDict()
+        self.lock = threading.Lock()
+
+    def _weight(self, rating, timestamp):
+        return rating * 2.0 ** ((timestamp - self.landmark) / self.half_life)
+
+    def _decay(self, now):
+        return 2.0 ** ((self.landmark - now) / self.half_life)
+
+    def _grow(self, media_id):
+        if media_id >= len(self.scores):
+            self.scores.frombytes(bytes(self.scores.itemsize * (media_id + 1 - len(self.scores))))
+
+    def _renormalize(self, landmark):
+        factor = 2.0 ** ((self.landmark - landmark) / self.half_life)
+        self.scores = array("d", (score * factor for score in self.scores))
+        self.candidates = [(score * factor, media_id) for score, media_id in self.candidates]
+        self.outside_max *= factor
+        self.landmark = landmark
+
+    def _rebuild_candidates(self):
+        ranked = heapq.nlargest(
+            self.max_candidates + 1,
+            ((score, media_id) for media_id, score in enumerate(self.scores) if score > 0),
+        )
+        self.outside_max = ranked.pop()[0] if len(ranked) > self.max_candidates else 0.0
+        self.candidates = ranked[::-1]
+
+    def _remove_candidate(self, media_id, score):
+        index = bisect_left(self.candidates, (score, media_id))
+        if index < len(self.candidates) and self.candidates[index] == (score, media_id):
+            del self.candidates[index]
+            return True
+        return False
+
+    def _rerank(self, media_id, old, new):
+        was_candidate = old > 0 and self._remove_candidate(media_id, old)
+
+        if new > old:
+            if was_candidate or (new >= self.outside_max and (
+                    len(self.candidates) < self.max_candidates or new > self.candidates[0][0])):
+                insort(self.candidates, (new, media_id))
+                if len(self.candidates) > self.max_candidates:
+                    self.outside_max = max(self.outside_max, self.candidates.pop(0)[0])
+            else:
+                self.outside_max = max(self.outside_max, new)
+        elif was_candidate and new >= self.outside_max and new > 0:
+            insort(self.candidates, (new, media_id))
+        elif was_candidate and self.outside_max > 0 and len(self.candidates) < self.max_candidates // 2:
+            # Media that dropped out of the candidates leave it short, refill it once it is half empty.
+            self._rebuild_candidates()
+
+    def _rebase(self, timestamp):
+        if (timestamp - self.landmark) / self.half_life > RENORMALIZE_AFTER_HALF_LIVES:
+            self._renormalize(timestamp)
+
+    def record(self, media_id, rating, timestamp):
+        """
+        Add a review to the score of its media and mark the media as recently reviewed.
+        """
+        with self.lock:
+            self._rebase(timestamp)
+            self._grow(media_id)
+            old = self.scores[media_id]
+            new = old + self._weight(rating, timestamp)
+            self.scores[media_id] = new
+            self._rerank(media_id, old, new)
+
+            if self.recent.get(media_id, timestamp) <= timestamp:
+                self.recent[media_id] = timestamp
+                self.recent.move_to_end(media_id)
+                if len(self.recent) > self.max_recent:
+                    self.recent.popitem(last=False)
+
+    def discard(self, media_id, rating, timestamp):
+        """
+        Remove a deleted review from the score of its media.
+        """
+        with self.lock:
+            if media_id >= len(self.scores):
+                return
+            self._rebase(timestamp)
+            old = self.scores[media_id]
+            new = max(0.0, old - self._weight(rating, timestamp))
+            self.scores[media_id] = new
+            self._rerank(media_id, old, new)
+
+    def top(self, k, now=None):
+        """
+        Return up to k (media_id, score) pairs with the highest current scores, best first.
+        """
+        now = time.time() if now is None else now
+        with self.lock:
+            if k > len(self.candidates) and self.outside_max > 0:
+                self._rebuild_candidates()
+            decay = self._decay(now)
+            return [(media_id, score * decay) for score, media_id in itertools.islice(reversed(self.candidates), k)]
+
+    def recently_reviewed(self, k):
+        """
+        Return up to k (media_id, timestamp) pairs of the most recently reviewed media, latest first.
+        """
+        with self.lock:
+            return list(itertools.islice(reversed(self.recent.items()), k))
+
+    def snapshot(self, path, saved=None):
+        """
+        Atomically write the scores and the recently reviewed media to a file, with the time they are complete up to.
+        """
+        with self.lock:
+            header = {
+                "saved": time.time() if saved is None else saved,
+                "landmark": self.landmark,
+                "half_life": self.half_life,
+                "recent": list(self.recent.items()),
+            }
+            scores = self.scores.tobytes()
+
+        directory = os.path.dirname(os.path.abspath(path))
+        with tempfile.NamedTemporaryFile("wb", dir=directory, delete=False) as snapshot_file:
+            snapshot_file.write(json.dumps(header).encode() + b"\n")
+            snapshot_file.write(scores)
+        os.replace(snapshot_file.name, path)
+        return header["saved"]
+
+    @classmethod
+    def load(cls, path, **kwargs):
+        """
+        Create an engine from a snapshot file and return it with the time the snapshot was saved.
+        """
+        with open(path, "rb") as snapshot_file:
+            header = json.loads(snapshot_file.readline())
+            scores = snapshot_file.read()
+
+        engine = cls(half_life=header["half_life"], landmark=header["landmark"], **kwargs)
+        engine.scores.frombytes(scores)
+        engine.recent.update((media_id, timestamp) for media_id, timestamp in header["recent"])
+        engine._rebuild_candidates()
+        return engine, header["saved"]
+
+
+_engine = None
+_engine_lock = threading.Lock()
+_last_snapshot = 0.0
+
+# Reviews are committed within this many seconds of their creation time, so snapshots only count older reviews.
+SNAPSHOT_LAG_SECONDS = 60
+
+
+def _settings():
+    return getattr(settings, "TRENDING", {})
+
+
+def load_snapshot(path):
+    """
+    Return an engine holding every review up to a time, and that time: the snapshot file when there is one, otherwise
+    an empty engine and the start of the window worth replaying.
+    """
+    options = _settings()
+    half_life = options.get("HALF_LIFE_HOURS", 24) * 3600.0
+    kwargs = {
+        "max_candidates": options.get("CANDIDATES", 1000),
+        "max_recent": options.get("RECENT", 1000),
+    }
+    if path and os.path.exists(path):
+        return TrendingEngine.load(path, **kwargs)
+    # Reviews older than ten half-lives add less than a thousandth of their rating.
+    return TrendingEngine(half_life=half_life, **kwargs), time.time() - 10 * half_life
+
+
+def replay(engine, since, until=None):
+    """
+    Record the reviews created after `since`, and up to `until` when given, oldest first.
+    """
+    reviews = Review.objects.filter(created__gt=datetime.fromtimestamp(since, tz=timezone.utc))
+    if until is not None:
+        reviews = reviews.filter(created__lte=datetime.fromtimestamp(until, tz=timezone.utc))
+    reviews = reviews.order_by("created").values_list("media_id", "rating", "created")
+    for media_id, rating, created in reviews.iterator(chunk_size=2000):
+        engine.record(media_id, rating, created.timestamp())
+
+
+def get_engine():
+    """
+    Return the trending engine of this process, loading the last snapshot and replaying newer reviews on first use.
+    """
+    global _engine, _last_snapshot
+    with _engine_lock:
+        if _engine is None:
+            engine, since = load_snapshot(_settings().get("SNAPSHOT_PATH"))
+            _last_snapshot = time.time()
+            replay(engine, since)
+            _engine = engine
+    return _engine
+
+
+def refresh_snapshot(path):
+    """
+    Bring the snapshot file up to date with the reviews in the database, then replace the engine of this process with
+    it, after replaying the newer reviews, so that the process also counts the reviews written through other processes.
+    The engine of this process is not written, since it misses those reviews: the snapshot only ever adds the reviews
+    created since its own time, so every process can refresh the same file.
+    """
+    global _engine
+    try:
+        engine, since = load_snapshot(path)
+        until = time.time() - SNAPSHOT_LAG_SECONDS
+        if until > since:
+            replay(engine, since, until)
+            engine.snapshot(path, saved=until)
+            since = until
+        # Reviews are recorded under the lock too, so none is recorded into the replaced engine after the replay.
+        with _engine_lock:
+            if _engine is not None:
+                replay(engine, since)
+                _engine = engine
+    finally:
+        connection.close()
+
+
+def maybe_snapshot():
+    """
+    Refresh the snapshot in the background when snapshots are enabled and the last refresh is old enough.
+    """
+    global _last_snapshot
+    options = _settings()
+    path = options.get("SNAPSHOT_PATH")
+    if not path or _engine is None or time.time() - _last_snapshot < options.get("SNAPSHOT_SECONDS", 300):
+        return None
+
+    _last_snapshot = time.time()
+    thread = threading.Thread(target=refresh_snapshot, args=(path,), daemon=True)
+    thread.start()
+    return thread
+
+
+def record_review(media_id, rating, created):
+    """
+    Count a new review towards trending, if this process has loaded the engine.
+    Reviews committed before the engine is loaded are picked up by its replay instead.
+    """
+    if _engine is not None:
+        with _engine_lock:
+            _engine.record(media_id, rating, created.timestamp())
+        maybe_snapshot()
+
+
+def discard_review(media_id, rating, created):
+    """
+    Remove a deleted review from trending, if this process has loaded the engine.
+    """
+    if _engine is not None:
+        with _engine_lock:
+            _engine.discard(media_id, rating, created.timestamp())
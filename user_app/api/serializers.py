@@ -1,4 +1,5 @@
 from django.contrib.auth.models import User
+from django.db import IntegrityError, transaction
 from rest_framework import serializers
 
 
@@ -19,7 +20,9 @@ class RegistrationSerializer(serializers.ModelSerializer):
     def save(self):
         """
         Save method to validate and create a new user account.
-        Ensures passwords match and checks for email uniqueness.
+        Ensures passwords match and relies on the unique username and email indexes to reject duplicates,
+        reporting the field whose constraint failed when a concurrent sign-up claimed it after validation.
+        The account and its authentication token are created in a single transaction.
         """
         password = self.validated_data['password']
         confirm_password = self.validated_data['confirm_password']
@@ -27,11 +30,17 @@ class RegistrationSerializer(serializers.ModelSerializer):
         if password != confirm_password:
             raise serializers.ValidationError({'error': 'Password and Confirm Password fields must be the same!'})
 
-        if User.objects.filter(email=self.validated_data['email']).exists():
-            raise serializers.ValidationError({'error': 'Email already exists!'})
-
         account = User(email=self.validated_data['email'], username=self.validated_data['username'])
         account.set_password(password)
-        account.save()
 
-        return account
\ No newline at end of file
+        try:
+            with transaction.atomic():
+                account.save()
+        except IntegrityError:
+            if User.objects.filter(username=account.username).exists():
+                raise serializers.ValidationError({'error': 'Username already exists!'})
+            if User.objects.filter(email=account.email).exists():
+                raise serializers.ValidationError({'error': 'Email already exists!'})
+            raise
+
+        return account
@@ -1,8 +1,7 @@
-from django.contrib import admin
 from django.urls import path
 from rest_framework.authtoken.views import obtain_auth_token
 
-from user_app.api.views import *
+from user_app.api.views import logout_view, registration_view
 
 urlpatterns = [
     path("login/", obtain_auth_token, name="login"),
@@ -1,11 +1,10 @@
 from drf_spectacular.utils import OpenApiResponse, extend_schema
 from rest_framework import status
-from rest_framework.authtoken.models import Token
 from rest_framework.decorators import api_view
 from rest_framework.response import Response
 
 from user_app import signals
-from user_app.api.serializers import *
+from user_app.api.serializers import RegistrationSerializer
 
 
 @extend_schema(
@@ -32,8 +31,7 @@ def registration_view(request):
         data["username"] = account.username
         data["email"] = account.email
 
-        token = Token.objects.get(user=account).key
-        data["token"] = token
+        data["token"] = account.auth_token.key
 
         return Response(data, status=status.HTTP_201_CREATED)
     else:
@@ -0,0 +1,56 @@
+from django.contrib.auth.hashers import get_hasher
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.authtoken.views import obtain_auth_token
+from rest_framework.test import APIRequestFactory
+
+from cinebase.benchmark import format_summary, run_concurrently
+from user_app.api.views import registration_view
+
+
+class Command(BaseCommand):
+    """
+    Benchmark the registration and login endpoints under concurrent load.
+    """
+
+    help = "Benchmark the registration and login (obtain_auth_token) endpoints under concurrent load."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=50, help="Number of accounts to register and log in.")
+        parser.add_argument("--concurrency", type=int, default=8, help="Number of concurrent worker threads.")
+        parser.add_argument("--prefix", default="bench_auth_", help="Username prefix of the benchmark accounts.")
+
+    def handle(self, *args, **options):
+        prefix = options["prefix"]
+        if User.objects.filter(username__startswith=prefix).exists():
+            raise CommandError(f"Accounts prefixed with {prefix!r} already exist, choose another --prefix.")
+
+        factory = APIRequestFactory()
+        register = registration_view.cls.as_view(throttle_classes=())
+        password = "bench-Password-123"
+
+        def register_one(index):
+            data = {
+                "username": f"{prefix}{index}",
+                "email": f"{prefix}{index}@example.com",
+                "password": password,
+                "confirm_password": password,
+            }
+            response = register(factory.post("/api/account/register/", data, format="json"))
+            if response.status_code != 201:
+                raise CommandError(f"Registration failed: {response.data}")
+
+        def login_one(index):
+            data = {"username": f"{prefix}{index}", "password": password}
+            response = obtain_auth_token(factory.post("/api/account/login/", data, format="json"))
+            if response.status_code != 200:
+                raise CommandError(f"Login failed: {response.data}")
+
+        jobs = range(options["requests"])
+        self.stdout.write(f"Password hasher: {get_hasher().algorithm}, concurrency: {options['concurrency']}")
+
+        try:
+            self.stdout.write(format_summary("register", run_concurrently(register_one, jobs, options["concurrency"])))
+            self.stdout.write(format_summary("login", run_concurrently(login_one, jobs, options["concurrency"])))
+        finally:
+            User.objects.filter(username__startswith=prefix).delete()
@@ -0,0 +1,15 @@
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            sql="CREATE UNIQUE INDEX user_app_auth_user_email_uniq ON auth_user (email) WHERE email <> ''",
+            reverse_sql="DROP INDEX user_app_auth_user_email_uniq",
+        ),
+    ]
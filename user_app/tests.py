@@ -1,7 +1,11 @@
+from unittest import mock
+
 from django.contrib.auth.models import User
+from django.db import IntegrityError
 from django.urls import reverse
 from rest_framework import status
 from rest_framework.authtoken.models import Token
+from rest_framework.exceptions import ValidationError
 from rest_framework.test import APITestCase
 
 
@@ -21,6 +25,20 @@ class RegisterTestCase(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_201_CREATED)
         self.assertTrue(User.objects.filter(username="testcase").exists())
         self.assertEqual(User.objects.get(username="testcase").email, "testcase@example.com")
+
+    def test_register_returns_token(self):
+        """Test that registration returns the token created together with the account."""
+        data = {
+            "username": "testcase",
+            "email": "testcase@example.com",
+            "password": "password",
+            "confirm_password": "password"
+        }
+
+        response = self.client.post(reverse('register'), data)
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['token'], Token.objects.get(user__username="testcase").key)
     
     def test_register_password_mismatch(self):
         """Test registration fails due to mismatched passwords."""
@@ -66,6 +84,48 @@ class RegisterTestCase(APITestCase):
         
         self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
 
+    def test_register_concurrent_signups(self):
+        """Test that a sign-up losing a race after validation reports the field another sign-up claimed."""
+        from user_app.api.serializers import RegistrationSerializer
+
+        data = {
+            "username": "testcase",
+            "email": "testcase@example.com",
+            "password": "password",
+            "confirm_password": "password"
+        }
+        claimed = (
+            ("Username already exists!", {"username": "testcase", "email": "other@example.com"}),
+            ("Email already exists!", {"username": "otheruser", "email": "testcase@example.com"}),
+        )
+
+        for error, other in claimed:
+            with self.subTest(error=error):
+                serializer = RegistrationSerializer(data=data)
+                self.assertTrue(serializer.is_valid())
+                user = User.objects.create_user(password="password", **other)
+
+                with self.assertRaises(ValidationError) as raised:
+                    serializer.save()
+
+                self.assertEqual(raised.exception.detail['error'], error)
+                user.delete()
+
+    def test_register_other_integrity_error(self):
+        """Test that an integrity error unrelated to the username or email is not reported as a duplicate."""
+        from user_app.api.serializers import RegistrationSerializer
+
+        serializer = RegistrationSerializer(data={
+            "username": "testcase",
+            "email": "testcase@example.com",
+            "password": "password",
+            "confirm_password": "password"
+        })
+        self.assertTrue(serializer.is_valid())
+
+        with mock.patch.object(User, "save", side_effect=IntegrityError), self.assertRaises(IntegrityError):
+            serializer.save()
+
 class LoginLogoutTestCase(APITestCase):
     
     def setUp(self):